@@ -0,0 +1,32 @@
+"""
+Memory held by Record API responses compared to utils.CHO models
+
+    $ python benchmarks/models.py [N_RECORDS]
+"""
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pyeuropeana.utils as utils
+
+PAYLOAD = Path(__file__).parent.parent / "tests" / "data" / "record.json"
+
+
+def measure(build):
+    tracemalloc.start()
+    objects = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objects, size
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    text = PAYLOAD.read_text()
+    _, dict_size = measure(lambda: [json.loads(text) for _ in range(n)])
+    _, model_size = measure(
+        lambda: list(utils.iter_chos(json.loads(text) for _ in range(n)))
+    )
+    print(f"dicts   {dict_size / n:>10,.0f} bytes/record")
+    print(f"models  {model_size / n:>10,.0f} bytes/record")
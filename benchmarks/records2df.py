@@ -0,0 +1,94 @@
+"""
+Throughput of utils.records2df over recorded Record API payloads
+
+    $ python benchmarks/records2df.py [N_RECORDS]
+
+The payload in tests/data/record.json is replicated with distinct identifiers.
+The previous process_CHO_record, which merged all the proxies into a new dict
+for every record, is kept below for comparison.
+"""
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import pyeuropeana.utils as utils
+
+PAYLOAD = Path(__file__).parent.parent / "tests" / "data" / "record.json"
+
+
+def legacy_process_CHO_record(response):
+    obj = response["object"]
+    europeana_id = obj["about"]
+    try:
+        image_url = obj["aggregations"][0]["edmIsShownBy"]
+    except Exception:
+        image_url = None
+    proxy_dict = {}
+    for proxy in obj["proxies"]:
+        proxy_dict.update(proxy)
+    title_lang = proxy_dict["dcTitle"] if "dcTitle" in proxy_dict else None
+    title = None
+    if title_lang:
+        title_lang = {k: v[0] for k, v in title_lang.items()}
+        title = legacy_get_value_lang(title_lang)
+    provider_lang = obj["aggregations"][0]["edmProvider"]
+    provider_lang = {k: v[0] for k, v in provider_lang.items()}
+    provider = legacy_get_value_lang(provider_lang)
+    return {
+        "europeana_id": europeana_id,
+        "image_url": image_url,
+        "uri": utils.europeana_id2uri(europeana_id),
+        "dataset_name": obj["edmDatasetName"][0],
+        "country": obj["europeanaAggregation"]["edmCountry"]["def"][0],
+        "language": obj["europeanaAggregation"]["edmLanguage"]["def"][0],
+        "type": obj["type"],
+        "title": title,
+        "title_lang": title_lang,
+        "rights": obj["aggregations"][0]["edmRights"]["def"][0],
+        "provider": provider,
+        "provider_lang": provider_lang,
+    }
+
+
+def legacy_get_value_lang(lang_dict):
+    if "en" in lang_dict.keys():
+        value = lang_dict["en"]
+    else:
+        _, value = list(lang_dict.items())[0]
+    return value
+
+
+def load_responses(n):
+    template = json.loads(PAYLOAD.read_text())
+    responses = []
+    for i in range(n):
+        response = copy.deepcopy(template)
+        response["object"]["about"] = f"/79/resource_document_{i}"
+        responses.append(response)
+    return responses
+
+
+def timeit(name, fn, responses, repeat=5):
+    best = min(_run(fn, responses) for _ in range(repeat))
+    print(f"{name:<28} {len(responses) / best:>12,.0f} records/s")
+
+
+def _run(fn, responses):
+    start = time.perf_counter()
+    fn(responses)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    responses = load_responses(n)
+    timeit(
+        "legacy per-record DataFrame",
+        lambda rs: pd.DataFrame([legacy_process_CHO_record(r) for r in rs]),
+        responses,
+    )
+    timeit("records2df", utils.records2df, responses)
@@ -0,0 +1,62 @@
+"""
+Memory of the utils.search2df output with and without categorical columns
+
+    $ python benchmarks/search2df_memory.py [N_ITEMS]
+
+Search API items are generated with the low cardinality of real result sets:
+a handful of types, rights statements and countries, and a few hundred
+providers and datasets, next to unique identifiers, titles and URLs.
+"""
+import random
+import sys
+
+import pyeuropeana.utils as utils
+
+TYPES = ["IMAGE", "TEXT", "SOUND", "VIDEO", "3D"]
+RIGHTS = [
+    "http://creativecommons.org/publicdomain/mark/1.0/",
+    "http://creativecommons.org/publicdomain/zero/1.0/",
+    "http://creativecommons.org/licenses/by/4.0/",
+    "http://creativecommons.org/licenses/by-sa/4.0/",
+    "http://rightsstatements.org/vocab/InC/1.0/",
+]
+COUNTRIES = ["Netherlands", "France", "Germany", "Italy", "Spain", "Sweden"]
+LANGUAGES = ["nl", "fr", "de", "it", "es", "sv", "mul"]
+
+
+def make_response(n, seed=0):
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        dataset = rng.randrange(300)
+        items.append(
+            {
+                "id": f"/{dataset}/item_{i}",
+                "type": rng.choice(TYPES),
+                "edmIsShownBy": [f"https://images.example.org/{dataset}/{i}.jpg"],
+                "country": [rng.choice(COUNTRIES)],
+                "title": [f"Title of item {i}"],
+                "language": [rng.choice(LANGUAGES)],
+                "rights": [rng.choice(RIGHTS)],
+                "dataProvider": [f"Data provider {dataset % 200}"],
+                "edmDatasetName": [f"{dataset}_Example_Dataset"],
+            }
+        )
+    return {"items": items}
+
+
+def megabytes(df):
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    response = make_response(n)
+    plain = utils.search2df(response)
+    categorical = utils.search2df(response, categorical=True)
+    print(f"{'object columns':<24} {megabytes(plain):>10.1f} MiB")
+    print(f"{'categorical columns':<24} {megabytes(categorical):>10.1f} MiB")
+    for column in utils.edm_utils.CATEGORICAL_COLUMNS:
+        before = plain[column].memory_usage(deep=True) / 1024**2
+        after = categorical[column].memory_usage(deep=True) / 1024**2
+        print(f"  {column:<22} {before:>10.1f} -> {after:.1f} MiB")
@@ -3,6 +3,7 @@ from . import apis as apis
 
 from .apis.search import search as search
 from .apis.record import record as record
+from .apis.client import EuropeanaClient as EuropeanaClient
 
 from .apis import entity as entity
 from .apis import iiif as iiif
@@ -1,2 +1,4 @@
-from .search import search
+from .search import search, facets
 from .record import record
+from .sync import sync
+from .client import EuropeanaClient
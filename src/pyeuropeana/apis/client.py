@@ -0,0 +1,117 @@
+from functools import partial
+
+from ..utils.auth import KeyPool, get_api_key
+from ..utils.concurrency import RateLimiter
+from ..utils.http import Session
+from . import entity, iiif
+from .record import record as _record
+from .search import facets as _facets
+from .search import search as _search
+from .sync import sync as _sync
+
+
+class _Namespace:
+    """
+    Functions of an apis module with the client argument bound
+    """
+
+    def __init__(self, client, module, names):
+        for name in names:
+            setattr(self, name, partial(getattr(module, name), client=client))
+
+
+class EuropeanaClient:
+    """
+    Client for the Europeana APIs [1] with its own API key, connections, cache and rate limit
+
+    The module functions of pyeuropeana.apis read the API key from the environment and
+    open new connections for every call. A client is configured once and keeps a pool of
+    connections that is reused across calls. It is safe to share across threads, and
+    several clients, for example one per API key, can be used in the same process.
+    Its methods mirror the module functions and take the same arguments.
+
+    Given several API keys, the requests are spread across them, see utils.auth.KeyPool.
+
+    >>> import pyeuropeana.apis as apis
+    >>> client = apis.EuropeanaClient(api_key = 'yourapikey', limiter = 10)
+    >>> resp = client.search(query = 'Rome', rows = 10)
+    >>> resp = client.record('/79/resource_document_museumboerhaave_V35167')
+    >>> resp = client.entity.retrieve(TYPE = 'agent', IDENTIFIER = 3)
+    >>> resp = client.iiif.manifest('/9200356/BibliographicResource_3000118390149')
+
+    Args:
+      api_key (:obj:`str`, :obj:`list` of :obj:`str` or :obj:`pyeuropeana.utils.auth.KeyPool`, optional)
+        API key of the requests, or several of them. Defaults to the EUROPEANA_API_KEY
+        environment variable, read when the client is created. A list of keys is used
+        without rate limits, pass a KeyPool to set the rate of each key.
+      pool (:obj:`int`, optional)
+        Maximum number of connections kept open per host. Defaults to 10.
+      cache (:obj:`dict` or :obj:`pyeuropeana.utils.DiskCache`, optional)
+        Cache of the responses of record, entity.retrieve, iiif.manifest and iiif.annopage,
+        used when they are called without a cache, see utils.http.get_json
+      limiter (:obj:`float` or :obj:`pyeuropeana.utils.concurrency.RateLimiter`, optional)
+        Maximum number of requests per second, or a limiter shared with other clients.
+        Defaults to no limit.
+      timeout (:obj:`float` or :obj:`tuple`, optional)
+        Connect and read timeouts in seconds of the requests made without an explicit
+        timeout. Defaults to utils.http.TIMEOUT.
+
+    References:
+      1. https://pro.europeana.eu/page/apis
+    """
+
+    def __init__(self, api_key=None, pool=10, cache=None, limiter=None, timeout=None):
+        self.keys = None
+        if isinstance(api_key, (list, tuple, KeyPool)):
+            self.keys = api_key if isinstance(api_key, KeyPool) else KeyPool(api_key)
+            # placed in the parameters, and replaced by a key of the pool for every request
+            api_key = self.keys.keys[0]
+        self.api_key = api_key or get_api_key()
+        if isinstance(limiter, (int, float)):
+            limiter = RateLimiter(limiter)
+        self.session = Session(
+            pool=pool, timeout=timeout, limiter=limiter, keys=self.keys
+        )
+        self.cache = cache
+        self.entity = _Namespace(
+            self, entity, ("suggest", "retrieve", "resolve", "resolve_many")
+        )
+        self.iiif = _Namespace(
+            self, iiif, ("search", "manifest", "annopage", "fulltext")
+        )
+
+    def search(self, **kwargs):
+        """
+        Same as apis.search
+        """
+        return _search(client=self, **kwargs)
+
+    def facets(self, **kwargs):
+        """
+        Same as apis.facets
+        """
+        return _facets(client=self, **kwargs)
+
+    def record(self, record_id, **kwargs):
+        """
+        Same as apis.record
+        """
+        return _record(record_id, client=self, **kwargs)
+
+    def sync(self, store, **kwargs):
+        """
+        Same as apis.sync
+        """
+        return _sync(store, client=self, **kwargs)
+
+    def close(self):
+        """
+        Closes the connections of the client
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
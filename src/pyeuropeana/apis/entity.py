@@ -1,5 +1,17 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
 import requests
 from ..utils.auth import get_api_key
+from ..utils.cache import DiskCache
+from ..utils.concurrency import SingleFlight
+from ..utils.http import get, get_json
+
+# concurrent calls of retrieve for the same entity share one request
+_retrieve_flight = SingleFlight()
 
 
 def suggest(**kwargs):
@@ -20,6 +32,10 @@ def suggest(**kwargs):
            Used to restrict search for a specific entity type (agents, places, concepts and time spans), otherwise all.
         language (:obj:`str`, optional)
            The language (two or three letters ISO639 language code) in which the text is written. If omitted, defaults to English ("en").
+        timeout (:obj:`float` or :obj:`tuple`, optional)
+           Connect and read timeouts in seconds. Defaults to utils.http.TIMEOUT.
+        client (:obj:`pyeuropeana.apis.EuropeanaClient`, optional)
+           Client whose API key, connections, default timeout and rate limiter are used
 
     Returns: :obj:`dict`
       The suggest method returns a list of 10 suggest entities. For some entities (in particular people/agents) it returns some contextual
@@ -30,7 +46,8 @@ def suggest(**kwargs):
       1. https://pro.europeana.eu/page/entity
 
     """
-    wskey = get_api_key()
+    client = kwargs.get("client")
+    wskey = client.api_key if client else get_api_key()
     language = kwargs.get("language", "en")
     TYPE = kwargs.get("TYPE")
     text = kwargs.get("text")
@@ -38,12 +55,151 @@ def suggest(**kwargs):
         raise ValueError("No arguments passed")
     if not text:
         raise ValueError('Argument "text" is needed')
-    return requests.get(
+    return get(
         "https://api.europeana.eu/entity/suggest",
         params={"wskey": wskey, "text": text, "type": TYPE, "language": language},
+        timeout=kwargs.get("timeout"),
+        session=client.session if client else None,
     ).json()
 
 
+class Suggester:
+    """
+    Type-ahead client for the suggest method of the Entity API [1], meant to sit behind an autocomplete box
+
+    Results are cached per (text, TYPE, language). When a shorter prefix of the text has been
+    answered with all its matches, the results for the longer text are obtained by filtering
+    those locally instead of calling the API. Identical concurrent queries share one request.
+    Queries made with a session, such as the id of a user or of a search box, are debounced:
+    they are only sent after waiting ``debounce`` seconds without a newer query from the same
+    session, and return None when superseded. Queries without a session are sent at once.
+
+    >>> import pyeuropeana.apis as apis
+    >>> suggester = apis.entity.Suggester()
+    >>> resp = suggester.suggest('leon', TYPE = 'agent', language = 'de', session = user_id)
+
+    Args:
+      debounce (:obj:`float`, optional)
+        Seconds to wait before sending a request. Defaults to 0.15.
+      max_size (:obj:`int`, optional)
+        Maximum number of cached queries, and of sessions whose latest query is tracked.
+        Defaults to 1024.
+      page_size (:obj:`int`, optional)
+        Number of entities returned by the API for a query. A response with fewer items
+        is considered complete. Defaults to 10.
+
+    References:
+      1. https://pro.europeana.eu/page/entity
+
+    """
+
+    def __init__(self, debounce=0.15, max_size=1024, page_size=10):
+        self.debounce = debounce
+        self.max_size = max_size
+        self.page_size = page_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._generations = OrderedDict()
+
+    def suggest(self, text, TYPE=None, language="en", session=None):
+        """
+        Returns the same response as apis.entity.suggest, or None if a newer
+        query was made for the same session while this one was waiting.
+        Without a session, the query is neither debounced nor dropped.
+        """
+        if not text:
+            raise ValueError('Argument "text" is needed')
+        text = " ".join(text.lower().split())
+        key = (text, TYPE, language)
+        with self._lock:
+            generation = None
+            if session is not None:
+                generation = self._generations.get(session, 0) + 1
+                self._generations[session] = generation
+                self._generations.move_to_end(session)
+                while len(self._generations) > self.max_size:
+                    self._generations.popitem(last=False)
+            response = self._get(key)
+            if response is None:
+                response = self._derive(key)
+        if response is not None:
+            return response
+
+        if self.debounce and session is not None:
+            time.sleep(self.debounce)
+            if self._superseded(session, generation):
+                return None
+
+        response = self._flight.do(
+            key, suggest, text=text, TYPE=TYPE, language=language
+        )
+        if _has_items(response):
+            # error answers, such as rate limits, are returned but not cached
+            with self._lock:
+                self._put(key, response)
+        if self._superseded(session, generation):
+            return None
+        return response
+
+    def _superseded(self, session, generation):
+        if session is None:
+            return False
+        with self._lock:
+            # a session evicted from the tracked ones has no newer query
+            return self._generations.get(session, generation) != generation
+
+    def _get(self, key):
+        response = self._cache.get(key)
+        if response is not None:
+            self._cache.move_to_end(key)
+        return response
+
+    def _put(self, key, response):
+        self._cache[key] = response
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def _derive(self, key):
+        text, TYPE, language = key
+        for end in range(len(text) - 1, 0, -1):
+            response = self._cache.get((text[:end], TYPE, language))
+            if not _has_items(response):
+                continue
+            items = response["items"]
+            if len(items) >= self.page_size:
+                # the API might have left out matches of the longer text
+                return None
+            tokens = text.split()
+            response = dict(response)
+            response["items"] = [
+                item for item in items if _matches_tokens(item, tokens)
+            ]
+            response["total"] = len(response["items"])
+            self._put(key, response)
+            return response
+        return None
+
+
+def _has_items(response):
+    return (
+        isinstance(response, dict)
+        and response.get("success", True) is not False
+        and isinstance(response.get("items"), list)
+    )
+
+
+def _matches_tokens(item, tokens):
+    words = []
+    for field in ("prefLabel", "altLabel"):
+        for value in (item.get(field) or {}).values():
+            values = value if isinstance(value, list) else [value]
+            for label in values:
+                words += label.lower().split()
+    return all(any(word.startswith(token) for word in words) for token in tokens)
+
+
 def retrieve(**kwargs):
     """
     Retrieve method of the Entity API [1]. Returns information about a particular entity
@@ -59,28 +215,46 @@ def retrieve(**kwargs):
           The type of the entity, either: "agent", "concept", "place" or "timespan".
       IDENTIFIER (:obj:`int`)
           The local identifier for the entity.
+      cache (:obj:`dict` or :obj:`pyeuropeana.utils.DiskCache`, optional)
+          Cache of responses. Cached entities are revalidated with a conditional request
+          and returned without downloading them again when unchanged, see utils.http.get_json.
+      timeout (:obj:`float` or :obj:`tuple`, optional)
+          Connect and read timeouts in seconds. Defaults to utils.http.TIMEOUT.
+      client (:obj:`pyeuropeana.apis.EuropeanaClient`, optional)
+          Client whose API key, connections, cache, default timeout and rate limiter are used
 
     Returns: :obj:`dict`
       The retrieve method returns all known information about an entity in all languages in which the information is available.
       This includes all localised labels (prefLabel), contextual information such as biography and all references of the same entity
       in other external data sources (sameAs). For a full list of data fields, please see the Entity context definition.
+      Concurrent calls for the same entity wait for a single request and receive the same decoded response,
+      which should not be modified.
 
     References:
       1. https://pro.europeana.eu/page/entity
 
     """
-    wskey = get_api_key()
+    client = kwargs.get("client")
+    wskey = client.api_key if client else get_api_key()
     TYPE = kwargs.get("TYPE")
     IDENTIFIER = kwargs.get("IDENTIFIER")
     if not kwargs:
         raise ValueError("No arguments passed")
-    return requests.get(
+    cache = kwargs.get("cache")
+    if cache is None and client:
+        cache = client.cache
+    return _retrieve_flight.do(
+        (TYPE, str(IDENTIFIER), wskey),
+        get_json,
         f"https://api.europeana.eu/entity/{TYPE}/base/{IDENTIFIER}.json",
-        params={"wskey": wskey},
-    ).json()
+        {"wskey": wskey},
+        cache=cache,
+        timeout=kwargs.get("timeout"),
+        session=client.session if client else None,
+    )
 
 
-def resolve(uri):
+def resolve(uri, timeout=None, client=None):
     """
     Resolve method of the Entity API [1]. Searches for an entity given an input URI
 
@@ -90,20 +264,113 @@ def resolve(uri):
     Args:
       uri (:obj:`str`)
           The external identifier (as an URI) for the entity.
+      timeout (:obj:`float` or :obj:`tuple`, optional)
+          Connect and read timeouts in seconds. Defaults to utils.http.TIMEOUT.
+      client (:obj:`pyeuropeana.apis.EuropeanaClient`, optional)
+          Client whose API key, connections, default timeout and rate limiter are used
 
     Returns: :obj:`dict`
       On success, the method returns a HTTP 301 with the Europeana URI within the Location Header field.
+      A ValueError is raised when no entity matches the uri, and a :obj:`requests.HTTPError`
+      on other error answers, such as 429 or 503.
 
     References:
       1. https://pro.europeana.eu/page/entity
 
     """
-    wskey = get_api_key()
+    wskey = client.api_key if client else get_api_key()
     if not isinstance(uri, str):
         raise ValueError("input uri must be a string")
-    response = requests.get(
-        "https://api.europeana.eu/entity/resolve/", params={"wskey": wskey, "uri": uri}
-    ).json()
+    response = get(
+        "https://api.europeana.eu/entity/resolve/",
+        params={"wskey": wskey, "uri": uri},
+        timeout=timeout,
+        session=client.session if client else None,
+    )
+    if response.status_code not in (200, 404):
+        # rate limits, server or key errors say nothing about the uri
+        raise requests.HTTPError(
+            f"{response.status_code} error resolving {uri}", response=response
+        )
+    response = response.json()
     if "success" in response.keys():
         raise ValueError(response["error"])
     return response
+
+
+def resolve_many(uris, max_workers=8, cache=None, timeout=None, client=None):
+    """
+    Resolves many external URIs concurrently with the resolve method of the Entity API [1]
+
+    Repeated URIs are resolved only once. When a cache is given, the outcome for each URI
+    is memoized there, so that later calls (or later runs, if the cache is persistent)
+    do not send the same requests again. Only entities found and URIs without an entity
+    are memoized: network failures and error answers such as 429 or 503 are reported but
+    not memoized.
+
+    >>> import pyeuropeana.apis as apis
+    >>> resp = apis.entity.resolve_many(
+    >>>    [
+    >>>       'http://dbpedia.org/resource/Leonardo_da_Vinci',
+    >>>       'http://www.wikidata.org/entity/Q762',
+    >>>    ],
+    >>>    cache = 'resolve_cache.sqlite',
+    >>> )
+
+    Args:
+      uris (:obj:`list` of :obj:`str`)
+          The external identifiers (as URIs) for the entities.
+      max_workers (:obj:`int`, optional)
+          Number of concurrent requests. Defaults to 8.
+      cache (:obj:`str`, :obj:`pathlib.Path` or :obj:`dict`, optional)
+          Path to a persistent cache file or a dict-like object such as :obj:`pyeuropeana.utils.DiskCache`.
+      timeout (:obj:`float` or :obj:`tuple`, optional)
+          Connect and read timeouts in seconds of each request. Defaults to utils.http.TIMEOUT.
+      client (:obj:`pyeuropeana.apis.EuropeanaClient`, optional)
+          Client used for the requests, as in resolve
+
+    Returns: :obj:`dict`
+      Maps each input URI to a :obj:`dict` with the keys "result", holding the response of
+      the resolve method or None, and "error", holding the error message or None.
+
+    References:
+      1. https://pro.europeana.eu/page/entity
+
+    """
+    if isinstance(uris, str):
+        raise ValueError("uris must be a list of strings")
+    uris = list(dict.fromkeys(uris))
+    if not all(isinstance(uri, str) for uri in uris):
+        raise ValueError("input uris must be strings")
+    if isinstance(cache, (str, Path)):
+        cache = DiskCache(cache)
+
+    results = {}
+    pending = []
+    for uri in uris:
+        if cache is not None and uri in cache:
+            results[uri] = cache[uri]
+        else:
+            pending.append(uri)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(resolve, uri, timeout=timeout, client=client): uri
+                for uri in pending
+            }
+            for future in as_completed(futures):
+                uri = futures[future]
+                try:
+                    entry = {"result": future.result(), "error": None}
+                except requests.RequestException as e:
+                    # transient failure, it is worth trying again in a later call
+                    results[uri] = {"result": None, "error": str(e)}
+                    continue
+                except ValueError as e:
+                    entry = {"result": None, "error": str(e)}
+                if cache is not None:
+                    cache[uri] = entry
+                results[uri] = entry
+
+    return {uri: results[uri] for uri in uris}
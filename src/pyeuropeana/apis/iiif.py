@@ -1,10 +1,11 @@
-import requests
 import re
-from urllib.request import urlopen
-import json
-
 from ..utils.auth import get_api_key
 from ..utils.edm_utils import cursor_search
+from ..utils.http import as_deadline, get, get_json
+
+# limits of the decompressed size and of the reading time of manifests and annotation pages
+MAX_BYTES = 64 * 1024 * 1024
+TIME_LIMIT = 60
 
 
 def search(**kwargs):
@@ -23,6 +24,12 @@ def search(**kwargs):
           The term to search
       profile (:obj:`str`)
           If profile is 'hits' the mentions in the transcribed text where the search keyword was found will be displayed
+      timeout (:obj:`float` or :obj:`tuple`, optional)
+          Connect and read timeouts in seconds of each request. Defaults to utils.http.TIMEOUT.
+      deadline (:obj:`float`, optional)
+          Maximum number of seconds of the whole search, shared by all its pages and retries.
+      client (:obj:`pyeuropeana.apis.EuropeanaClient`, optional)
+          Client whose API key, connections, default timeout and rate limiter are used
 
     Returns :obj:`dict`
       Response
@@ -31,8 +38,10 @@ def search(**kwargs):
       1. https://pro.europeana.eu/page/iiif
     """
 
+    client = kwargs.get("client")
+    session = client.session if client else None
     params = {
-        "wskey": get_api_key(),
+        "wskey": client.api_key if client else get_api_key(),
         "query": kwargs.get("query", "*"),
         "qf": kwargs.get("qf"),
         "reusability": kwargs.get("reusability"),
@@ -65,15 +74,28 @@ def search(**kwargs):
                 {item.split("=")[0]: item.split("=")[1] for item in hits_list[1:]}
             )
 
-    response = requests.get(endpoint, params=_params)
+    timeout = kwargs.get("timeout")
+    deadline = as_deadline(kwargs.get("deadline"))
+    response = get(
+        endpoint, params=_params, timeout=timeout, deadline=deadline, session=session
+    )
     url = response.url
 
-    response = cursor_search(endpoint, _params)
+    response = cursor_search(
+        endpoint, _params, timeout=timeout, deadline=deadline, session=session
+    )
     response.update({"url": url, "parms": params})
     return response
 
 
-def manifest(RECORD_ID):
+def manifest(
+    RECORD_ID,
+    cache=None,
+    max_bytes=MAX_BYTES,
+    time_limit=TIME_LIMIT,
+    timeout=None,
+    client=None,
+):
     """
 
   Manifest method of the IIIF API [1]. Returns a minimal set of metadata for an object
@@ -85,6 +107,18 @@ def manifest(RECORD_ID):
     record_id (:obj:`str`)
         The identifier of the record which is composed of the dataset identifier \\
         plus a local identifier within the dataset in the form of "/DATASET_ID/LOCAL_ID", for more detail see Europeana ID [2]
+    cache (:obj:`dict` or :obj:`pyeuropeana.utils.DiskCache`, optional)
+        Cache of responses. Cached manifests are revalidated with a conditional request
+        and returned without downloading them again when unchanged, see utils.http.get_json.
+    max_bytes (:obj:`int`, optional)
+        Maximum size of the decompressed response, beyond which a ValueError is raised. Defaults to 64 MiB.
+    time_limit (:obj:`int` or :obj:`float`, optional)
+        Maximum number of seconds to read the response, beyond which a
+        :obj:`requests.Timeout` is raised. Defaults to 60.
+    timeout (:obj:`float` or :obj:`tuple`, optional)
+        Connect and read timeouts in seconds. Defaults to time_limit.
+    client (:obj:`pyeuropeana.apis.EuropeanaClient`, optional)
+        Client whose API key, connections, cache, default timeout and rate limiter are used
 
   Returns :obj:`dict`
     Response
@@ -92,14 +126,21 @@ def manifest(RECORD_ID):
   References:
     1. https://pro.europeana.eu/page/iiif
   """
-    wskey = get_api_key()
+    wskey = client.api_key if client else get_api_key()
     europeana_id = re.findall("/\w*/\w*", RECORD_ID)
     if not europeana_id:
         raise ValueError("Not valid RECORD_ID")
-    url = f"https://iiif.europeana.eu/presentation{RECORD_ID}/manifest?wskey={wskey}"
-    with urlopen(url) as response:
-        body = response.read()
-    return json.loads(body)
+    if cache is None and client:
+        cache = client.cache
+    return get_json(
+        f"https://iiif.europeana.eu/presentation{RECORD_ID}/manifest",
+        params={"wskey": wskey},
+        cache=cache,
+        max_bytes=max_bytes,
+        time_limit=time_limit,
+        timeout=timeout,
+        session=client.session if client else None,
+    )
 
 
 def annopage(**kwargs):
@@ -119,6 +160,18 @@ def annopage(**kwargs):
     PAGE_ID (:obj:`int`)
         The number of the page in logical sequence starting with 1 for the first page.
         There can be pages that do not contain any text which will mean that the request will return a HTTP 404.
+    cache (:obj:`dict` or :obj:`pyeuropeana.utils.DiskCache`, optional)
+        Cache of responses. Cached pages are revalidated with a conditional request
+        and returned without downloading them again when unchanged, see utils.http.get_json.
+    max_bytes (:obj:`int`, optional)
+        Maximum size of the decompressed response, beyond which a ValueError is raised. Defaults to 64 MiB.
+    time_limit (:obj:`int` or :obj:`float`, optional)
+        Maximum number of seconds to read the response, beyond which a
+        :obj:`requests.Timeout` is raised. Defaults to 60.
+    timeout (:obj:`float` or :obj:`tuple`, optional)
+        Connect and read timeouts in seconds. Defaults to time_limit.
+    client (:obj:`pyeuropeana.apis.EuropeanaClient`, optional)
+        Client whose API key, connections, cache, default timeout and rate limiter are used
 
   Returns :obj:`dict`
     Response
@@ -126,7 +179,8 @@ def annopage(**kwargs):
   References:
     1. https://pro.europeana.eu/page/iiif
   """
-    wskey = get_api_key()
+    client = kwargs.get("client")
+    wskey = client.api_key if client else get_api_key()
     RECORD_ID = kwargs.get("RECORD_ID")
     PAGE_ID = kwargs.get("PAGE_ID")
     if not kwargs:
@@ -136,11 +190,19 @@ def annopage(**kwargs):
         raise ValueError("Not valid RECORD_ID")
     if not isinstance(PAGE_ID, int):
         raise ValueError("PAGE_ID must be an int")
+    cache = kwargs.get("cache")
+    if cache is None and client:
+        cache = client.cache
 
-    url = f"https://iiif.europeana.eu/presentation{RECORD_ID}/annopage/{PAGE_ID}?wskey={wskey}"
-    with urlopen(url) as response:
-        body = response.read()
-    return json.loads(body)
+    return get_json(
+        f"https://iiif.europeana.eu/presentation{RECORD_ID}/annopage/{PAGE_ID}",
+        params={"wskey": wskey},
+        cache=cache,
+        max_bytes=kwargs.get("max_bytes", MAX_BYTES),
+        time_limit=kwargs.get("time_limit", TIME_LIMIT),
+        timeout=kwargs.get("timeout"),
+        session=client.session if client else None,
+    )
 
 
 def fulltext(**kwargs):
@@ -159,6 +221,10 @@ def fulltext(**kwargs):
         plus a local identifier within the dataset in the form of "/DATASET_ID/LOCAL_ID", for more detail see Europeana ID [2]
     FULLTEXT_ID (:obj:`str`)
         The identifier of the full text resource.
+    timeout (:obj:`float` or :obj:`tuple`, optional)
+        Connect and read timeouts in seconds. Defaults to utils.http.TIMEOUT.
+    client (:obj:`pyeuropeana.apis.EuropeanaClient`, optional)
+        Client whose API key, connections, default timeout and rate limiter are used
 
   Returns :obj:`dict`
     Response
@@ -166,7 +232,8 @@ def fulltext(**kwargs):
   References:
     1. https://pro.europeana.eu/page/iiif
   """
-    wskey = get_api_key()
+    client = kwargs.get("client")
+    wskey = client.api_key if client else get_api_key()
     RECORD_ID = kwargs.get("RECORD_ID")
     FULLTEXT_ID = kwargs.get("FULLTEXT_ID")
     if not kwargs:
@@ -174,7 +241,9 @@ def fulltext(**kwargs):
     europeana_id = re.findall("/\w*/\w*", RECORD_ID)
     if not europeana_id:
         raise ValueError("Not valid RECORD_ID")
-    return requests.get(
+    return get(
         f"https://www.europeana.eu/api/fulltext{RECORD_ID}/{FULLTEXT_ID}",
         params={"wskey": wskey},
+        timeout=kwargs.get("timeout"),
+        session=client.session if client else None,
     ).json()
@@ -1,10 +1,15 @@
-import requests
 import re
 
 from ..utils.auth import get_api_key
+from ..utils.concurrency import SingleFlight
+from ..utils.edm_utils import project
+from ..utils.http import get_json
 
+# concurrent calls for the same record share one request
+_flight = SingleFlight()
 
-def record(record_id):
+
+def record(record_id, fields=None, cache=None, timeout=None, client=None):
     """
   Wrapper for the Record API [1]. Returns the information of an object specified by the Europeana ID
 
@@ -15,9 +20,20 @@ def record(record_id):
     record_id (:obj:`str`)
         The identifier of the record which is composed of the dataset identifier \\
         plus a local identifier within the dataset in the form of "/DATASET_ID/LOCAL_ID", for more detail see Europeana ID [2]
+    fields (:obj:`list` of :obj:`str`, optional)
+        Dotted paths within the record object to keep, for example ["aggregations.edmIsShownBy", "proxies.dcTitle"].
+        The rest of the object is discarded once decoded. The "about" field is always kept.
+    cache (:obj:`dict` or :obj:`pyeuropeana.utils.DiskCache`, optional)
+        Cache of responses. Cached records are revalidated with a conditional request
+        and returned without downloading them again when unchanged, see utils.http.get_json.
+    timeout (:obj:`float` or :obj:`tuple`, optional)
+        Connect and read timeouts in seconds. Defaults to utils.http.TIMEOUT.
+    client (:obj:`pyeuropeana.apis.EuropeanaClient`, optional)
+        Client whose API key, connections, cache, default timeout and rate limiter are used
 
   Returns: :obj:`dict`
-    Response
+    Response. Concurrent calls for the same record wait for a single request
+    and receive the same decoded response, which should not be modified.
 
 
   References:
@@ -26,8 +42,10 @@ def record(record_id):
   """
 
     params = {
-        "wskey": get_api_key(),
+        "wskey": client.api_key if client else get_api_key(),
     }
+    if cache is None and client:
+        cache = client.cache
 
     if not isinstance(record_id, str):
         raise ValueError("the input id should be a string")
@@ -37,9 +55,20 @@ def record(record_id):
     if not europeana_id:
         raise ValueError("Not valid Europeana id")
 
-    response = requests.get(
-        f"https://api.europeana.eu/record/v2/{record_id}.json", params=params
-    ).json()
+    response = _flight.do(
+        (record_id, params["wskey"]),
+        get_json,
+        f"https://api.europeana.eu/record/v2/{record_id}.json",
+        params,
+        cache=cache,
+        timeout=timeout,
+        session=client.session if client else None,
+    )
     if not response["success"]:
         raise ValueError(response["error"])
+    if fields:
+        # the response may be shared with concurrent callers, it is copied rather than modified
+        response = dict(
+            response, object=project(response["object"], fields, keep=("about",))
+        )
     return response
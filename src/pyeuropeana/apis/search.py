@@ -1,7 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
 import requests
 
 from ..utils.auth import get_api_key
-from ..utils.edm_utils import cursor_search
+from ..utils.edm_utils import cursor_pages, cursor_search, project
+from ..utils.http import RETRIES, as_deadline, get
+
+ENDPOINT = "https://api.europeana.eu/record/v2/search.json"
+
+# parameters of the Search API that select items besides the query, shared by search,
+# facets and the counts of split searches
+FILTERS = (
+    "qf",
+    "reusability",
+    "media",
+    "thumbnail",
+    "landingpage",
+    "theme",
+    "colourpalette",
+)
 
 
 def search(**kwargs):
@@ -51,17 +69,41 @@ def search(**kwargs):
         Name of a client side callback function, see JSONP.
       facet (:obj:`str`,optional)
         A name of an individual field or a comma separated list of fields
+      fields (:obj:`list` of :obj:`str`,optional)
+        Dotted paths of the item fields to keep, for example ["edmIsShownBy", "dcTitleLangAware.en"].
+        The rest of every page of items is discarded as soon as it is decoded. The "id" field is always kept.
+      split_by (:obj:`str`,optional)
+        Facet used to split the query, such as DATA_PROVIDER or COUNTRY. The facet counts are
+        requested first and the query is split into sub-queries of about target items with
+        qf filters on the facet values, which are harvested concurrently, see plan_search.
+        In this mode rows is the maximum number of items and defaults to all of them.
+      target (:obj:`int`,optional)
+        Number of items per sub-query when using split_by. Defaults to 10000.
+      workers (:obj:`int`,optional)
+        Number of sub-queries harvested concurrently when using split_by. Defaults to 8.
+      timeout (:obj:`float` or :obj:`tuple`,optional)
+        Connect and read timeouts in seconds of each request. Defaults to utils.http.TIMEOUT.
+      deadline (:obj:`float`,optional)
+        Maximum number of seconds of the whole search, shared by all its pages and
+        retries. A :obj:`requests.Timeout` is raised when it is exceeded. Defaults to no limit.
+      client (:obj:`pyeuropeana.apis.EuropeanaClient`,optional)
+        Client whose API key, connections, default timeout and rate limiter are used.
+        Defaults to the EUROPEANA_API_KEY environment variable and new connections.
 
     Returns: :obj:`dict`
-      Response
+      Response. With split_by, it also contains the "plan", the sub-queries with their expected
+      and received number of items, and "complete", which tells whether the number of distinct
+      items received matches the totalResults of the query.
 
     References:
       1. https://pro.europeana.eu/page/search
 
 
     """
+    client = kwargs.get("client")
+    session = client.session if client else None
     params = {
-        "wskey": get_api_key(),
+        "wskey": client.api_key if client else get_api_key(),
         "query": kwargs.get("query", "*"),
         "qf": kwargs.get("qf"),
         "reusability": kwargs.get("reusability"),
@@ -78,29 +120,311 @@ def search(**kwargs):
         "facet": kwargs.get("facet"),
     }
 
-    endpoint = "https://api.europeana.eu/record/v2/search.json"
+    endpoint = ENDPOINT
 
     if not kwargs:
         raise ValueError("No arguments passed")
 
+    timeout = kwargs.get("timeout")
+    deadline = as_deadline(kwargs.get("deadline"))
+
     # test key
-    response = requests.get(
-        endpoint, params={"wskey": params["wskey"], "query": "*"}
+    response = get(
+        endpoint,
+        params={"wskey": params["wskey"], "query": "*"},
+        timeout=timeout,
+        deadline=deadline,
+        retries=RETRIES,
+        session=session,
     ).json()
     if not response["success"]:
         raise ValueError(response["error"])
 
-    # Necessary for handling facets of the type 'PROVIDER&f.PROVIDER.facet.limit=30&f.PROVIDER.facet.offset=10'
+    if kwargs.get("split_by"):
+        return _split_search(params, dict(kwargs, deadline=deadline))
+
     _params = params.copy()
     if params["facet"]:
-        facet_list = params["facet"].split("&")
-        if len(facet_list) > 1:
-            _params.update({"facet": facet_list[0]})
-            _params.update(
-                {item.split("=")[0]: item.split("=")[1] for item in facet_list[1:]}
-            )
-
-    url = requests.get(endpoint, params=_params).url
-    response = cursor_search(endpoint, _params)
+        _params.update(_facet_params(params["facet"]))
+
+    url = requests.Request("GET", endpoint, params=_params).prepare().url
+    response = cursor_search(
+        endpoint,
+        _params,
+        fields=kwargs.get("fields"),
+        timeout=timeout,
+        deadline=deadline,
+        session=session,
+    )
     response.update({"url": url, "params": params})
     return response
+
+
+def _facet_params(facet):
+    """
+    Splits facets of the form 'PROVIDER&f.PROVIDER.facet.limit=30&f.PROVIDER.facet.offset=10'
+    into request parameters
+    """
+    facet_list = facet.split("&")
+    params = {"facet": facet_list[0]}
+    params.update(item.split("=", 1) for item in facet_list[1:])
+    return params
+
+
+def facets(**kwargs):
+    """
+    Counts the items of the Search API [1] per value of one or more facets, such as
+    PROVIDER or COUNTRY, without retrieving any item
+
+    Items are not requested (rows=0) and the facet values are paged with the
+    f.FACET.facet.limit and f.FACET.facet.offset parameters until all of them,
+    or max_values of them, are obtained.
+
+    >>> import pyeuropeana.apis as apis
+    >>> df = apis.facets(
+    >>>    query = '*',
+    >>>    facet = ['PROVIDER', 'COUNTRY'],
+    >>>    qf = 'TYPE:IMAGE',
+    >>> )
+
+    Args:
+      query (:obj:`str`,optional)
+        The search term(s). Defaults to "*".
+      facet (:obj:`str` or :obj:`list` of :obj:`str`)
+        Name of the facet field, or a list of them
+      qf (:obj:`str` or :obj:`list` of :obj:`str`,optional)
+        Query Refinement, as in search
+      reusability (:obj:`str`,optional)
+        Filter by copyright status, as in search
+      media (:obj:`bool`,optional)
+        Filter by records with media, as in search
+      thumbnail (:obj:`bool`,optional)
+        Filter by records with thumbnail, as in search
+      landingpage (:obj:`bool`,optional)
+        Filter by records with a working landing page, as in search
+      theme (:obj:`str`,optional)
+        Restrict the query over one of the Europeana Thematic Collections, as in search
+      colourpalette (:obj:`str`,optional)
+        Filter by images with a colour of the palette, as in search
+      limit (:obj:`int`,optional)
+        Number of values requested per facet and request. Defaults to 150.
+      offset (:obj:`int`,optional)
+        Number of values of each facet to skip. Defaults to 0.
+      max_values (:obj:`int`,optional)
+        Maximum number of values per facet. Defaults to all of them.
+      timeout (:obj:`float` or :obj:`tuple`,optional)
+        Connect and read timeouts in seconds of each request, as in search
+      deadline (:obj:`float`,optional)
+        Maximum number of seconds for all the requests, as in search
+      client (:obj:`pyeuropeana.apis.EuropeanaClient`,optional)
+        Client used for the requests, as in search
+
+    Returns: :obj:`pd.DataFrame`
+      Dataframe with the columns facet, label and count, ordered by facet and decreasing count
+
+    References:
+      1. https://pro.europeana.eu/page/search#faceted-search
+    """
+    facet = kwargs.get("facet")
+    if not facet:
+        raise ValueError("facet is required")
+    names = [facet] if isinstance(facet, str) else list(facet)
+    limit = kwargs.get("limit", 150)
+    offset = kwargs.get("offset", 0)
+    max_values = kwargs.get("max_values")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    timeout = kwargs.get("timeout")
+    deadline = as_deadline(kwargs.get("deadline"))
+    client = kwargs.get("client")
+    session = client.session if client else None
+
+    params = {
+        "wskey": client.api_key if client else get_api_key(),
+        "query": kwargs.get("query", "*"),
+        "rows": 0,
+        "profile": "facets",
+    }
+    params.update({name: kwargs.get(name) for name in FILTERS})
+
+    offsets = {name: offset for name in names}
+    rows = []
+    while offsets:
+        page = dict(params, facet=",".join(offsets))
+        for name, current in offsets.items():
+            count = offset + max_values - current if max_values else limit
+            page[f"f.{name}.facet.limit"] = min(limit, count)
+            page[f"f.{name}.facet.offset"] = current
+        response = get(
+            ENDPOINT,
+            page,
+            timeout=timeout,
+            deadline=deadline,
+            retries=RETRIES,
+            session=session,
+        ).json()
+        if not response["success"]:
+            raise ValueError(response["error"])
+
+        fields = {item["name"]: item["fields"] for item in response.get("facets", [])}
+        for name in list(offsets):
+            values = fields.get(name, [])
+            rows += [(name, value["label"], value["count"]) for value in values]
+            offsets[name] += len(values)
+            exhausted = len(values) < page[f"f.{name}.facet.limit"]
+            if exhausted or (max_values and offsets[name] - offset >= max_values):
+                del offsets[name]
+
+    return pd.DataFrame(rows, columns=["facet", "label", "count"])
+
+
+def _quote(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _count(params, timeout=None, deadline=None, session=None):
+    response = get(
+        ENDPOINT,
+        dict(params, rows=0),
+        timeout=timeout,
+        deadline=deadline,
+        retries=RETRIES,
+        session=session,
+    ).json()
+    if not response["success"]:
+        raise ValueError(response["error"])
+    return response["totalResults"]
+
+
+def plan_search(split_by, target=10000, max_values=50, **kwargs):
+    """
+    Splits a query of the Search API into sub-queries of about target items each,
+    using the counts of the values of a facet
+
+    Values with fewer items than target are grouped into a single qf filter such as
+    DATA_PROVIDER:("A" OR "B"), and values with more items get their own sub-query. Items
+    without any value of the facet are covered by a last sub-query excluding the facet.
+
+    >>> from pyeuropeana.apis.search import plan_search
+    >>> plan, total = plan_search('DATA_PROVIDER', target = 50000, query = '*', qf = 'TYPE:IMAGE')
+
+    Args:
+      split_by (:obj:`str`)
+        Facet used to split the query
+      target (:obj:`int`,optional)
+        Desired number of items per sub-query. Defaults to 10000.
+      max_values (:obj:`int`,optional)
+        Maximum number of facet values grouped in a sub-query, which bounds the length of
+        the URLs. Defaults to 50.
+      kwargs
+        The query and filters, and the timeout, deadline and client of the requests, as in search
+
+    Returns: :obj:`tuple`
+      The sub-queries as a list of dicts with their qf filter and expected number of items,
+      and the total number of items of the query
+    """
+    kwargs = dict(kwargs, deadline=as_deadline(kwargs.get("deadline")))
+    counts = facets(facet=split_by, **{k: v for k, v in kwargs.items() if k != "facet"})
+    client = kwargs.get("client")
+    params = {
+        "wskey": client.api_key if client else get_api_key(),
+        "query": kwargs.get("query", "*"),
+    }
+    params.update({name: kwargs.get(name) for name in FILTERS})
+    total = _count(
+        params,
+        kwargs.get("timeout"),
+        kwargs["deadline"],
+        session=client.session if client else None,
+    )
+
+    plan = []
+    group, expected = [], 0
+    for label, count in sorted(
+        zip(counts["label"], counts["count"]), key=lambda x: -x[1]
+    ):
+        if group and (expected + count > target or len(group) == max_values):
+            plan.append((group, expected))
+            group, expected = [], 0
+        group.append(label)
+        expected += count
+    if group:
+        plan.append((group, expected))
+
+    plan = [
+        {
+            "qf": f"{split_by}:({' OR '.join(map(_quote, labels))})",
+            "expected": expected,
+        }
+        for labels, expected in plan
+    ]
+    # multi-valued facets count an item once per value, so the remainder is requested
+    # whenever the counts do not add up
+    if sum(item["expected"] for item in plan) != total or not plan:
+        plan.append({"qf": f"-{split_by}:[* TO *]", "expected": None})
+    return plan, total
+
+
+def _harvest(params, limit, fields, timeout=None, deadline=None, session=None):
+    items = []
+    expected = None
+    pages = cursor_pages(
+        ENDPOINT, params, timeout=timeout, deadline=deadline, session=session
+    )
+    for response in pages:
+        if expected is None:
+            expected = response.get("totalResults")
+        page = response.get("items") or []
+        if fields:
+            page = project(page, fields, keep=("id",))
+        items += page
+        if limit is not None and len(items) >= limit:
+            break
+    return items, expected
+
+
+def _split_search(params, kwargs):
+    plan, total = plan_search(
+        kwargs["split_by"],
+        target=kwargs.get("target", 10000),
+        **{k: v for k, v in kwargs.items() if k not in ("split_by", "target")},
+    )
+    limit = kwargs.get("rows")
+    client = kwargs.get("client")
+    qf = params["qf"] or []
+    qf = [qf] if isinstance(qf, str) else list(qf)
+    base = dict(params, rows=100, cursor="*", facet=None)
+
+    def harvest(sub_query):
+        sub_params = dict(base, qf=qf + [sub_query["qf"]])
+        return _harvest(
+            sub_params,
+            limit,
+            kwargs.get("fields"),
+            timeout=kwargs.get("timeout"),
+            deadline=kwargs.get("deadline"),
+            session=client.session if client else None,
+        )
+
+    with ThreadPoolExecutor(max_workers=kwargs.get("workers", 8)) as executor:
+        results = list(executor.map(harvest, plan))
+
+    items = {}
+    for sub_query, (sub_items, expected) in zip(plan, results):
+        sub_query["expected"] = expected
+        sub_query["received"] = len(sub_items)
+        for item in sub_items:
+            items.setdefault(item["id"], item)
+    items = list(items.values())
+    complete = len(items) == total
+    if limit is not None:
+        items = items[:limit]
+    return {
+        "success": True,
+        "totalResults": total,
+        "itemsCount": len(items),
+        "items": items,
+        "plan": plan,
+        "complete": complete,
+        "params": params,
+    }
@@ -0,0 +1,112 @@
+import json
+
+from ..utils.auth import get_api_key
+from ..utils.edm_utils import cursor_pages
+from .search import ENDPOINT, FILTERS
+
+# parameters that select the items of a query, which identify it in the store
+QUERY_PARAMS = ("query",) + FILTERS
+
+
+def query_key(**kwargs) -> str:
+    """
+    Canonical form of the parameters selecting the items of a query,
+    under which its high-water mark is stored
+    """
+    selection = {}
+    for name in QUERY_PARAMS:
+        value = kwargs.get(name, "*" if name == "query" else None)
+        if value is None:
+            continue
+        if name == "qf":
+            value = sorted([value] if isinstance(value, str) else value)
+        selection[name] = value
+    return json.dumps(selection, sort_keys=True)
+
+
+def sync(store, **kwargs):
+    """
+    Synchronises the items of a query of the Search API [1] into a local store, fetching
+    only those created or updated since the previous synchronisation of the same query
+
+    Items are requested in ascending order of timestamp_update with a range on that field
+    starting at the high-water mark of the query, the greatest timestamp_update already
+    stored. The mark is saved with every page, so an interrupted sync resumes where it stopped.
+    Items removed from Europeana are not detected.
+
+    >>> import pyeuropeana.apis as apis
+    >>> import pyeuropeana.utils as utils
+    >>> store = utils.LocalStore('mirror.sqlite')
+    >>> apis.sync(store, query = '*', qf = 'DATA_PROVIDER:"Museum Boerhaave"')
+
+    Args:
+      store (:obj:`pyeuropeana.utils.LocalStore`)
+        Store where the items and the high-water marks are kept
+      query (:obj:`str`,optional)
+        The search term(s). Defaults to "*".
+      qf (:obj:`str` or :obj:`list` of :obj:`str`,optional)
+        Query Refinement, as in search
+      reusability, media, thumbnail, landingpage, theme, colourpalette (optional)
+        Filters, as in search
+      profile (:obj:`str`,optional)
+        Profile of the items, as in search
+      rows (:obj:`int`,optional)
+        Number of items per request. Maximum is 100. Defaults to 100.
+      full (:obj:`bool`,optional)
+        If True, the high-water mark is ignored and all the items are fetched again.
+        Defaults to False.
+      timeout (:obj:`float` or :obj:`tuple`,optional)
+        Connect and read timeouts in seconds of each request. Defaults to utils.http.TIMEOUT.
+      deadline (:obj:`float`,optional)
+        Maximum number of seconds of the synchronisation. The pages stored before it
+        is exceeded are kept, and the next sync resumes from them.
+      client (:obj:`pyeuropeana.apis.EuropeanaClient`,optional)
+        Client whose API key, connections, default timeout and rate limiter are used
+
+    Returns: :obj:`int`
+      Number of items written to the store
+
+    References:
+      1. https://pro.europeana.eu/page/search
+    """
+    key = query_key(**kwargs)
+    mark = None if kwargs.get("full") else store.get_mark(key)
+
+    qf = kwargs.get("qf") or []
+    qf = [qf] if isinstance(qf, str) else list(qf)
+    if mark:
+        # inclusive, items sharing the mark are stored again rather than missed
+        qf.append(f"timestamp_update:[{mark} TO *]")
+
+    client = kwargs.get("client")
+    params = {name: kwargs.get(name) for name in QUERY_PARAMS}
+    params.update(
+        {
+            "wskey": client.api_key if client else get_api_key(),
+            "query": kwargs.get("query", "*"),
+            "qf": qf,
+            "profile": kwargs.get("profile"),
+            "rows": kwargs.get("rows", 100),
+            "sort": "timestamp_update asc,europeana_id asc",
+            "cursor": "*",
+        }
+    )
+
+    total = 0
+    pages = cursor_pages(
+        ENDPOINT,
+        params,
+        timeout=kwargs.get("timeout"),
+        deadline=kwargs.get("deadline"),
+        session=client.session if client else None,
+    )
+    for response in pages:
+        items = response.get("items") or []
+        stamps = [
+            item["timestamp_update"] for item in items if item.get("timestamp_update")
+        ]
+        if mark:
+            stamps.append(mark)
+        mark = max(stamps) if stamps else mark
+        total += store.add_items(items, mark=(key, mark) if mark else None)
+    return total
@@ -6,5 +6,19 @@ from .edm_utils import (
     europeana_id2uri,
     process_CHO_search,
     process_CHO_record,
+    records2df,
+    entity_uri2params,
+    to_categorical,
 )
-from .img_utils import url2img
+from .img_utils import url2img, fetch_image, url2array, urls2batch
+from .auth import KeyPool
+from .cache import DiskCache
+from .img_cache import ImageCache
+from .enrich import enrich_entities
+from .entity_store import EntityStore
+from .store import LocalStore
+from .models import CHO, LangMap, iter_chos
+from .dumps import read_dump, dump2df
+from .palette import extract_palette, extract_palettes
+from .img_hash import ahash, phash, hash_images, HashIndex
+from .pipeline import run_pipeline, harvest_records, harvest_images
@@ -1,4 +1,7 @@
 import os
+import threading
+import time
+from typing import Optional
 
 
 def get_api_key():
@@ -10,3 +13,93 @@ def get_api_key():
     """
         raise Exception(message)
     return API_KEY
+
+
+class KeyPool:
+    """
+    Spreads requests across several API keys, each with its own rate limit and backoff
+
+    Each request takes the key that can be used the soonest, so that with n keys up to n
+    times the rate of a single key is reached. A key that hits its quota is left aside for
+    backoff seconds, or the time requested by the API, and twice as long if it hits it
+    again right after. Waiting for a key only happens when all of them are busy.
+
+    >>> import pyeuropeana.apis as apis
+    >>> from pyeuropeana.utils.auth import KeyPool
+    >>> keys = KeyPool(['key1', 'key2', 'key3'], rate = 10)
+    >>> client = apis.EuropeanaClient(api_key = keys)
+
+    Args:
+      keys (:obj:`list` of :obj:`str`)
+        API keys
+      rate (:obj:`float`, optional)
+        Maximum number of requests per second of each key. Defaults to no limit.
+      backoff (:obj:`float`, optional)
+        Seconds a key is left aside after hitting its quota for the first time. Defaults to 60.
+    """
+
+    def __init__(self, keys, rate=None, backoff=60):
+        keys = [keys] if isinstance(keys, str) else list(dict.fromkeys(keys))
+        if not keys:
+            raise ValueError("At least one API key is needed")
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        self.keys = keys
+        self.rate = rate
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        # monotonic time at which each key can next be used
+        self._available = {key: 0.0 for key in keys}
+        self._failures = {key: 0 for key in keys}
+        self._requests = {key: 0 for key in keys}
+
+    def acquire(self, timeout=None) -> Optional[str]:
+        """
+        Returns the key to use for the next request, waiting until one is available,
+        or None right away if none is available within timeout seconds
+        """
+        with self._lock:
+            now = time.monotonic()
+            key = min(
+                self.keys,
+                key=lambda k: (max(now, self._available[k]), self._requests[k]),
+            )
+            start = max(now, self._available[key])
+            if timeout is not None and start - now > timeout:
+                return None
+            if self.rate:
+                self._available[key] = start + 1 / self.rate
+            self._requests[key] += 1
+        if start > now:
+            time.sleep(start - now)
+        return key
+
+    def success(self, key: str):
+        """
+        Records that a request made with the key was accepted
+        """
+        with self._lock:
+            self._failures[key] = 0
+
+    def exhausted(self, key: str, retry_after=None):
+        """
+        Records that the key hit its quota, leaving it aside for retry_after seconds
+        if given, or else for an exponentially increasing time
+        """
+        with self._lock:
+            self._failures[key] += 1
+            if retry_after is None:
+                retry_after = self.backoff * 2 ** (self._failures[key] - 1)
+            self._available[key] = max(
+                self._available[key], time.monotonic() + retry_after
+            )
+
+    def usage(self) -> dict:
+        """
+        Number of requests made with each key
+        """
+        with self._lock:
+            return dict(self._requests)
+
+    def __len__(self):
+        return len(self.keys)
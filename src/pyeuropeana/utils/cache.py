@@ -0,0 +1,77 @@
+import json
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Union
+
+
+class DiskCache(MutableMapping):
+    """
+    Persistent key-value store backed by a SQLite file
+
+    Keys are strings and values any JSON serializable object. The cache behaves
+    like a :obj:`dict`, so functions accepting a ``cache`` argument work the same
+    with a plain dictionary (in memory) or a :obj:`DiskCache` (persistent across runs).
+    It can be shared across threads.
+
+    >>> import pyeuropeana.utils as utils
+    >>> cache = utils.DiskCache('entities.sqlite')
+    >>> cache['key'] = {'value': 1}
+
+    Args:
+      path (:obj:`str` or :obj:`pathlib.Path`)
+        Location of the SQLite file. It is created if it does not exist.
+        Use ":memory:" for a non persistent cache.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def __getitem__(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def __setitem__(self, key, value):
+        value = json.dumps(value)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def __delitem__(self, key):
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        if not cursor.rowcount:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None
+
+    def __iter__(self):
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute("SELECT key FROM cache")]
+        return iter(keys)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
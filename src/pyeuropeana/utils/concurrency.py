@@ -0,0 +1,90 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls that share the same key
+
+    While a call for a key is running, other threads calling :meth:`do` with the same key
+    wait for it and receive its result (or its exception) instead of running the function again.
+
+    >>> from pyeuropeana.utils.concurrency import SingleFlight
+    >>> flight = SingleFlight()
+    >>> resp = flight.do('key', fetch, 'argument')
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class RateLimiter:
+    """
+    Limits the rate of calls made from any number of threads
+
+    Tokens are added at the given rate up to burst. Each call of :meth:`acquire` takes one,
+    and when none is left it sleeps until its turn, so waiting threads are served in order.
+
+    >>> from pyeuropeana.utils.concurrency import RateLimiter
+    >>> limiter = RateLimiter(10)
+    >>> limiter.acquire()
+
+    Args:
+      rate (:obj:`float`)
+        Calls per second
+      burst (:obj:`int`, optional)
+        Calls that can be made at once after a pause. Defaults to 1.
+    """
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None) -> bool:
+        """
+        Waits for a token and returns True, or returns False right away, without
+        taking it, if that would mean waiting longer than timeout seconds
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            wait = (1 - self._tokens) / self.rate
+            if timeout is not None and wait > timeout:
+                return False
+            # the token is taken even when missing, later callers queue behind this one
+            self._tokens -= 1
+        if wait > 0:
+            time.sleep(wait)
+        return True
@@ -0,0 +1,277 @@
+import json
+import xml.etree.ElementTree as ET
+import zipfile
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+import pandas as pd
+
+from .edm_utils import RECORD_COLUMNS, process_CHO_record, to_categorical
+
+DATA_PREFIX = "http://data.europeana.eu"
+
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+# prefixes used by the Record API for the properties of each namespace
+NAMESPACES = {
+    "http://purl.org/dc/elements/1.1/": "dc",
+    "http://purl.org/dc/terms/": "dcterms",
+    "http://www.europeana.eu/schemas/edm/": "edm",
+    "http://www.ebu.ch/metadata/ontologies/ebucore/ebucore#": "ebucore",
+    "http://rdvocab.info/ElementsGr2/": "rdaGr2",
+    "http://www.openarchives.org/ore/terms/": "",
+    "http://www.w3.org/2004/02/skos/core#": "",
+    "http://www.w3.org/2002/07/owl#": "",
+    "http://www.w3.org/2003/01/geo/wgs84_pos#": "",
+}
+
+RENAMES = {
+    "edmHasView": "hasView",
+    "edmAggregatedCHO": "aggregatedCHO",
+    "edmEuropeanaProxy": "europeanaProxy",
+    "lat": "latitude",
+    "long": "longitude",
+}
+
+# properties that the Record API returns as plain values instead of language maps
+SCALAR_FIELDS = {
+    "aggregatedCHO",
+    "proxyFor",
+    "edmIsShownBy",
+    "edmIsShownAt",
+    "edmObject",
+    "edmPreview",
+    "edmLandingPage",
+    "edmUgc",
+    "edmType",
+    "europeanaProxy",
+    "ebucoreHasMimeType",
+    "ebucoreOrientation",
+    "edmHasColorSpace",
+    "ebucoreWidth",
+    "ebucoreHeight",
+    "ebucoreFileByteSize",
+    "latitude",
+    "longitude",
+}
+LIST_FIELDS = {"hasView", "proxyIn", "edmComponentColor", "sameAs"}
+CASTS = {
+    "ebucoreWidth": int,
+    "ebucoreHeight": int,
+    "ebucoreFileByteSize": int,
+    "latitude": float,
+    "longitude": float,
+    "europeanaProxy": lambda value: value == "true",
+}
+# values pointing to Europeana resources are relative in the Record API
+RELATIVE_FIELDS = {"about", "aggregatedCHO", "proxyFor", "proxyIn"}
+
+ENTITY_CLASSES = {
+    "Agent": "agents",
+    "Concept": "concepts",
+    "Place": "places",
+    "TimeSpan": "timespans",
+}
+
+
+def iter_dump_entries(
+    paths: Union[str, Path, Iterable[Union[str, Path]]]
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Streams the raw entries of zipped record dumps as (name, bytes) tuples
+
+    Args:
+      paths (:obj:`str`, :obj:`pathlib.Path` or :obj:`list`)
+        A zip file, a directory containing zip files, or a list of them
+    """
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            yield from iter_dump_entries(sorted(path.glob("*.zip")))
+            continue
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.endswith((".xml", ".json")):
+                    continue
+                yield info.filename, archive.read(info)
+
+
+def parse_dump_entry(name: str, data: bytes) -> dict:
+    """
+    Normalizes an entry of a dump into the structure returned by apis.record. Entries are
+    either EDM RDF/XML files or JSON files with the output (or the "object" field) of the Record API.
+    """
+    if name.endswith(".json"):
+        obj = json.loads(data)
+        return obj if "object" in obj else {"success": True, "object": obj}
+    return edm_xml2record(data)
+
+
+def edm_xml2record(data: Union[str, bytes]) -> dict:
+    """
+    Converts an EDM record in RDF/XML, as found in the Europeana dataset dumps [1],
+    into the structure returned by apis.record
+
+    References:
+      1. https://pro.europeana.eu/page/edm-documentation
+    """
+    root = ET.fromstring(data)
+    obj = {"proxies": [], "aggregations": []}
+    web_resources = []
+    for element in root:
+        _, name = element.tag[1:].split("}")
+        if name == "ProvidedCHO":
+            obj["about"] = _about(element)[len(DATA_PREFIX + "/item") :]
+            obj["providedCHOs"] = [{"about": obj["about"]}]
+        elif name == "Proxy":
+            obj["proxies"].append(_properties(element, relative=True))
+        elif name == "Aggregation":
+            obj["aggregations"].append(_properties(element, relative=True))
+        elif name == "EuropeanaAggregation":
+            obj["europeanaAggregation"] = _properties(element, relative=True)
+        elif name == "WebResource":
+            resource = _properties(element)
+            if "edmRights" in resource:
+                resource["webResourceEdmRights"] = resource.pop("edmRights")
+            web_resources.append(resource)
+        elif name in ENTITY_CLASSES:
+            obj.setdefault(ENTITY_CLASSES[name], []).append(_properties(element))
+
+    if obj["aggregations"]:
+        obj["aggregations"][0]["webResources"] = web_resources
+    europeana_aggregation = obj.get("europeanaAggregation", {})
+    if "edmDatasetName" in europeana_aggregation:
+        obj["edmDatasetName"] = europeana_aggregation.pop("edmDatasetName")["def"]
+    if "edmLanguage" in europeana_aggregation:
+        obj["language"] = europeana_aggregation["edmLanguage"]["def"]
+    for proxy in obj["proxies"]:
+        if "edmType" in proxy:
+            obj["type"] = proxy["edmType"]
+            break
+    return {"success": True, "object": obj}
+
+
+def _about(element):
+    return element.get(f"{{{RDF}}}about")
+
+
+def _relative(value):
+    return value[len(DATA_PREFIX) :] if value.startswith(DATA_PREFIX) else value
+
+
+def _key(tag):
+    namespace, name = tag[1:].split("}")
+    prefix = NAMESPACES.get(namespace, "")
+    key = prefix + name[0].upper() + name[1:] if prefix else name
+    return RENAMES.get(key, key)
+
+
+def _properties(element, relative=False):
+    properties = {"about": _about(element)}
+    for child in element:
+        key = _key(child.tag)
+        value = child.get(f"{{{RDF}}}resource")
+        lang = "def"
+        if value is None:
+            value = (child.text or "").strip()
+            lang = child.get(XML_LANG, "def")
+        if relative and key in RELATIVE_FIELDS:
+            value = _relative(value)
+        if key in CASTS:
+            value = CASTS[key](value)
+        if key in SCALAR_FIELDS:
+            properties[key] = value
+        elif key in LIST_FIELDS:
+            properties.setdefault(key, []).append(value)
+        else:
+            properties.setdefault(key, {}).setdefault(lang, []).append(value)
+    if relative:
+        properties["about"] = _relative(properties["about"])
+    return properties
+
+
+def read_dump(paths) -> Iterator[dict]:
+    """
+    Streams the records of zipped dumps normalized into the structure returned by apis.record
+
+    >>> import pyeuropeana.utils as utils
+    >>> for response in utils.read_dump('2021672.zip'):
+    >>>     print(response['object']['about'])
+
+    Args:
+      paths (:obj:`str`, :obj:`pathlib.Path` or :obj:`list`)
+        A zip file, a directory containing zip files, or a list of them
+    """
+    for name, data in iter_dump_entries(paths):
+        yield parse_dump_entry(name, data)
+
+
+def _process_entry(entry):
+    name, data, errors = entry
+    try:
+        return process_CHO_record(parse_dump_entry(name, data))
+    except Exception:
+        if errors == "raise":
+            raise
+        return None
+
+
+def dump2df(
+    paths,
+    processes: Optional[int] = None,
+    chunksize: int = 64,
+    errors: str = "raise",
+    categorical: bool = False,
+) -> pd.DataFrame:
+    """
+
+    Processes the records of zipped dumps into a dataframe using a pool of processes,
+    with the same columns as utils.records2df and without any API call
+
+    The Europeana datasets can be downloaded in bulk as zip files of EDM records [1].
+    Entries are read sequentially from disk in the main process and parsed and processed
+    in the worker processes.
+
+    >>> import pyeuropeana.utils as utils
+    >>> df = utils.dump2df('dumps/', processes = 8)
+
+    Args:
+      paths (:obj:`str`, :obj:`pathlib.Path` or :obj:`list`)
+        A zip file, a directory containing zip files, or a list of them
+
+      processes (:obj:`int`, optional)
+        Number of worker processes. Defaults to the number of CPUs. With 1 the records
+        are processed in the calling process.
+
+      chunksize (:obj:`int`, optional)
+        Number of entries sent to a worker at once. Defaults to 64.
+
+      errors (:obj:`str`, optional)
+        If "raise", records that cannot be processed raise an exception. If "skip",
+        they are left out. Defaults to "raise".
+
+      categorical (:obj:`bool`, optional)
+        If True, the columns with few distinct values are stored as pandas categoricals,
+        see utils.to_categorical. Defaults to False.
+
+    Returns: :obj:`pd.DataFrame`
+      Dataframe with one row per record
+
+    References:
+      1. https://pro.europeana.eu/page/downloading-data
+
+    """
+    if errors not in ("raise", "skip"):
+        raise ValueError('errors must be either "raise" or "skip"')
+    entries = ((name, data, errors) for name, data in iter_dump_entries(paths))
+    if processes == 1:
+        rows = list(map(_process_entry, entries))
+    else:
+        with Pool(processes) as pool:
+            rows = list(pool.imap(_process_entry, entries, chunksize=chunksize))
+    df = pd.DataFrame([row for row in rows if row is not None], columns=RECORD_COLUMNS)
+    return to_categorical(df) if categorical else df
@@ -1,12 +1,30 @@
+import re
 import urllib.request as urllibrec
 from pathlib import Path
 import pandas as pd
-import requests
 
-from typing import Optional
+from typing import Iterable, Optional
 
+from .http import RETRIES, as_deadline, get
 
-def search2df(response: dict, full: Optional[bool] = False) -> pd.DataFrame:
+ENTITY_URI_PATTERN = re.compile(
+    r"^https?://data\.europeana\.eu/(agent|concept|place|timespan|organization)/(?:base/)?(\d+)$"
+)
+
+# columns with few distinct values, stored as pandas categoricals when requested
+CATEGORICAL_COLUMNS = (
+    "type",
+    "country",
+    "language",
+    "rights",
+    "provider",
+    "dataset_name",
+)
+
+
+def search2df(
+    response: dict, full: Optional[bool] = False, categorical: bool = False
+) -> pd.DataFrame:
     """
 
     Utility for transforming the output of the search API into a dataframe
@@ -26,6 +44,10 @@ def search2df(response: dict, full: Optional[bool] = False) -> pd.DataFrame:
       full (:obj:`bool`)
         Description
 
+      categorical (:obj:`bool`, optional)
+        If True, the columns with few distinct values, such as type, country or rights,
+        are stored as pandas categoricals, see to_categorical. Defaults to False.
+
     Returns: :obj:`pd.DataFrame`
       Dataframe with columns ...
 
@@ -36,26 +58,164 @@ def search2df(response: dict, full: Optional[bool] = False) -> pd.DataFrame:
     if full:
         return pd.json_normalize(CHO_list)
     CHO_list = [process_CHO_search(obj) for obj in CHO_list]
-    return pd.DataFrame(CHO_list)
+    df = pd.DataFrame(CHO_list)
+    return to_categorical(df) if categorical else df
+
+
+def to_categorical(
+    df: pd.DataFrame, columns: Iterable[str] = CATEGORICAL_COLUMNS
+) -> pd.DataFrame:
+    """
+
+    Converts the given columns of a dataframe to the pandas category dtype in place
+
+    Each distinct value is stored once and rows only hold small integer codes, which
+    on large result sets takes a fraction of the memory of object columns of strings
+    and speeds up grouping and filtering by these columns.
+
+    >>> import pyeuropeana.utils as utils
+    >>> df = utils.to_categorical(utils.search2df(resp))
+    >>> df['rights'].cat.categories
+
+    Args:
+      df (:obj:`pd.DataFrame`)
+        Dataframe from utils.search2df or utils.records2df
+
+      columns (:obj:`list` of :obj:`str`, optional)
+        Columns to convert. Those missing from the dataframe are ignored.
+        Defaults to type, country, language, rights, provider and dataset_name.
+
+    Returns: :obj:`pd.DataFrame`
+      The same dataframe
+
+    """
+    for column in columns:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
 
 
-def cursor_search(endpoint, params):
+def cursor_search(
+    endpoint,
+    params,
+    fields=None,
+    timeout=None,
+    deadline=None,
+    retries=RETRIES,
+    session=None,
+):
     """
     Cursor search function
+
+    Every page is requested with the given connect and read timeout, by default
+    utils.http.TIMEOUT, and retried on transient failures. The deadline, a number of
+    seconds or a :obj:`pyeuropeana.utils.http.Deadline`, bounds the whole search:
+    pages and retries share the time remaining. The pages are requested
+    through the given :obj:`requests.Session`, if any.
     """
+    deadline = as_deadline(deadline)
     CHO_list = []
     response = {"nextCursor": params["cursor"]}
     while "nextCursor" in response:
         if len(CHO_list) > params["rows"]:
             break
         params.update({"cursor": response["nextCursor"]})
-        response = requests.get(endpoint, params=params).json()
+        response = get(
+            endpoint,
+            params,
+            timeout=timeout,
+            deadline=deadline,
+            retries=retries,
+            session=session,
+        ).json()
+        if fields:
+            response["items"] = project(response["items"], fields, keep=("id",))
         CHO_list += response["items"]
     CHO_list = CHO_list[: params["rows"]]
     response["items"] = CHO_list
     return response
 
 
+def cursor_pages(
+    endpoint, params, timeout=None, deadline=None, retries=RETRIES, session=None
+):
+    """
+    Yields the responses of the successive pages of a cursor search, without
+    accumulating their items. The given parameters are not modified.
+    Timeouts, deadline, retries and session are handled as in cursor_search.
+    """
+    deadline = as_deadline(deadline)
+    params = dict(params, cursor=params.get("cursor") or "*")
+    while True:
+        response = get(
+            endpoint,
+            params,
+            timeout=timeout,
+            deadline=deadline,
+            retries=retries,
+            session=session,
+        ).json()
+        if not response.get("success", True):
+            raise ValueError(response.get("error"))
+        yield response
+        if "nextCursor" not in response or not response.get("items"):
+            break
+        params["cursor"] = response["nextCursor"]
+
+
+def compile_fields(fields):
+    """
+    Turns a list of dotted paths such as ["aggregations.edmIsShownBy", "proxies.dcTitle"]
+    into a tree of nested dicts, where None marks the values that are kept whole
+    """
+    if isinstance(fields, str):
+        fields = [fields]
+    tree = {}
+    for field in fields:
+        node = tree
+        parts = field.split(".")
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def project(obj, fields, keep=()):
+    """
+    Returns a copy of a decoded JSON object with only the given dotted paths. Lists are
+    traversed, so "proxies.dcTitle" keeps the dcTitle of every proxy.
+
+    >>> project({"a": [{"b": 1, "c": 2}], "d": 3}, ["a.b"])
+    {'a': [{'b': 1}]}
+
+    Args:
+      obj (:obj:`dict` or :obj:`list`)
+        Decoded JSON object
+      fields (:obj:`list` of :obj:`str` or :obj:`dict`)
+        Dotted paths, or a tree from compile_fields
+      keep (:obj:`tuple` of :obj:`str`, optional)
+        Top-level keys that are always kept
+    """
+    tree = fields if isinstance(fields, dict) else compile_fields(fields)
+    tree = dict(tree, **{key: None for key in keep if key not in tree})
+    return _project(obj, tree)
+
+
+def _project(value, tree):
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {
+            key: _project(value[key], sub) for key, sub in tree.items() if key in value
+        }
+    return value
+
+
 def europeana_id2uri(ID):
     return "http://data.europeana.eu/item" + ID
 
@@ -81,6 +241,14 @@ def process_CHO_search(item):
         if "edmDatasetName" in item.keys()
         else None,
         "concept": item["edmConcept"][0] if "edmConcept" in item.keys() else None,
+        "concepts": item["edmConcept"] if "edmConcept" in item.keys() else None,
+        "agents": [
+            uri
+            for uri in item.get("edmAgent", []) + item.get("dcCreator", [])
+            if entity_uri2params(uri)
+        ]
+        or None,
+        "places": item["edmPlace"] if "edmPlace" in item.keys() else None,
         "concept_lang": {
             k: v[0] for k, v in item["edmConceptPrefLabelLangAware"].items()
         }
@@ -98,27 +266,22 @@ def process_CHO_search(item):
 def process_CHO_record(response):
     obj = response["object"]
     europeana_id = obj["about"]
+    aggregation = obj["aggregations"][0]
+    image_url = aggregation.get("edmIsShownBy")
 
-    try:
-        image_url = obj["aggregations"][0]["edmIsShownBy"]
-    except Exception:
-        image_url = None
-
-    # getting title
-    proxy_list = obj["proxies"]
-    proxy_dict = {}
-    for proxy in proxy_list:
-        proxy_dict.update(proxy)
-
-    title_lang = proxy_dict["dcTitle"] if "dcTitle" in proxy_dict else None
+    # getting title, the last proxy with a title takes precedence
+    title_lang = None
+    for proxy in reversed(obj["proxies"]):
+        if "dcTitle" in proxy:
+            title_lang = proxy["dcTitle"]
+            break
     title = None
     if title_lang:
         title_lang = {k: v[0] for k, v in title_lang.items()}
         title = get_value_lang(title_lang)
 
     # getting provider
-    provider_lang = obj["aggregations"][0]["edmProvider"]
-    provider_lang = {k: v[0] for k, v in provider_lang.items()}
+    provider_lang = {k: v[0] for k, v in aggregation["edmProvider"].items()}
     provider = get_value_lang(provider_lang)
 
     return {
@@ -132,19 +295,80 @@ def process_CHO_record(response):
         "type": obj["type"],
         "title": title,
         "title_lang": title_lang,
-        "rights": obj["aggregations"][0]["edmRights"]["def"][0],
+        "rights": aggregation["edmRights"]["def"][0],
         "provider": provider,
         "provider_lang": provider_lang,
     }
 
 
+RECORD_COLUMNS = [
+    "europeana_id",
+    "image_url",
+    "uri",
+    "dataset_name",
+    "country",
+    "language",
+    "type",
+    "title",
+    "title_lang",
+    "rights",
+    "provider",
+    "provider_lang",
+]
+
+
+def records2df(responses: Iterable[dict], categorical: bool = False) -> pd.DataFrame:
+    """
+
+    Utility for transforming many outputs of the record API into a dataframe in a single pass
+
+    >>> import pyeuropeana.apis as apis
+    >>> import pyeuropeana.utils as utils
+    >>> ids = [
+    >>>    '/79/resource_document_museumboerhaave_V35167',
+    >>>    '/2021672/resource_document_mauritshuis_670',
+    >>> ]
+    >>> df = utils.records2df(apis.record(id) for id in ids)
+
+    Args:
+      responses (:obj:`list` of :obj:`dict`)
+        Responses from apis.record. Any iterable is accepted, including generators,
+        so responses can be processed as they arrive.
+
+      categorical (:obj:`bool`, optional)
+        If True, the columns with few distinct values are stored as pandas categoricals,
+        see to_categorical. Defaults to False.
+
+    Returns: :obj:`pd.DataFrame`
+      Dataframe with one row per record and the columns returned by process_CHO_record
+
+    """
+    df = pd.DataFrame(
+        [process_CHO_record(response) for response in responses],
+        columns=RECORD_COLUMNS,
+    )
+    return to_categorical(df) if categorical else df
+
+
+def entity_uri2params(uri):
+    """
+    Returns the TYPE and IDENTIFIER arguments of apis.entity.retrieve for a Europeana entity URI,
+    or None if the input is not an entity URI
+    """
+    match = ENTITY_URI_PATTERN.match(uri) if isinstance(uri, str) else None
+    if not match:
+        return None
+    return match.group(1), int(match.group(2))
+
+
 def europeana_id2filename(europeana_id):
     return europeana_id.replace("/", "[ph]") + ".jpg"
 
 
 def get_value_lang(lang_dict):
-    if "en" in lang_dict.keys():
-        value = lang_dict["en"]
-    else:
-        _, value = list(lang_dict.items())[0]
-    return value
+    if "en" in lang_dict:
+        return lang_dict["en"]
+    for value in lang_dict.values():
+        return value
+    # a StopIteration here would silently end the map over the records instead
+    raise ValueError("Empty language map")
@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+import pandas as pd
+import requests
+
+from ..apis import entity
+from .edm_utils import entity_uri2params
+
+
+def enrich_entities(
+    df: pd.DataFrame,
+    columns: Iterable[str] = ("concepts", "agents", "places"),
+    language: str = "en",
+    max_workers: int = 8,
+    cache: Optional[dict] = None,
+) -> pd.DataFrame:
+    """
+
+    Adds the labels of the entities referenced in a dataframe of search results
+
+    All the distinct entity URIs found in the given columns are collected first, and each
+    of them is retrieved only once with apis.entity.retrieve, using concurrent requests.
+    The labels are then joined back as new columns named after the original ones
+    with the suffix "_label".
+
+    >>> import pyeuropeana.apis as apis
+    >>> import pyeuropeana.utils as utils
+    >>> resp = apis.search(
+    >>>    query = 'Rome',
+    >>>    rows = 100,
+    >>> )
+    >>> df = utils.search2df(resp)
+    >>> df = utils.enrich_entities(df, language = 'it')
+
+    Args:
+      df (:obj:`pd.DataFrame`)
+        Dataframe from utils.search2df
+
+      columns (:obj:`list` of :obj:`str`, optional)
+        Columns containing entity URIs, either as strings or lists of strings.
+        Defaults to the concepts, agents and places columns.
+
+      language (:obj:`str`, optional)
+        Preferred language of the labels. Falls back to English and then to any
+        available language. Defaults to "en".
+
+      max_workers (:obj:`int`, optional)
+        Number of concurrent requests. Defaults to 8.
+
+      cache (:obj:`dict`, optional)
+        Dict-like object mapping entity URIs to their prefLabel language maps, for example
+        :obj:`pyeuropeana.utils.DiskCache`. It is used to avoid requests for entities already
+        seen, whatever the language, and is updated with the entities retrieved.
+
+    Returns: :obj:`pd.DataFrame`
+      Copy of the input dataframe with the additional label columns
+
+    """
+    columns = [column for column in columns if column in df.columns]
+    uris = set()
+    for column in columns:
+        for value in df[column]:
+            uris.update(uri for uri in _as_list(value) if entity_uri2params(uri))
+
+    # the cache holds the prefLabel maps, so that it serves any language
+    labels = {}
+    pending = []
+    for uri in uris:
+        if cache is not None and uri in cache:
+            labels[uri] = pick_label(cache[uri], language)
+        else:
+            pending.append(uri)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            fetched = executor.map(_retrieve_pref_label, pending)
+            for uri, pref_label in zip(pending, fetched):
+                labels[uri] = pick_label(pref_label, language)
+                if cache is not None and pref_label is not None:
+                    cache[uri] = pref_label
+
+    df = df.copy()
+    for column in columns:
+        df[f"{column}_label"] = [_lookup(value, labels) for value in df[column]]
+    return df
+
+
+def _as_list(value):
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        return [value]
+    return []
+
+
+def _lookup(value, labels):
+    if isinstance(value, list):
+        return [labels.get(uri) for uri in value]
+    if isinstance(value, str):
+        return labels.get(value)
+    return None
+
+
+def _retrieve_pref_label(uri):
+    TYPE, IDENTIFIER = entity_uri2params(uri)
+    try:
+        response = entity.retrieve(TYPE=TYPE, IDENTIFIER=IDENTIFIER)
+    except (requests.RequestException, ValueError):
+        # entities that cannot be retrieved are left without a label
+        return None
+    return response.get("prefLabel") or {}
+
+
+def pick_label(pref_label, language="en"):
+    """
+    Returns the label in the given language from a prefLabel language map,
+    falling back to English and then to the first available language
+    """
+    if not pref_label:
+        return None
+    for lang in (language, "en"):
+        if lang in pref_label:
+            value = pref_label[lang]
+            break
+    else:
+        value = next(iter(pref_label.values()))
+    return value[0] if isinstance(value, list) else value
@@ -0,0 +1,211 @@
+import json
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+from ..apis import entity as entity_api
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (id TEXT PRIMARY KEY, type TEXT, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS labels (label TEXT NOT NULL, lang TEXT, entity_id TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS terms (term TEXT NOT NULL, lang TEXT, entity_id TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS same_as (uri TEXT PRIMARY KEY, entity_id TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS labels_label ON labels (label);
+CREATE INDEX IF NOT EXISTS labels_entity ON labels (entity_id);
+CREATE INDEX IF NOT EXISTS terms_term ON terms (term);
+CREATE INDEX IF NOT EXISTS terms_entity ON terms (entity_id);
+CREATE INDEX IF NOT EXISTS same_as_entity ON same_as (entity_id);
+"""
+
+
+class EntityStore:
+    """
+    Local store of entities from the Entity API [1] for offline lookups
+
+    Entities are kept compressed in a SQLite file, indexed by every language label
+    (prefLabel and altLabel) and every sameAs URI, so that lookups, resolve-style and
+    suggest-style queries are answered locally.
+
+    >>> import pyeuropeana.utils as utils
+    >>> store = utils.EntityStore('entities.sqlite')
+    >>> leonardo = store.retrieve(TYPE = 'agent', IDENTIFIER = 146741)
+    >>> store.resolve('http://dbpedia.org/resource/Leonardo_da_Vinci')
+    >>> store.suggest('leon', language = 'en')
+
+    Args:
+      path (:obj:`str` or :obj:`pathlib.Path`, optional)
+        Location of the SQLite file. Defaults to ":memory:", a non persistent store.
+
+    References:
+      1. https://pro.europeana.eu/page/entity
+    """
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def add(self, entity: dict):
+        """
+        Stores an entity as returned by apis.entity.retrieve, replacing any previous version
+        """
+        self.add_many([entity])
+
+    def add_many(self, entities: Iterable[dict]):
+        """
+        Stores several entities in a single transaction
+        """
+        with self._lock, self._conn:
+            for entity in entities:
+                self._add(entity)
+
+    def _add(self, entity):
+        entity_id = entity.get("id")
+        if not entity_id:
+            raise ValueError("entity has no id")
+        self._delete(entity_id)
+        data = zlib.compress(json.dumps(entity, separators=(",", ":")).encode())
+        self._conn.execute(
+            "INSERT INTO entities (id, type, data) VALUES (?, ?, ?)",
+            (entity_id, entity.get("type"), data),
+        )
+        labels = set()
+        terms = set()
+        for field in ("prefLabel", "altLabel"):
+            for lang, values in (entity.get(field) or {}).items():
+                for label in values if isinstance(values, list) else [values]:
+                    label = _normalize(label)
+                    labels.add((label, lang))
+                    terms.update((word, lang) for word in label.split())
+        self._conn.executemany(
+            "INSERT INTO labels (label, lang, entity_id) VALUES (?, ?, ?)",
+            [(label, lang, entity_id) for label, lang in labels],
+        )
+        self._conn.executemany(
+            "INSERT INTO terms (term, lang, entity_id) VALUES (?, ?, ?)",
+            [(term, lang, entity_id) for term, lang in terms],
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO same_as (uri, entity_id) VALUES (?, ?)",
+            [(uri, entity_id) for uri in entity.get("sameAs") or []],
+        )
+
+    def _delete(self, entity_id):
+        for table, column in (
+            ("entities", "id"),
+            ("labels", "entity_id"),
+            ("terms", "entity_id"),
+            ("same_as", "entity_id"),
+        ):
+            self._conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (entity_id,))
+
+    def get(self, entity_id: str) -> Optional[dict]:
+        """
+        Returns the stored entity with the given Europeana URI, or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM entities WHERE id = ?", (entity_id,)
+            ).fetchone()
+        return _decode(row[0]) if row else None
+
+    def retrieve(self, TYPE: str, IDENTIFIER: int) -> dict:
+        """
+        Same as apis.entity.retrieve, but answered locally when the entity is stored.
+        Entities fetched from the API are added to the store.
+        """
+        entity = self.get(f"http://data.europeana.eu/{TYPE}/{IDENTIFIER}")
+        if entity is None:
+            entity = self.get(f"http://data.europeana.eu/{TYPE}/base/{IDENTIFIER}")
+        if entity is None:
+            entity = entity_api.retrieve(TYPE=TYPE, IDENTIFIER=IDENTIFIER)
+            if entity.get("id"):
+                self.add(entity)
+        return entity
+
+    def resolve(self, uri: str) -> Optional[dict]:
+        """
+        Returns the stored entity which has the given external URI among its sameAs URIs, or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT e.data FROM same_as s JOIN entities e ON e.id = s.entity_id WHERE s.uri = ?",
+                (uri,),
+            ).fetchone()
+        return _decode(row[0]) if row else self.get(uri)
+
+    def lookup(self, label: str, language: Optional[str] = None) -> List[dict]:
+        """
+        Returns the stored entities with a label equal to the given one, ignoring case
+        """
+        query = "SELECT DISTINCT entity_id FROM labels WHERE label = ?"
+        args = [_normalize(label)]
+        if language:
+            query += " AND lang = ?"
+            args.append(language)
+        return self._fetch_entities(query, args)
+
+    def suggest(
+        self,
+        text: str,
+        language: Optional[str] = None,
+        TYPE: Optional[str] = None,
+        limit: int = 10,
+    ) -> List[dict]:
+        """
+        Returns the stored entities having, for every word in the text, a word in their
+        labels that starts with it, similarly to apis.entity.suggest
+        """
+        words = _normalize(text).split()
+        if not words:
+            raise ValueError('Argument "text" is needed')
+        subqueries = []
+        args = []
+        for word in words:
+            subquery = (
+                "SELECT DISTINCT entity_id FROM terms WHERE term >= ? AND term < ?"
+            )
+            args += [word, word + "\U0010ffff"]
+            if language:
+                subquery += " AND lang = ?"
+                args.append(language)
+            subqueries.append(subquery)
+        query = " INTERSECT ".join(subqueries)
+        if TYPE:
+            query = f"SELECT entity_id FROM ({query}) JOIN entities ON id = entity_id WHERE lower(type) = ?"
+            args.append(TYPE.lower())
+        query += " LIMIT ?"
+        args.append(limit)
+        return self._fetch_entities(query, args)
+
+    def _fetch_entities(self, query, args):
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(query, args)]
+        return [entity for entity in map(self.get, ids) if entity is not None]
+
+    def __contains__(self, entity_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM entities WHERE id = ?", (entity_id,)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _normalize(label):
+    return " ".join(label.lower().split())
+
+
+def _decode(data):
+    return json.loads(zlib.decompress(data))
@@ -0,0 +1,310 @@
+import json
+import time
+from collections.abc import MutableMapping
+from typing import Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+# parameters left out of the cache keys, so that changing the API key keeps the entries
+_IGNORED_PARAMS = ("wskey",)
+
+CHUNK_SIZE = 64 * 1024
+
+# default connect and read timeouts in seconds of every request to the APIs. Calls without
+# an explicit timeout read it when they are made, so it can be changed for the whole process
+TIMEOUT = (10, 60)
+
+# retries of the requests of multi-request operations, such as cursor searches
+RETRIES = 2
+BACKOFF = 0.5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class Deadline:
+    """
+    Time budget shared by all the requests, and their retries, of an operation
+
+    Each request gets the smaller of its own timeout and the time left, and a
+    :obj:`requests.Timeout` is raised once the budget is spent.
+
+    Args:
+      seconds (:obj:`int` or :obj:`float`)
+        Total number of seconds of the operation
+    """
+
+    def __init__(self, seconds: Union[int, float]):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.expires - time.monotonic()
+
+    def timeout(self, timeout=None):
+        """
+        Timeout of the next request, capped to the remaining budget
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise requests.Timeout(f"deadline of {self.seconds} seconds exceeded")
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+        return min(timeout, remaining)
+
+
+class Session(requests.Session):
+    """
+    Session keeping a pool of connections, meant to be shared across threads
+
+    Requests made through it wait for the limiter, if any, before being sent,
+    and default to its timeout instead of TIMEOUT. With a pool of keys, the API key
+    (wskey) of every request is taken from the pool, and requests answered with
+    429 Too Many Requests are sent again with another key, up to once per key.
+
+    Requests sent by get with a deadline only wait for the limiter and the keys as long as
+    the deadline allows, and raise :obj:`requests.Timeout` otherwise.
+
+    Args:
+      pool (:obj:`int`, optional)
+        Maximum number of connections kept open per host. Defaults to 10.
+      timeout (:obj:`float` or :obj:`tuple`, optional)
+        Default connect and read timeouts in seconds of the requests
+      limiter (:obj:`pyeuropeana.utils.concurrency.RateLimiter`, optional)
+        Object whose acquire method is called before every request. With a deadline, it is
+        called with the seconds left as timeout, and must return False if it cannot wait that long.
+      keys (:obj:`pyeuropeana.utils.auth.KeyPool`, optional)
+        API keys the requests are spread across
+    """
+
+    def __init__(self, pool: int = 10, timeout=None, limiter=None, keys=None):
+        super().__init__()
+        adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.timeout = timeout
+        self.limiter = limiter
+        self.keys = keys
+
+    def request(self, method, url, params=None, *args, deadline=None, **kwargs):
+        rotate = self.keys is not None and "wskey" in (params or {})
+        for attempt in range(len(self.keys) if rotate else 1):
+            if rotate:
+                key = self.keys.acquire(_remaining(deadline))
+                if key is None:
+                    raise requests.Timeout(
+                        "no API key is available before the deadline"
+                    )
+                params = dict(params, wskey=key)
+            if self.limiter is not None:
+                if deadline is None:
+                    self.limiter.acquire()
+                elif not self.limiter.acquire(timeout=_remaining(deadline)):
+                    raise requests.Timeout("rate limit reached before the deadline")
+            if deadline is not None:
+                # part of the budget may have been spent waiting
+                kwargs["timeout"] = deadline.timeout(kwargs.get("timeout"))
+            response = super().request(method, url, params, *args, **kwargs)
+            if not rotate:
+                return response
+            if response.status_code != 429:
+                self.keys.success(key)
+                return response
+            self.keys.exhausted(key, _retry_after(response))
+            if attempt < len(self.keys) - 1:
+                response.close()
+        return response
+
+
+def _remaining(deadline):
+    return None if deadline is None else deadline.remaining()
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    return int(value) if value and value.isdigit() else None
+
+
+def as_deadline(deadline) -> Optional[Deadline]:
+    """
+    Turns a number of seconds into a Deadline starting now. Deadlines and None are returned as is.
+    """
+    if deadline is None or isinstance(deadline, Deadline):
+        return deadline
+    return Deadline(deadline)
+
+
+def get(
+    url: str,
+    params: Optional[dict] = None,
+    timeout=None,
+    deadline: Optional[Deadline] = None,
+    retries: int = 0,
+    session: Optional[requests.Session] = None,
+    **kwargs,
+) -> requests.Response:
+    """
+    Sends a GET request with a timeout, by default the one of the session or else TIMEOUT
+
+    Connection errors, timeouts and answers with a status in RETRY_STATUS are retried up
+    to retries times, waiting BACKOFF seconds the first time and twice as long each
+    next time. With a deadline, every attempt and wait comes out of its remaining time.
+    The request is sent through the session if given. Other keyword arguments are passed
+    to :obj:`requests.get`.
+    """
+    if timeout is None:
+        timeout = getattr(session, "timeout", None) or TIMEOUT
+    send = requests.get if session is None else session.get
+    if deadline is not None and isinstance(session, Session):
+        # waits for the rate limit and the API keys also come out of the deadline
+        kwargs["deadline"] = deadline
+    attempt = 0
+    while True:
+        try:
+            response = send(
+                url,
+                params=params,
+                timeout=deadline.timeout(timeout) if deadline else timeout,
+                **kwargs,
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= retries:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUS or attempt >= retries:
+                return response
+            response.close()
+        delay = BACKOFF * 2**attempt
+        if deadline is not None and deadline.remaining() <= delay:
+            raise requests.Timeout(f"deadline of {deadline.seconds} seconds exceeded")
+        time.sleep(delay)
+        attempt += 1
+
+
+def cache_key(url: str, params: Optional[dict] = None) -> str:
+    """
+    Key under which the response to a request is cached: its URL without the API key
+    """
+    params = {k: v for k, v in (params or {}).items() if k not in _IGNORED_PARAMS}
+    return requests.Request("GET", url, params=params).prepare().url
+
+
+def read_body(
+    response: requests.Response,
+    max_bytes: Optional[int] = None,
+    time_limit: Optional[Union[int, float]] = None,
+) -> bytes:
+    """
+    Reads the body of a streamed response by chunks, which are decompressed as they
+    arrive. Raises a ValueError as soon as the decompressed body exceeds max_bytes, and
+    a :obj:`requests.Timeout` when reading takes longer than time_limit seconds.
+    """
+    deadline = time.monotonic() + time_limit if time_limit else None
+    chunks = []
+    total = 0
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        total += len(chunk)
+        if max_bytes is not None and total > max_bytes:
+            raise ValueError(f"response larger than {max_bytes} bytes")
+        if deadline is not None and time.monotonic() > deadline:
+            raise requests.Timeout(f"response took longer than {time_limit} seconds")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def get_json(
+    url: str,
+    params: Optional[dict] = None,
+    cache: Optional[MutableMapping] = None,
+    max_bytes: Optional[int] = None,
+    time_limit: Optional[Union[int, float]] = None,
+    timeout=None,
+    deadline: Optional[Deadline] = None,
+    retries: int = 0,
+    session: Optional[requests.Session] = None,
+):
+    """
+    Sends a GET request and decodes its JSON body, revalidating cached responses
+
+    When a cache is given, responses carrying an ETag or a Last-Modified header are stored
+    in it with those validators. The next request for the same URL sends them back as
+    If-None-Match and If-Modified-Since, and a 304 Not Modified answer returns the cached
+    object without downloading the body again.
+
+    When max_bytes or time_limit are given, the body is streamed and the request aborted
+    as soon as either is exceeded. Compressed encodings (gzip, deflate, and brotli when
+    the brotli package is installed) are requested and decoded chunk by chunk.
+
+    >>> import pyeuropeana.utils as utils
+    >>> from pyeuropeana.utils.http import get_json
+    >>> cache = utils.DiskCache('responses.sqlite')
+    >>> manifest = get_json(url, cache = cache)
+
+    Args:
+      url (:obj:`str`)
+        URL of the request
+      params (:obj:`dict`, optional)
+        Query parameters
+      cache (:obj:`dict` or :obj:`pyeuropeana.utils.DiskCache`, optional)
+        Dict-like object where responses and their validators are kept
+      max_bytes (:obj:`int`, optional)
+        Maximum size of the decompressed body
+      time_limit (:obj:`int` or :obj:`float`, optional)
+        Maximum number of seconds to read the body
+      timeout (:obj:`float` or :obj:`tuple`, optional)
+        Connect and read timeouts in seconds. Defaults to TIMEOUT.
+      deadline (:obj:`pyeuropeana.utils.http.Deadline`, optional)
+        Time budget of the operation the request is part of
+      retries (:obj:`int`, optional)
+        Number of retries on connection errors, timeouts and transient errors, see get.
+        Defaults to 0.
+      session (:obj:`requests.Session`, optional)
+        Session through which the request is sent
+
+    Returns:
+      The decoded JSON body
+    """
+    headers = {"Accept-Encoding": ACCEPT_ENCODING}
+    key = entry = None
+    if cache is not None:
+        key = cache_key(url, params)
+        entry = cache.get(key)
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+    if deadline is not None:
+        time_limit = min(time_limit or deadline.remaining(), deadline.remaining())
+    stream = max_bytes is not None or time_limit is not None
+    if timeout is None and time_limit is not None:
+        # the time limit also bounds the wait for the connection and for each chunk
+        timeout = time_limit
+    response = get(
+        url,
+        params=params,
+        timeout=timeout,
+        deadline=deadline,
+        retries=retries,
+        session=session,
+        headers=headers,
+        stream=stream,
+    )
+    try:
+        if response.status_code == 304 and entry:
+            return entry["body"]
+        if stream:
+            body = json.loads(read_body(response, max_bytes, time_limit))
+        else:
+            body = response.json()
+    finally:
+        response.close()
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if cache is not None and response.status_code == 200 and (etag or last_modified):
+        cache[key] = {"etag": etag, "last_modified": last_modified, "body": body}
+    return body
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import threading
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+from PIL import Image
+
+from .edm_utils import europeana_id2filename
+
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+class ImageCache:
+    """
+    Persistent on-disk cache of images with a size limit and least recently used eviction
+
+    Entries are keyed by Europeana ID when one is given, using the naming of
+    utils.edm_utils.europeana_id2filename, or otherwise by the SHA-256 hash of the URL.
+    The original bytes are stored, along with optional resized derivatives.
+
+    >>> import pyeuropeana.utils as utils
+    >>> cache = utils.ImageCache('images/', max_bytes = 10 * 1024 ** 3)
+    >>> img = utils.url2img(url, cache = cache)
+
+    Args:
+      directory (:obj:`str` or :obj:`pathlib.Path`)
+        Directory where the images are stored. It is created if it does not exist.
+      max_bytes (:obj:`int`, optional)
+        Maximum total size of the cache. When exceeded, the least recently used
+        files are deleted. Defaults to 2 GiB.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        for subdirectory in ("originals", "derivatives"):
+            (self.directory / subdirectory).mkdir(parents=True, exist_ok=True)
+        self._size = sum(path.stat().st_size for path in self._files())
+
+    @staticmethod
+    def key(url: Optional[str] = None, europeana_id: Optional[str] = None) -> str:
+        if europeana_id:
+            return europeana_id2filename(europeana_id)
+        if not url:
+            raise ValueError("either url or europeana_id is needed")
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _path(self, key, size=None):
+        if size is None:
+            return self.directory / "originals" / key
+        width, height = size
+        return self.directory / "derivatives" / f"{key}.{width}x{height}.jpg"
+
+    def _files(self):
+        for subdirectory in ("originals", "derivatives"):
+            for entry in os.scandir(self.directory / subdirectory):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    yield Path(entry.path)
+
+    def get(self, key: str, size: Optional[Tuple[int, int]] = None) -> Optional[bytes]:
+        """
+        Returns the stored bytes of the original image, or of the derivative
+        of the given (width, height), or None
+        """
+        path = self._path(key, size)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key: str, data: bytes, size: Optional[Tuple[int, int]] = None):
+        """
+        Stores the bytes of an original image, or of the derivative of the given (width, height)
+        """
+        path = self._path(key, size)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        with self._lock:
+            if path.exists():
+                self._size -= path.stat().st_size
+            os.replace(tmp_path, path)
+            self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def put_derivative(self, key: str, img: Image.Image, size: Tuple[int, int]):
+        """
+        Stores a resized version of an image as JPEG
+        """
+        buffer = BytesIO()
+        img.convert("RGB").save(buffer, "JPEG", quality=90)
+        self.put(key, buffer.getvalue(), size)
+
+    def _evict(self):
+        # evicting down to 90% of the limit avoids scanning the directory on every put
+        target = 0.9 * self.max_bytes
+        files = []
+        for path in self._files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        self._size = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if self._size <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+    def __contains__(self, key):
+        return self._path(key).exists()
+
+    @property
+    def size(self):
+        return self._size
@@ -0,0 +1,225 @@
+from pathlib import Path
+from typing import Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8
+PHASH_SIZE = 32
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(PHASH_SIZE)
+
+
+def _gray(image, size):
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(np.asarray(image, dtype=np.uint8))
+    image = image.convert("L").resize((size, size), Image.LANCZOS)
+    return np.asarray(image, dtype=np.float64)
+
+
+def _pack(bits):
+    """
+    Packs boolean arrays of shape (..., 64) into uint64 integers
+    """
+    packed = np.packbits(bits.reshape(-1, 64), axis=1)
+    return packed.view(">u8").astype(np.uint64).reshape(bits.shape[:-1])
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    """
+    Number of bits set in each element of an uint64 array
+    """
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    return (
+        _POPCOUNT_TABLE[values.view(np.uint8)]
+        .reshape(values.shape + (8,))
+        .sum(axis=-1, dtype=np.uint8)
+    )
+
+
+def ahash(image: Union[Image.Image, np.ndarray]) -> int:
+    """
+    Average hash: 64 bits telling whether each pixel of the 8x8 grayscale
+    thumbnail of the image is brighter than the mean
+    """
+    gray = _gray(image, HASH_SIZE)
+    return int(_pack((gray > gray.mean()).reshape(64)))
+
+
+def phash(image: Union[Image.Image, np.ndarray]) -> int:
+    """
+    Perceptual hash: 64 bits telling whether each of the 8x8 lowest frequency DCT
+    coefficients of the 32x32 grayscale thumbnail of the image is above their median
+    """
+    return int(hash_images([image], method="phash")[0][0])
+
+
+def hash_images(
+    images: Union[Sequence, np.ndarray],
+    method: str = "phash",
+    mask: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the perceptual hashes of many images, with the DCT vectorized over the batch
+
+    >>> import pyeuropeana.utils as utils
+    >>> batch, mask = utils.urls2batch(df['image_url'], size = (64, 64))
+    >>> hashes, valid = utils.hash_images(batch, mask = mask)
+
+    Args:
+      images (:obj:`numpy.ndarray` or :obj:`list`)
+        An uint8 batch of shape (N, height, width, 3) as returned by utils.urls2batch,
+        or a list of :obj:`PIL.Image` objects, arrays or None
+      method (:obj:`str`, optional)
+        Either "phash" or "ahash". Defaults to "phash".
+      mask (:obj:`numpy.ndarray`, optional)
+        Boolean mask of valid images, as returned by utils.urls2batch
+
+    Returns: :obj:`tuple` of :obj:`numpy.ndarray`
+      The hashes as an uint64 array, and a boolean array which is False for missing images
+    """
+    if method not in ("phash", "ahash"):
+        raise ValueError('method must be either "phash" or "ahash"')
+    valid = np.array([image is not None for image in images], dtype=bool)
+    if mask is not None:
+        valid &= np.asarray(mask, dtype=bool)
+    hashes = np.zeros(len(valid), dtype=np.uint64)
+    if not valid.any():
+        return hashes, valid
+
+    size = PHASH_SIZE if method == "phash" else HASH_SIZE
+    grays = np.stack([_gray(images[i], size) for i in np.flatnonzero(valid)])
+    if method == "phash":
+        low = (_DCT @ grays @ _DCT.T)[:, :HASH_SIZE, :HASH_SIZE].reshape(-1, 64)
+        # the first coefficient is the mean brightness, left out of the median
+        medians = np.median(low[:, 1:], axis=1)
+        bits = low > medians[:, None]
+    else:
+        flat = grays.reshape(len(grays), -1)
+        bits = flat > flat.mean(axis=1)[:, None]
+    hashes[valid] = _pack(bits)
+    return hashes, valid
+
+
+class HashIndex:
+    """
+    Compact index of 64-bit image hashes for near-duplicate search
+
+    Hashes are kept in a single uint64 array. Queries compare a hash against all of them at
+    once with XOR and a byte-wise popcount, and :meth:`duplicates` only verifies pairs sharing
+    an exact block of bits, which by the pigeonhole principle includes every pair within the
+    distance, instead of comparing all pairs.
+
+    >>> import pyeuropeana.utils as utils
+    >>> index = utils.HashIndex()
+    >>> index.add(hashes[valid], df['europeana_id'][valid])
+    >>> groups = index.duplicates(max_distance = 6)
+    """
+
+    def __init__(self):
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._pending = []
+        self.ids = []
+
+    def add(self, hashes: Iterable[int], ids: Iterable[Hashable]):
+        """
+        Adds hashes along with the identifiers they belong to, such as Europeana IDs
+        """
+        hashes = np.asarray(
+            list(hashes) if not isinstance(hashes, np.ndarray) else hashes,
+            dtype=np.uint64,
+        )
+        ids = list(ids)
+        if len(hashes) != len(ids):
+            raise ValueError("hashes and ids must have the same length")
+        self._pending.append(hashes)
+        self.ids += ids
+
+    @property
+    def hashes(self) -> np.ndarray:
+        if self._pending:
+            self._hashes = np.concatenate([self._hashes] + self._pending)
+            self._pending = []
+        return self._hashes
+
+    def __len__(self):
+        return len(self.ids)
+
+    def query(self, value: int, max_distance: int = 6) -> List[Tuple[Hashable, int]]:
+        """
+        Returns the (id, distance) pairs of the hashes within the given Hamming
+        distance of a hash, from the closest to the farthest
+        """
+        distances = popcount(self.hashes ^ np.uint64(value))
+        matches = np.flatnonzero(distances <= max_distance)
+        matches = matches[np.argsort(distances[matches], kind="stable")]
+        return [(self.ids[i], int(distances[i])) for i in matches]
+
+    def duplicates(self, max_distance: int = 6) -> List[List[Hashable]]:
+        """
+        Groups the ids whose hashes are within the given Hamming distance of each other,
+        directly or through other members of the group. Only groups of two or more are returned.
+        """
+        hashes = self.hashes
+        parent = list(range(len(hashes)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for shift, width in _blocks(max_distance + 1):
+            keys = (hashes >> np.uint64(shift)) & np.uint64((1 << width) - 1)
+            order = np.argsort(keys, kind="stable")
+            boundaries = np.flatnonzero(np.diff(keys[order])) + 1
+            for group in np.split(order, boundaries):
+                for position in range(len(group) - 1):
+                    i = group[position]
+                    others = group[position + 1 :]
+                    close = others[popcount(hashes[others] ^ hashes[i]) <= max_distance]
+                    for j in close:
+                        parent[find(j)] = find(i)
+
+        groups = {}
+        for i in range(len(hashes)):
+            groups.setdefault(find(i), []).append(self.ids[i])
+        return [group for group in groups.values() if len(group) > 1]
+
+    def save(self, path: Union[str, Path]):
+        """
+        Saves the index to a .npz file. Ids are stored as strings, so that loading
+        the file does not need pickle.
+        """
+        np.savez_compressed(path, hashes=self.hashes, ids=np.array(self.ids, dtype=str))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "HashIndex":
+        """
+        Loads an index saved with :meth:`save`, with its ids as strings
+        """
+        data = np.load(path)
+        index = cls()
+        index.add(data["hashes"], data["ids"].tolist())
+        return index
+
+
+def _blocks(n):
+    """
+    Splits 64 bits into n contiguous blocks, returned as (shift, width) pairs
+    """
+    n = max(1, min(n, 64))
+    widths = [64 // n + (1 if i < 64 % n else 0) for i in range(n)]
+    shifts = np.cumsum([0] + widths[:-1])
+    return list(zip(shifts.tolist(), widths))
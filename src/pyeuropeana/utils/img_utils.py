@@ -1,11 +1,33 @@
-from typing import Union
+from typing import Iterable, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
 from multiprocessing import Process, Manager
+from io import BytesIO
+from urllib.parse import quote
+import re
 import urllib.request as urllibrec
 
+import numpy as np
+import requests
 from PIL import Image
 
+THUMBNAIL_ENDPOINT = "https://api.europeana.eu/thumbnail/v2/url.json"
 
-def url2img(url: str, time_limit: Union[int, float] = 10) -> Image.Image:
+# {scheme}://{server}{/prefix}/{identifier}/{region}/{size}/{rotation}/{quality}.{format}
+IIIF_IMAGE_PATTERN = re.compile(
+    r"^(?P<base>.+)/(?P<region>full|square|\d+,\d+,\d+,\d+|pct:[\d.,]+)"
+    r"/(?P<size>[^/]+)/(?P<rotation>!?\d+)/(?P<quality>\w+)\.(?P<format>\w+)$"
+)
+
+MAX_IMAGE_BYTES = 64 * 1024 * 1024
+
+
+def url2img(
+    url: str,
+    time_limit: Union[int, float] = 10,
+    size: Optional[Tuple[int, int]] = None,
+    cache=None,
+    europeana_id: Optional[str] = None,
+) -> Image.Image:
 
     """
     A utility function for obtaining a :obj:`PIL.Image` object given an image URL.
@@ -19,6 +41,18 @@ def url2img(url: str, time_limit: Union[int, float] = 10) -> Image.Image:
       How long to wait (in seconds) to retrieve the image until the request timeouts.
       When the request timeouts, the function returns None. Default is 10 seconds.
 
+    size: tuple of int, optional
+      Maximum (width, height) of the image. When given, JPEG images are decoded
+      directly at a reduced scale and the result is downscaled to fit in this size.
+
+    cache: :obj:`pyeuropeana.utils.ImageCache`, optional
+      Cache where the downloaded image is stored, and from which it is read
+      instead of downloading it again.
+
+    europeana_id: str, optional
+      Europeana ID of the record the image belongs to, used as key in the cache.
+      Otherwise the URL is used.
+
     Returns
 
     :obj:`PIL.Image`
@@ -73,9 +107,21 @@ def url2img(url: str, time_limit: Union[int, float] = 10) -> Image.Image:
             )
         )
 
+    key = cache.key(url, europeana_id) if cache is not None else None
+    if key is not None:
+        data = cache.get(key)
+        if data is not None:
+            try:
+                return bytes2img(data, size)
+            except Exception:
+                return None
+
     def worker(image_url, data_dict):
         try:
-            data_dict["image"] = Image.open(urllibrec.urlopen(image_url)).convert("RGB")
+            data = urllibrec.urlopen(image_url, timeout=time_limit).read()
+            data_dict["image"] = bytes2img(data, size)
+            if key is not None:
+                data_dict["data"] = data
         except Exception:
             data_dict["image"] = None
 
@@ -86,7 +132,311 @@ def url2img(url: str, time_limit: Union[int, float] = 10) -> Image.Image:
     action_process.start()
     action_process.join(timeout=time_limit)
     action_process.terminate()
+    if "data" in data_dict.keys():
+        cache.put(key, data_dict["data"])
     if "image" in data_dict.keys():
         return data_dict["image"]
     else:
         return None
+
+
+def iiif_image_url(url: str, size: Tuple[int, int]) -> Optional[str]:
+    """
+    Returns the URL of a IIIF Image API [1] resource at a size fitting in (width, height),
+    or None if the URL is not a IIIF image request or image information URL.
+
+    References
+
+    1. https://iiif.io/api/image/2.1/
+    """
+    width, height = size
+    match = IIIF_IMAGE_PATTERN.match(url)
+    if match:
+        return "{base}/{region}/!{width},{height}/{rotation}/{quality}.{format}".format(
+            width=width, height=height, **match.groupdict()
+        )
+    if url.endswith("/info.json"):
+        return f"{url[: -len('/info.json')]}/full/!{width},{height}/0/default.jpg"
+    return None
+
+
+def thumbnail_url(url: str, size: int = 400) -> str:
+    """
+    Returns the URL of the thumbnail generated by Europeana for a media URL such as
+    edmIsShownBy, using the Thumbnail API [1]. Thumbnails are 200 or 400 pixels wide.
+
+    References
+
+    1. https://pro.europeana.eu/page/record#thumbnails
+    """
+    width = 200 if size <= 200 else 400
+    return f"{THUMBNAIL_ENDPOINT}?uri={quote(url, safe='')}&type=IMAGE&size=w{width}"
+
+
+def bytes2img(data: bytes, size: Optional[Tuple[int, int]] = None) -> Image.Image:
+    """
+    Decodes an encoded image into a :obj:`PIL.Image` in RGB mode. When a maximum
+    (width, height) is given, JPEG images are decoded at the smallest scale that still
+    covers it (draft mode), and the result is downscaled to fit in it.
+    """
+    img = Image.open(BytesIO(data))
+    if size:
+        img.draft("RGB", size)
+    img = img.convert("RGB")
+    if size:
+        img.thumbnail(size, Image.BILINEAR)
+    return img
+
+
+def img2array(
+    img: Image.Image, size: Tuple[int, int], policy: str = "resize"
+) -> np.ndarray:
+    """
+    Fits an image to (width, height) following the given policy and returns it
+    as an uint8 array of shape (height, width, 3). See urls2batch for the policies.
+    """
+    out = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    _fit_into(img, out, policy)
+    return out
+
+
+POLICIES = ("resize", "pad", "crop")
+
+
+def _fit_into(img, out, policy):
+    """
+    Writes an image into a preallocated (height, width, 3) uint8 array
+    """
+    height, width = out.shape[:2]
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    if policy == "resize":
+        if img.size != (width, height):
+            img = img.resize((width, height), Image.BILINEAR)
+        out[...] = np.asarray(img)
+    elif policy == "pad":
+        scale = min(width / img.size[0], height / img.size[1])
+        scaled = (
+            min(width, max(1, round(img.size[0] * scale))),
+            min(height, max(1, round(img.size[1] * scale))),
+        )
+        if img.size != scaled:
+            img = img.resize(scaled, Image.BILINEAR)
+        top = (height - img.size[1]) // 2
+        left = (width - img.size[0]) // 2
+        out[top : top + img.size[1], left : left + img.size[0]] = np.asarray(img)
+    elif policy == "crop":
+        scale = max(width / img.size[0], height / img.size[1])
+        scaled = (
+            max(width, round(img.size[0] * scale)),
+            max(height, round(img.size[1] * scale)),
+        )
+        if img.size != scaled:
+            img = img.resize(scaled, Image.BILINEAR)
+        top = (scaled[1] - height) // 2
+        left = (scaled[0] - width) // 2
+        out[...] = np.asarray(img)[top : top + height, left : left + width]
+    else:
+        raise ValueError(f"policy must be one of {POLICIES}")
+
+
+def urls2batch(
+    urls: Iterable[str],
+    size: Tuple[int, int] = (224, 224),
+    policy: str = "resize",
+    max_workers: int = 8,
+    timeout: Union[int, float] = 10,
+    thumbnail: bool = False,
+    cache=None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Downloads and decodes a list of images concurrently into a single preallocated
+    uint8 array, ready for vectorized processing or machine learning models.
+
+    Parameters
+
+    urls: list of str
+      URLs of the images, such as the image_url column from utils.search2df.
+
+    size: tuple of int, optional
+      (width, height) of every image in the batch. Default is (224, 224).
+
+    policy: str, optional
+      How images are fitted into the size. "resize" stretches them, "pad" keeps the aspect ratio
+      and centers them over black padding, and "crop" keeps the aspect ratio and crops the
+      center. Default is "resize".
+
+    max_workers: int, optional
+      Number of concurrent downloads. Default is 8.
+
+    timeout: int or float, optional
+      Connect and read timeout in seconds for each image. Default is 10 seconds.
+
+    thumbnail: bool, optional
+      Whether to download Europeana thumbnails instead of full resolution images
+      when the URL is not a IIIF image. Default is False.
+
+    cache: :obj:`pyeuropeana.utils.ImageCache`, optional
+      Cache for the original images and their resized derivatives. Images downloaded
+      from the thumbnail API or a IIIF server are read from but not stored in the cache.
+
+    Returns
+
+    tuple of :obj:`numpy.ndarray`
+      The batch, of shape (N, height, width, 3), and a boolean mask of shape (N,) which is
+      False for the images that could not be obtained. Their slots in the batch are zeros.
+
+    Examples
+
+    >>> import pyeuropeana.utils as utils
+    >>> batch, mask = utils.urls2batch(df['image_url'], size = (128, 128), policy = 'pad')
+    >>> batch[mask].mean(axis = (1, 2))
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"policy must be one of {POLICIES}")
+    urls = list(urls)
+    width, height = size
+    batch = np.zeros((len(urls), height, width, 3), dtype=np.uint8)
+    mask = np.zeros(len(urls), dtype=bool)
+
+    # cropping needs room around the target size, fetched images only fit in it
+    fetch_size = (2 * max(size),) * 2 if policy == "crop" else size
+
+    def load(index):
+        url = urls[index]
+        if not isinstance(url, str):
+            return
+        img = fetch_image(
+            url, size=fetch_size, timeout=timeout, thumbnail=thumbnail, cache=cache
+        )
+        if img is None:
+            return
+        _fit_into(img, batch[index], policy)
+        mask[index] = True
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(load, range(len(urls))))
+    return batch, mask
+
+
+def fetch_image(
+    url: str,
+    size: Optional[Tuple[int, int]] = None,
+    timeout: Union[int, float] = 10,
+    thumbnail: bool = False,
+    max_bytes: int = MAX_IMAGE_BYTES,
+    cache=None,
+    europeana_id: Optional[str] = None,
+) -> Optional[Image.Image]:
+    """
+    Downloads an image in the calling thread and decodes it into a :obj:`PIL.Image` in RGB mode.
+
+    Parameters
+
+    url: str
+      URL of the image, such as edmIsShownBy.
+
+    size: tuple of int, optional
+      Maximum (width, height) needed. IIIF image URLs are rewritten to request
+      this size from the server, and JPEG images are decoded at reduced scale.
+
+    timeout: int or float, optional
+      Connect and read timeout in seconds. Default is 10 seconds.
+
+    thumbnail: bool, optional
+      If True, the Europeana thumbnail of non IIIF images is downloaded instead of the
+      full resolution image. Default is False.
+
+    max_bytes: int, optional
+      Images larger than this are not downloaded. Default is 64 MiB.
+
+    cache: :obj:`pyeuropeana.utils.ImageCache`, optional
+      Cache for the original images and their resized derivatives. Images downloaded
+      from the thumbnail API or a IIIF server are read from but not stored in the cache.
+
+    europeana_id: str, optional
+      Europeana ID of the record the image belongs to, used as key in the cache.
+      Otherwise the URL is used.
+
+    Returns
+
+    :obj:`PIL.Image`
+      The image, or None if it could not be downloaded or decoded.
+
+    Examples
+
+    >>> import pyeuropeana.utils as utils
+    >>> img = utils.fetch_image(df['image_url'].values[0], size = (256, 256), thumbnail = True)
+    """
+    key = cache.key(url, europeana_id) if cache is not None else None
+    source = url
+    if size:
+        source = iiif_image_url(url, size) or source
+    if thumbnail and source == url:
+        source = thumbnail_url(url, max(size) if size else 400)
+    try:
+        if key is not None:
+            img = _cached_image(cache, key, size)
+            if img is not None:
+                return img
+        data = download(source, timeout=timeout, max_bytes=max_bytes)
+        img = bytes2img(data, size)
+    except Exception:
+        return None
+    if key is not None and source == url:
+        # thumbnails and IIIF renditions are not stored, the cache only holds the
+        # original images and derivatives made from them
+        cache.put(key, data)
+        if size:
+            cache.put_derivative(key, img, size)
+    return img
+
+
+def _cached_image(cache, key, size):
+    if size:
+        data = cache.get(key, size)
+        if data is not None:
+            return bytes2img(data)
+    data = cache.get(key)
+    if data is None:
+        return None
+    img = bytes2img(data, size)
+    if size:
+        cache.put_derivative(key, img, size)
+    return img
+
+
+def url2array(
+    url: str,
+    size: Tuple[int, int] = (224, 224),
+    timeout: Union[int, float] = 10,
+    thumbnail: bool = False,
+    policy: str = "resize",
+) -> Optional[np.ndarray]:
+    """
+    Same as fetch_image, but returns an uint8 array of shape (height, width, 3)
+    with the image fitted to the given (width, height) as in urls2batch, or None.
+    """
+    img = fetch_image(url, size=size, timeout=timeout, thumbnail=thumbnail)
+    if img is None:
+        return None
+    return img2array(img, size, policy)
+
+
+def download(
+    url: str, timeout: Union[int, float] = 10, max_bytes: int = MAX_IMAGE_BYTES
+) -> bytes:
+    """
+    Downloads the body of a response by chunks, raising a ValueError
+    as soon as it exceeds max_bytes
+    """
+    with requests.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        chunks = []
+        total = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            total += len(chunk)
+            if total > max_bytes:
+                raise ValueError(f"response larger than {max_bytes} bytes")
+            chunks.append(chunk)
+    return b"".join(chunks)
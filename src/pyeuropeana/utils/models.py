@@ -0,0 +1,264 @@
+import sys
+from typing import Iterable, Iterator, Optional
+
+from .edm_utils import europeana_id2uri
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class LangMap:
+    """
+    Immutable language map, such as ``{"en": ["Title"], "nl": ["Titel"]}`` in the Record API
+
+    Language codes are interned and values stored as tuples, which takes much less memory
+    than the nested dicts and lists of the JSON response.
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(self, lang_dict: Optional[dict] = None):
+        self._items = tuple(
+            (
+                _intern(lang),
+                tuple(values) if isinstance(values, list) else (values,),
+            )
+            for lang, values in (lang_dict or {}).items()
+        )
+
+    def get(self, lang, default=None):
+        for key, values in self._items:
+            if key == lang:
+                return values
+        return default
+
+    def __getitem__(self, lang):
+        values = self.get(lang)
+        if values is None:
+            raise KeyError(lang)
+        return values
+
+    def __contains__(self, lang):
+        return self.get(lang) is not None
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return bool(self._items)
+
+    def __repr__(self):
+        return f"LangMap({self.to_dict()!r})"
+
+    @property
+    def languages(self):
+        return tuple(lang for lang, _ in self._items)
+
+    def first(self, lang: str = "en"):
+        """
+        Returns the first value in the given language, falling back to the first
+        value of the first language as utils.edm_utils.get_value_lang does
+        """
+        if not self._items:
+            return None
+        values = self.get(lang) or self._items[0][1]
+        return values[0] if values else None
+
+    def to_dict(self):
+        return {lang: list(values) for lang, values in self._items}
+
+
+class WebResource:
+    """
+    Web resource of an aggregation, such as the image in edm:isShownBy
+    """
+
+    __slots__ = (
+        "about",
+        "mime_type",
+        "file_size",
+        "width",
+        "height",
+        "orientation",
+        "color_space",
+        "colors",
+        "rights",
+    )
+
+    def __init__(self, obj: dict):
+        self.about = obj.get("about")
+        self.mime_type = _intern(obj.get("ebucoreHasMimeType"))
+        self.file_size = obj.get("ebucoreFileByteSize")
+        self.width = obj.get("ebucoreWidth")
+        self.height = obj.get("ebucoreHeight")
+        self.orientation = _intern(obj.get("ebucoreOrientation"))
+        self.color_space = _intern(obj.get("edmHasColorSpace"))
+        self.colors = tuple(map(_intern, obj.get("edmComponentColor") or ()))
+        self.rights = LangMap(obj.get("webResourceEdmRights")).first("def")
+
+
+class Aggregation:
+    """
+    Provider aggregation of a record, with the links to the digital objects and the rights
+    """
+
+    __slots__ = (
+        "about",
+        "is_shown_by",
+        "is_shown_at",
+        "object",
+        "has_view",
+        "provider",
+        "data_provider",
+        "rights",
+        "web_resources",
+    )
+
+    def __init__(self, obj: dict):
+        self.about = obj.get("about")
+        self.is_shown_by = obj.get("edmIsShownBy")
+        self.is_shown_at = obj.get("edmIsShownAt")
+        self.object = obj.get("edmObject")
+        self.has_view = tuple(obj.get("hasView") or ())
+        self.provider = LangMap(obj.get("edmProvider"))
+        self.data_provider = LangMap(obj.get("edmDataProvider"))
+        self.rights = _intern(LangMap(obj.get("edmRights")).first("def"))
+        self.web_resources = tuple(
+            WebResource(resource) for resource in obj.get("webResources") or ()
+        )
+
+
+class Proxy:
+    """
+    Proxy of a record, holding the descriptive metadata from the provider or from Europeana
+    """
+
+    __slots__ = (
+        "about",
+        "europeana_proxy",
+        "type",
+        "title",
+        "description",
+        "creator",
+        "subject",
+        "dc_type",
+        "identifier",
+        "created",
+        "spatial",
+    )
+
+    def __init__(self, obj: dict):
+        self.about = obj.get("about")
+        self.europeana_proxy = bool(obj.get("europeanaProxy"))
+        self.type = _intern(obj.get("edmType"))
+        self.title = LangMap(obj.get("dcTitle"))
+        self.description = LangMap(obj.get("dcDescription"))
+        self.creator = LangMap(obj.get("dcCreator"))
+        self.subject = LangMap(obj.get("dcSubject"))
+        self.dc_type = LangMap(obj.get("dcType"))
+        self.identifier = LangMap(obj.get("dcIdentifier"))
+        self.created = LangMap(obj.get("dctermsCreated"))
+        self.spatial = LangMap(obj.get("dctermsSpatial"))
+
+
+class CHO:
+    """
+    Typed view of a cultural heritage object from the Record API [1]
+
+    Only the modelled fields are kept, in classes using ``__slots__``, so that large numbers
+    of records can be held in memory and fields are read as attributes instead of walking
+    nested dicts.
+
+    >>> import pyeuropeana.apis as apis
+    >>> import pyeuropeana.utils as utils
+    >>> cho = utils.CHO.from_response(apis.record('/79/resource_document_museumboerhaave_V35167'))
+    >>> cho.aggregations[0].rights
+    >>> cho.title.first('en')
+
+    Args:
+      obj (:obj:`dict`)
+        The "object" field of a Record API response
+
+    References:
+      1. https://pro.europeana.eu/page/record
+    """
+
+    __slots__ = (
+        "europeana_id",
+        "type",
+        "dataset_name",
+        "language",
+        "country",
+        "landing_page",
+        "preview",
+        "timestamp_created",
+        "timestamp_update",
+        "proxies",
+        "aggregations",
+    )
+
+    def __init__(self, obj: dict):
+        europeana_aggregation = obj.get("europeanaAggregation") or {}
+        self.europeana_id = obj["about"]
+        self.type = _intern(obj.get("type"))
+        self.dataset_name = _intern((obj.get("edmDatasetName") or [None])[0])
+        self.language = _intern(
+            LangMap(europeana_aggregation.get("edmLanguage")).first("def")
+        )
+        self.country = _intern(
+            LangMap(europeana_aggregation.get("edmCountry")).first("def")
+        )
+        self.landing_page = europeana_aggregation.get("edmLandingPage")
+        self.preview = europeana_aggregation.get("edmPreview")
+        self.timestamp_created = obj.get("timestamp_created")
+        self.timestamp_update = obj.get("timestamp_update")
+        self.proxies = tuple(Proxy(proxy) for proxy in obj.get("proxies") or ())
+        self.aggregations = tuple(
+            Aggregation(aggregation) for aggregation in obj.get("aggregations") or ()
+        )
+
+    @classmethod
+    def from_response(cls, response: dict) -> "CHO":
+        """
+        Builds the model from the output of apis.record
+        """
+        return cls(response["object"])
+
+    def __repr__(self):
+        return f"CHO({self.europeana_id!r})"
+
+    @property
+    def uri(self):
+        return europeana_id2uri(self.europeana_id)
+
+    @property
+    def title(self) -> LangMap:
+        """
+        Title of the last proxy that has one, as in utils.process_CHO_record
+        """
+        for proxy in reversed(self.proxies):
+            if proxy.title:
+                return proxy.title
+        return LangMap()
+
+    @property
+    def provider(self) -> LangMap:
+        return self.aggregations[0].provider if self.aggregations else LangMap()
+
+    @property
+    def rights(self):
+        return self.aggregations[0].rights if self.aggregations else None
+
+    @property
+    def image_url(self):
+        return self.aggregations[0].is_shown_by if self.aggregations else None
+
+
+def iter_chos(responses: Iterable[dict]) -> Iterator[CHO]:
+    """
+    Lazily builds a :obj:`CHO` for each Record API response, so that the responses
+    can be released as soon as they are converted
+    """
+    for response in responses:
+        yield CHO.from_response(response)
@@ -0,0 +1,233 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+from PIL import Image
+
+# CSS named colours, the values accepted by the colourpalette filter of the Search API
+# fmt: off
+CSS_COLOURS = (
+    "#F0F8FF", "#FAEBD7", "#00FFFF", "#7FFFD4", "#F0FFFF", "#F5F5DC", "#FFE4C4",
+    "#000000", "#FFEBCD", "#0000FF", "#8A2BE2", "#A52A2A", "#DEB887", "#5F9EA0",
+    "#7FFF00", "#D2691E", "#FF7F50", "#6495ED", "#FFF8DC", "#DC143C", "#00008B",
+    "#008B8B", "#B8860B", "#A9A9A9", "#006400", "#BDB76B", "#8B008B", "#556B2F",
+    "#FF8C00", "#9932CC", "#8B0000", "#E9967A", "#8FBC8F", "#483D8B", "#2F4F4F",
+    "#00CED1", "#9400D3", "#FF1493", "#00BFFF", "#696969", "#1E90FF", "#B22222",
+    "#FFFAF0", "#228B22", "#DCDCDC", "#F8F8FF", "#FFD700", "#DAA520", "#808080",
+    "#008000", "#ADFF2F", "#F0FFF0", "#FF69B4", "#CD5C5C", "#4B0082", "#FFFFF0",
+    "#F0E68C", "#E6E6FA", "#FFF0F5", "#7CFC00", "#FFFACD", "#ADD8E6", "#F08080",
+    "#E0FFFF", "#FAFAD2", "#D3D3D3", "#90EE90", "#FFB6C1", "#FFA07A", "#20B2AA",
+    "#87CEFA", "#778899", "#B0C4DE", "#FFFFE0", "#00FF00", "#32CD32", "#FAF0E6",
+    "#FF00FF", "#800000", "#66CDAA", "#0000CD", "#BA55D3", "#9370DB", "#3CB371",
+    "#7B68EE", "#00FA9A", "#48D1CC", "#C71585", "#191970", "#F5FFFA", "#FFE4E1",
+    "#FFE4B5", "#FFDEAD", "#000080", "#FDF5E6", "#808000", "#6B8E23", "#FFA500",
+    "#FF4500", "#DA70D6", "#EEE8AA", "#98FB98", "#AFEEEE", "#DB7093", "#FFEFD5",
+    "#FFDAB9", "#CD853F", "#FFC0CB", "#DDA0DD", "#B0E0E6", "#800080", "#FF0000",
+    "#BC8F8F", "#4169E1", "#8B4513", "#FA8072", "#F4A460", "#2E8B57", "#FFF5EE",
+    "#A0522D", "#C0C0C0", "#87CEEB", "#6A5ACD", "#708090", "#FFFAFA", "#00FF7F",
+    "#4682B4", "#D2B48C", "#008080", "#D8BFD8", "#FF6347", "#40E0D0", "#EE82EE",
+    "#F5DEB3", "#FFFFFF", "#F5F5F5", "#FFFF00", "#9ACD32",
+)
+# fmt: on
+
+_SRGB2XYZ = np.array(
+    [
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ]
+)
+_WHITE_D65 = np.array([0.95047, 1.0, 1.08883])
+
+
+def rgb2lab(rgb: np.ndarray) -> np.ndarray:
+    """
+    Converts sRGB values in [0, 255] to CIE Lab (D65), vectorized over any
+    array whose last dimension holds the three channels
+    """
+    rgb = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ _SRGB2XYZ.T / _WHITE_D65
+    delta = 6 / 29
+    f = np.where(xyz > delta**3, np.cbrt(xyz), xyz / (3 * delta**2) + 4 / 29)
+    return np.stack(
+        [
+            116 * f[..., 1] - 16,
+            500 * (f[..., 0] - f[..., 1]),
+            200 * (f[..., 1] - f[..., 2]),
+        ],
+        axis=-1,
+    )
+
+
+def _hex2rgb(colour):
+    return [int(colour[i : i + 2], 16) for i in (1, 3, 5)]
+
+
+_CSS_LAB = rgb2lab(np.array([_hex2rgb(colour) for colour in CSS_COLOURS]))
+
+
+def _kmeans(points, k, n_iter=10, seed=0):
+    """
+    Lloyd's algorithm with k-means++ initialization, returns the label of each point
+    """
+    n = len(points)
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+    centers = np.empty((k, points.shape[1]))
+    centers[0] = points[rng.integers(n)]
+    distances = ((points - centers[0]) ** 2).sum(axis=1)
+    for i in range(1, k):
+        total = distances.sum()
+        index = rng.choice(n, p=distances / total) if total > 0 else rng.integers(n)
+        centers[i] = points[index]
+        distances = np.minimum(distances, ((points - centers[i]) ** 2).sum(axis=1))
+
+    squared_norms = (points**2).sum(axis=1)
+    labels = None
+    for _ in range(n_iter):
+        # |p - c|^2 = |p|^2 - 2 p.c + |c|^2, with a single matrix product
+        distances = (
+            squared_norms[:, None] - 2 * points @ centers.T + (centers**2).sum(axis=1)
+        )
+        new_labels = distances.argmin(axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=k)
+        for dimension in range(points.shape[1]):
+            sums = np.bincount(labels, weights=points[:, dimension], minlength=k)
+            centers[:, dimension] = np.where(
+                counts > 0, sums / np.maximum(counts, 1), centers[:, dimension]
+            )
+    return labels
+
+
+def _palette(rgb, lab, n_colours, snap):
+    labels = _kmeans(lab, n_colours)
+    weights = {}
+    for label in np.unique(labels):
+        members = labels == label
+        if snap:
+            center = lab[members].mean(axis=0)
+            colour = CSS_COLOURS[((_CSS_LAB - center) ** 2).sum(axis=1).argmin()]
+        else:
+            red, green, blue = rgb[members].mean(axis=0).round().astype(int)
+            colour = f"#{red:02X}{green:02X}{blue:02X}"
+        weights[colour] = weights.get(colour, 0) + members.sum()
+    return sorted(weights, key=weights.get, reverse=True)
+
+
+def _pixels(image, size):
+    if isinstance(image, Image.Image):
+        image = image.convert("RGB")
+        image.thumbnail((size, size), Image.BILINEAR)
+        image = np.asarray(image)
+    return np.asarray(image, dtype=np.uint8).reshape(-1, 3)
+
+
+def _downsample(images, size):
+    """
+    Keeps every step-th row and column of an array of shape (..., height, width, 3)
+    so that it fits in about size x size pixels, without copying it
+    """
+    step = -(-max(images.shape[-3], images.shape[-2]) // size)
+    return images[..., ::step, ::step, :]
+
+
+def _palette_worker(args):
+    # the conversion to Lab happens here, so that only uint8 pixels are sent to the workers
+    rgb, n_colours, snap = args
+    return _palette(rgb, rgb2lab(rgb), n_colours, snap)
+
+
+def extract_palette(
+    image: Union[Image.Image, np.ndarray],
+    n_colours: int = 5,
+    size: int = 64,
+    snap: bool = True,
+) -> List[str]:
+    """
+    Extracts the dominant colours of an image by k-means clustering of its pixels in Lab space
+
+    >>> import pyeuropeana.utils as utils
+    >>> img = utils.fetch_image(url, size = (64, 64))
+    >>> utils.extract_palette(img)
+    ['#2F4F4F', '#696969', '#D3D3D3']
+
+    Args:
+      image (:obj:`PIL.Image` or :obj:`numpy.ndarray`)
+        The image, or an uint8 array of shape (height, width, 3)
+      n_colours (:obj:`int`, optional)
+        Number of clusters. Defaults to 5.
+      size (:obj:`int`, optional)
+        Images are downsampled to fit in size x size pixels before clustering. Arrays are used as they are.
+        Defaults to 64.
+      snap (:obj:`bool`, optional)
+        If True, colours are mapped to the closest CSS named colour, which are the values used by
+        the colourpalette filter of the Search API, and may merge. Defaults to True.
+
+    Returns: :obj:`list` of :obj:`str`
+      Hex colour codes, from the most to the least frequent
+    """
+    rgb = _pixels(image, size)
+    return _palette(rgb, rgb2lab(rgb), n_colours, snap)
+
+
+def extract_palettes(
+    images: Union[Sequence, np.ndarray],
+    n_colours: int = 5,
+    size: int = 64,
+    snap: bool = True,
+    processes: Optional[int] = None,
+    mask: Optional[np.ndarray] = None,
+) -> List[Optional[List[str]]]:
+    """
+    Extracts the palettes of many images, clustering them in a pool of processes
+
+    Every image is downsampled to about size x size pixels before being sent to the
+    workers, which convert it to Lab, so memory stays proportional to the downsampled pixels.
+
+    >>> import pyeuropeana.utils as utils
+    >>> batch, mask = utils.urls2batch(df['image_url'], size = (64, 64))
+    >>> df['palette'] = utils.extract_palettes(batch, mask = mask)
+
+    Args:
+      images (:obj:`numpy.ndarray` or :obj:`list`)
+        An uint8 batch of shape (N, height, width, 3) as returned by utils.urls2batch,
+        or a list of :obj:`PIL.Image` objects, arrays or None
+      n_colours (:obj:`int`, optional)
+        Number of clusters per image. Defaults to 5.
+      size (:obj:`int`, optional)
+        Images are downsampled to fit in size x size pixels, by resampling :obj:`PIL.Image`
+        objects and by keeping every n-th row and column of arrays. Defaults to 64.
+      snap (:obj:`bool`, optional)
+        Whether to map colours to the closest CSS named colour. Defaults to True.
+      processes (:obj:`int`, optional)
+        Number of worker processes. Defaults to the number of CPUs. With 1 the palettes
+        are computed in the calling process.
+      mask (:obj:`numpy.ndarray`, optional)
+        Boolean mask of valid images in the batch, as returned by utils.urls2batch
+
+    Returns: :obj:`list`
+      A list of hex colour codes per image, or None for missing images
+    """
+    if isinstance(images, np.ndarray) and images.ndim == 4:
+        images = _downsample(images, size)
+    tasks = []
+    for i, image in enumerate(images):
+        if image is None or (mask is not None and not mask[i]):
+            tasks.append(None)
+            continue
+        if not isinstance(image, Image.Image):
+            image = _downsample(np.asarray(image), size)
+        tasks.append((_pixels(image, size), n_colours, snap))
+
+    valid_tasks = [task for task in tasks if task is not None]
+    if processes == 1:
+        palettes = list(map(_palette_worker, valid_tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            palettes = list(executor.map(_palette_worker, valid_tasks, chunksize=16))
+    palettes = iter(palettes)
+    return [next(palettes) if task is not None else None for task in tasks]
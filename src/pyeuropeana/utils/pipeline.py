@@ -0,0 +1,277 @@
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from multiprocessing import Pool
+from typing import Callable, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import requests
+
+from .auth import get_api_key
+from .edm_utils import RECORD_COLUMNS, process_CHO_record, to_categorical
+from .img_utils import POLICIES, bytes2img, download, img2array
+
+RECORD_ENDPOINT = "https://api.europeana.eu/record/v2"
+
+
+def fetch_bytes(
+    url: str, params: Optional[dict] = None, timeout: Union[int, float] = 10
+) -> bytes:
+    """
+    Returns the raw body of a GET request, leaving its decoding to the CPU stage
+    """
+    return requests.get(url, params=params, timeout=timeout).content
+
+
+def record_bytes2row(data: bytes) -> dict:
+    """
+    Decodes the raw body of a Record API response into a row as returned by process_CHO_record
+    """
+    response = json.loads(data)
+    if not response.get("success"):
+        raise ValueError(response.get("error"))
+    return process_CHO_record(response)
+
+
+def image_bytes2array(
+    data: bytes, size: Tuple[int, int] = (224, 224), policy: str = "resize"
+) -> np.ndarray:
+    """
+    Decodes an encoded image into an uint8 array of shape (height, width, 3), see urls2batch
+    """
+    fetch_size = (2 * max(size),) * 2 if policy == "crop" else size
+    return img2array(bytes2img(data, fetch_size), size, policy)
+
+
+def _fetch(fetch, errors, url):
+    try:
+        return fetch(url)
+    except Exception:
+        if errors == "raise":
+            raise
+        return None
+
+
+def _transform(args):
+    transform, data, errors = args
+    if data is None:
+        return None
+    try:
+        return transform(data)
+    except Exception:
+        if errors == "raise":
+            raise
+        return None
+
+
+def _windowed(executor, fn, items, window):
+    """
+    Yields the results of fn over the items in order, submitting them to the executor
+    at most window items ahead of the results consumed
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def run_pipeline(
+    urls: Iterable[str],
+    transform: Callable[[bytes], object],
+    fetch: Callable[[str], bytes] = fetch_bytes,
+    threads: int = 16,
+    processes: Optional[int] = None,
+    chunksize: int = 16,
+    errors: str = "raise",
+    window: Optional[int] = None,
+) -> Iterator:
+    """
+
+    Fetches URLs in a pool of threads and transforms the responses in a pool of processes,
+    so that downloads and CPU-bound processing overlap and use all the cores
+
+    Only the raw bytes of the responses cross the process boundary, which is much cheaper
+    to pickle than decoded dicts. Results are yielded in the order of the URLs as they
+    become available. Fetching only runs a bounded number of URLs ahead of the results
+    consumed, so memory does not grow with the number of URLs when the consumer is slower.
+
+    >>> import pyeuropeana.utils as utils
+    >>> from pyeuropeana.utils.pipeline import image_bytes2array
+    >>> arrays = list(utils.run_pipeline(urls, image_bytes2array, errors = 'skip'))
+
+    Args:
+      urls (:obj:`list` of :obj:`str`)
+        URLs to fetch. Any iterable is accepted.
+
+      transform (:obj:`callable`)
+        Function taking the raw bytes of a response. It must be picklable,
+        that is defined at the top level of a module or a :obj:`functools.partial` of one.
+
+      fetch (:obj:`callable`, optional)
+        Function taking a URL and returning the bytes of the response. Defaults to a GET request.
+
+      threads (:obj:`int`, optional)
+        Number of concurrent requests. Defaults to 16.
+
+      processes (:obj:`int`, optional)
+        Number of worker processes. Defaults to the number of CPUs. With 1 the responses
+        are transformed in the calling process.
+
+      chunksize (:obj:`int`, optional)
+        Number of responses sent to a worker at once. Defaults to 16.
+
+      errors (:obj:`str`, optional)
+        If "raise", failed requests and transformations raise an exception. If "skip",
+        None is yielded in their place. Defaults to "raise".
+
+      window (:obj:`int`, optional)
+        Maximum number of URLs fetched ahead of the results consumed, at each of the fetching
+        and transforming stages. Defaults to 4 times threads, and is at least chunksize.
+
+    Returns: :obj:`generator`
+      The result of the transform for each URL
+
+    """
+    if errors not in ("raise", "skip"):
+        raise ValueError('errors must be either "raise" or "skip"')
+    window = window or 4 * threads
+    if processes == 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            responses = _windowed(
+                executor, partial(_fetch, fetch, errors), urls, window
+            )
+            yield from map(
+                _transform, ((transform, data, errors) for data in responses)
+            )
+        return
+
+    # a chunk is only sent to the workers once complete, it must fit in the window
+    window = max(window, chunksize)
+    slots = threading.Semaphore(window)
+    stopped = threading.Event()
+
+    def tasks(responses):
+        for data in responses:
+            slots.acquire()
+            if stopped.is_set():
+                return
+            yield transform, data, errors
+
+    # the workers are forked before any fetching thread starts, so that they
+    # cannot inherit locks held by those threads
+    with Pool(processes) as pool:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            responses = _windowed(
+                executor, partial(_fetch, fetch, errors), urls, window
+            )
+            # the pool consumes the tasks from a background thread, so that responses
+            # are handed to the workers as soon as they arrive, up to window of them
+            # ahead of the consumer
+            try:
+                for result in pool.imap(_transform, tasks(responses), chunksize):
+                    slots.release()
+                    yield result
+            finally:
+                # unblocks the task thread if the consumer stopped early
+                stopped.set()
+                for _ in range(window):
+                    slots.release()
+
+
+def harvest_records(
+    record_ids: Iterable[str],
+    threads: int = 16,
+    processes: Optional[int] = None,
+    errors: str = "skip",
+    categorical: bool = False,
+) -> pd.DataFrame:
+    """
+
+    Retrieves many records from the Record API [1] and processes them into a dataframe,
+    with the same columns as utils.records2df, using run_pipeline
+
+    >>> import pyeuropeana.utils as utils
+    >>> df = utils.harvest_records(ids, threads = 32)
+
+    Args:
+      record_ids (:obj:`list` of :obj:`str`)
+        Europeana IDs of the records
+
+      threads (:obj:`int`, optional)
+        Number of concurrent requests. Defaults to 16.
+
+      processes (:obj:`int`, optional)
+        Number of worker processes. Defaults to the number of CPUs.
+
+      errors (:obj:`str`, optional)
+        If "skip", records that cannot be retrieved or processed are left out.
+        If "raise", they raise an exception. Defaults to "skip".
+
+      categorical (:obj:`bool`, optional)
+        If True, the columns with few distinct values are stored as pandas categoricals,
+        see utils.to_categorical. Defaults to False.
+
+    Returns: :obj:`pd.DataFrame`
+      Dataframe with one row per record
+
+    References:
+      1. https://pro.europeana.eu/page/record
+
+    """
+    fetch = partial(fetch_bytes, params={"wskey": get_api_key()})
+    urls = (f"{RECORD_ENDPOINT}{record_id}.json" for record_id in record_ids)
+    rows = run_pipeline(
+        urls,
+        record_bytes2row,
+        fetch=fetch,
+        threads=threads,
+        processes=processes,
+        errors=errors,
+    )
+    df = pd.DataFrame([row for row in rows if row is not None], columns=RECORD_COLUMNS)
+    return to_categorical(df) if categorical else df
+
+
+def harvest_images(
+    urls: Iterable[str],
+    size: Tuple[int, int] = (224, 224),
+    policy: str = "resize",
+    threads: int = 16,
+    processes: Optional[int] = None,
+    timeout: Union[int, float] = 10,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+
+    Same as utils.urls2batch, but decoding the images in a pool of processes
+    instead of the downloading threads
+
+    Returns: :obj:`tuple` of :obj:`numpy.ndarray`
+      The batch, of shape (N, height, width, 3), and a boolean mask of shape (N,) which is
+      False for the images that could not be obtained
+
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"policy must be one of {POLICIES}")
+    urls = list(urls)
+    width, height = size
+    batch = np.zeros((len(urls), height, width, 3), dtype=np.uint8)
+    mask = np.zeros(len(urls), dtype=bool)
+    arrays = run_pipeline(
+        urls,
+        partial(image_bytes2array, size=size, policy=policy),
+        fetch=partial(download, timeout=timeout),
+        threads=threads,
+        processes=processes,
+        errors="skip",
+    )
+    for index, array in enumerate(arrays):
+        if array is not None:
+            batch[index] = array
+            mask[index] = True
+    return batch, mask
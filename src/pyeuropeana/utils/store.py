@@ -0,0 +1,386 @@
+import json
+import re
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+from .edm_utils import get_value_lang
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    europeana_id TEXT PRIMARY KEY,
+    timestamp_update TEXT,
+    type TEXT,
+    country TEXT,
+    language TEXT,
+    rights TEXT,
+    provider TEXT,
+    data_provider TEXT,
+    dataset_name TEXT,
+    has_media INTEGER NOT NULL DEFAULT 0,
+    has_thumbnail INTEGER NOT NULL DEFAULT 0,
+    data BLOB NOT NULL,
+    record BLOB
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    query_key TEXT PRIMARY KEY,
+    mark TEXT NOT NULL,
+    synced_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS items_timestamp_update ON items (timestamp_update);
+CREATE INDEX IF NOT EXISTS items_type ON items (type);
+CREATE INDEX IF NOT EXISTS items_country ON items (country);
+CREATE INDEX IF NOT EXISTS items_rights ON items (rights);
+CREATE INDEX IF NOT EXISTS items_provider ON items (provider);
+CREATE INDEX IF NOT EXISTS items_data_provider ON items (data_provider);
+"""
+
+COLUMNS = (
+    "europeana_id",
+    "timestamp_update",
+    "type",
+    "country",
+    "language",
+    "rights",
+    "provider",
+    "data_provider",
+    "dataset_name",
+    "has_media",
+    "has_thumbnail",
+)
+
+# qf fields of the Search API answered by the store, and their columns
+QF_COLUMNS = {
+    "TYPE": "type",
+    "COUNTRY": "country",
+    "LANGUAGE": "language",
+    "RIGHTS": "rights",
+    "PROVIDER": "provider",
+    "DATA_PROVIDER": "data_provider",
+    "edm_datasetName": "dataset_name",
+    "europeana_id": "europeana_id",
+}
+
+QF_PATTERN = re.compile(r'^\s*(\w+):(?:"([^"]*)"|(\S+))\s*$')
+
+# rights statements of each reusability value of the Search API [1], matched as substrings
+# 1. https://pro.europeana.eu/page/search#reusability
+REUSABILITY = {
+    "open": (
+        "creativecommons.org/publicdomain/mark/",
+        "creativecommons.org/publicdomain/zero/",
+        "creativecommons.org/licenses/by/",
+        "creativecommons.org/licenses/by-sa/",
+    ),
+    "restricted": (
+        "creativecommons.org/licenses/by-nc/",
+        "creativecommons.org/licenses/by-nc-sa/",
+        "creativecommons.org/licenses/by-nc-nd/",
+        "creativecommons.org/licenses/by-nd/",
+        "rightsstatements.org/vocab/NoC-NC/",
+        "rightsstatements.org/vocab/NoC-OKLR/",
+        "rightsstatements.org/vocab/InC-EDU/",
+    ),
+    "permission": (
+        "rightsstatements.org/vocab/InC/",
+        "rightsstatements.org/vocab/InC-OW-EU/",
+        "rightsstatements.org/vocab/CNE/",
+    ),
+}
+
+
+class LocalStore:
+    """
+    Local mirror of items from the Search API and records from the Record API,
+    kept in a SQLite file and queried without network access
+
+    Items are stored compressed and keyed by Europeana ID, so that writing an item again
+    replaces the previous version. The type, country, language, rights, provider and data
+    provider are kept in indexed columns, which :meth:`search` filters on. The store also
+    keeps the high-water mark of every query synchronised with apis.sync.
+
+    >>> import pyeuropeana.apis as apis
+    >>> import pyeuropeana.utils as utils
+    >>> store = utils.LocalStore('mirror.sqlite')
+    >>> apis.sync(store, query = '*', qf = 'DATA_PROVIDER:"Museum Boerhaave"')
+    >>> resp = store.search(qf = 'TYPE:IMAGE', reusability = 'open', thumbnail = True)
+    >>> df = utils.search2df(resp)
+
+    Args:
+      path (:obj:`str` or :obj:`pathlib.Path`, optional)
+        Location of the SQLite file. Defaults to ":memory:", a non persistent store.
+    """
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def add_items(self, items: Iterable[dict], mark: Optional[tuple] = None) -> int:
+        """
+        Stores items from the Search API in a single transaction, replacing previous
+        versions. When mark is a (query_key, value) tuple, the high-water mark of the query
+        is updated in the same transaction. Returns the number of items stored.
+        """
+        rows = [_item_columns(item) + (_encode(item),) for item in items]
+        with self._lock, self._conn:
+            self._upsert(COLUMNS + ("data",), rows)
+            if mark is not None:
+                self._set_mark(*mark)
+        return len(rows)
+
+    def add_records(self, responses: Iterable[dict]) -> int:
+        """
+        Stores responses of apis.record in a single transaction. Records of items not
+        yet in the store are also stored as items with the fields of the Search API.
+        Returns the number of records stored.
+        """
+        rows = []
+        for response in responses:
+            obj = response["object"] if "object" in response else response
+            item = _record2item(obj)
+            rows.append(_item_columns(item) + (_encode(item), _encode(obj)))
+        with self._lock, self._conn:
+            # items from the Search API are richer than those built from records, keep them
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO items (europeana_id, data) VALUES (?, ?)",
+                [(row[0], row[-2]) for row in rows],
+            )
+            self._upsert(COLUMNS + ("record",), [row[:-2] + row[-1:] for row in rows])
+        return len(rows)
+
+    def _upsert(self, columns, rows):
+        """
+        Inserts rows, or updates the given columns of the existing ones, which preserves
+        the other columns unlike INSERT OR REPLACE
+        """
+        update = (
+            "UPDATE items SET "
+            + ", ".join(f"{column} = ?" for column in columns[1:])
+            + " WHERE europeana_id = ?"
+        )
+        insert = (
+            f"INSERT INTO items ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})"
+        )
+        for row in rows:
+            if self._conn.execute(update, row[1:] + row[:1]).rowcount == 0:
+                self._conn.execute(insert, row)
+
+    def get(self, europeana_id: str) -> Optional[dict]:
+        """
+        Returns the stored item with the given Europeana ID, or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM items WHERE europeana_id = ?", (europeana_id,)
+            ).fetchone()
+        return _decode(row[0]) if row else None
+
+    def record(self, europeana_id: str) -> Optional[dict]:
+        """
+        Returns the stored record in the form of apis.record, or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM items WHERE europeana_id = ?", (europeana_id,)
+            ).fetchone()
+        if not row or row[0] is None:
+            return None
+        return {"success": True, "object": _decode(row[0])}
+
+    def items(self) -> Iterator[dict]:
+        """
+        Iterates over all the stored items
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM items").fetchall()
+        for (data,) in rows:
+            yield _decode(data)
+
+    def search(self, **kwargs) -> dict:
+        """
+        Answers a query of apis.search from the stored items. The output has the
+        same form, so that it can be passed to utils.search2df.
+
+        Args:
+          query (:obj:`str`,optional)
+            Only "*" is supported. Defaults to "*".
+          qf (:obj:`str` or :obj:`list` of :obj:`str`,optional)
+            Refinements of the form FIELD:value or FIELD:"value" on the fields TYPE, COUNTRY,
+            LANGUAGE, RIGHTS, PROVIDER, DATA_PROVIDER, edm_datasetName and europeana_id.
+            A * in the value matches any characters.
+          reusability (:obj:`str`,optional)
+            open, restricted or permission, or several of them separated by commas or AND
+          media (:obj:`bool`,optional)
+            Filter by items with a link to the media file in edm:isShownBy or edm:hasView
+          thumbnail (:obj:`bool`,optional)
+            Filter by items with a thumbnail in edm:preview
+          rows (:obj:`int`,optional)
+            Maximum number of items returned. Defaults to all of them.
+          start (:obj:`int`,optional)
+            Number of matching items to skip. Defaults to 0.
+
+        Returns: :obj:`dict`
+          Response with the items and the totalResults
+        """
+        if kwargs.get("query", "*") not in ("*", "*:*", None):
+            raise ValueError("only query = '*' can be answered locally")
+        conditions, args = _conditions(kwargs)
+        rows = kwargs.get("rows")
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM items{where}", args
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT data FROM items{where} ORDER BY europeana_id LIMIT ? OFFSET ?",
+                args + [-1 if rows is None else rows, kwargs.get("start", 0)],
+            ).fetchall()
+        items = [_decode(data) for (data,) in rows]
+        return {
+            "success": True,
+            "itemsCount": len(items),
+            "totalResults": total,
+            "items": items,
+            "params": kwargs,
+        }
+
+    def get_mark(self, query_key: str) -> Optional[str]:
+        """
+        Returns the high-water mark, the greatest timestamp_update synchronised for a query, or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mark FROM sync_state WHERE query_key = ?", (query_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_mark(self, query_key: str, mark: str):
+        with self._lock, self._conn:
+            self._set_mark(query_key, mark)
+
+    def _set_mark(self, query_key, mark):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sync_state (query_key, mark) VALUES (?, ?)",
+            (query_key, mark),
+        )
+
+    def __contains__(self, europeana_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM items WHERE europeana_id = ?", (europeana_id,)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _first(values):
+    if isinstance(values, dict):
+        values = values.get("def") or next(iter(values.values()), None)
+    if isinstance(values, list):
+        return values[0] if values else None
+    return values
+
+
+def _item_columns(item):
+    return (
+        item["id"],
+        item.get("timestamp_update"),
+        item.get("type"),
+        _first(item.get("country")),
+        _first(item.get("language")),
+        _first(item.get("rights")),
+        _first(item.get("provider")),
+        _first(item.get("dataProvider")),
+        _first(item.get("edmDatasetName")),
+        int(bool(item.get("edmIsShownBy") or item.get("hasView"))),
+        int(bool(item.get("edmPreview"))),
+    )
+
+
+def _record2item(obj):
+    """
+    Builds an item with the fields of the Search API from a Record API object
+    """
+    aggregation = (obj.get("aggregations") or [{}])[0]
+    europeana_aggregation = obj.get("europeanaAggregation") or {}
+    item = {
+        "id": obj["about"],
+        "type": obj.get("type"),
+        "timestamp_update": obj.get("timestamp_update"),
+        "edmDatasetName": obj.get("edmDatasetName"),
+        "country": europeana_aggregation.get("edmCountry", {}).get("def"),
+        "language": europeana_aggregation.get("edmLanguage", {}).get("def"),
+        "rights": aggregation.get("edmRights", {}).get("def"),
+        "provider": [_first(aggregation.get("edmProvider"))],
+        "dataProvider": [_first(aggregation.get("edmDataProvider"))],
+        "edmIsShownBy": [aggregation["edmIsShownBy"]]
+        if aggregation.get("edmIsShownBy")
+        else None,
+        "hasView": aggregation.get("hasView"),
+        "edmPreview": [europeana_aggregation["edmPreview"]]
+        if europeana_aggregation.get("edmPreview")
+        else None,
+    }
+    for proxy in reversed(obj.get("proxies") or []):
+        if proxy.get("dcTitle"):
+            title_lang = {lang: values[0] for lang, values in proxy["dcTitle"].items()}
+            item["title"] = [get_value_lang(title_lang)]
+            item["dcTitleLangAware"] = proxy["dcTitle"]
+            break
+    return {key: value for key, value in item.items() if value is not None}
+
+
+def _conditions(kwargs):
+    conditions = []
+    args = []
+    qf = kwargs.get("qf") or []
+    for refinement in [qf] if isinstance(qf, str) else qf:
+        match = QF_PATTERN.match(refinement)
+        if not match or match.group(1) not in QF_COLUMNS:
+            raise ValueError(f"qf {refinement!r} cannot be answered locally")
+        column = QF_COLUMNS[match.group(1)]
+        value = match.group(2) if match.group(2) is not None else match.group(3)
+        if "*" in value:
+            conditions.append(f"{column} LIKE ? ESCAPE '\\'")
+            value = re.sub(r"([%_\\])", r"\\\1", value).replace("*", "%")
+        else:
+            conditions.append(f"{column} = ?")
+        args.append(value)
+
+    if kwargs.get("reusability"):
+        patterns = []
+        for value in re.split(r"\s*,\s*|\s+AND\s+|\s+", kwargs["reusability"].strip()):
+            if value.lower() not in REUSABILITY:
+                raise ValueError(f"unknown reusability {value!r}")
+            patterns += REUSABILITY[value.lower()]
+        conditions.append(
+            "(" + " OR ".join("instr(rights, ?) > 0" for _ in patterns) + ")"
+        )
+        args += patterns
+
+    for name, column in (("media", "has_media"), ("thumbnail", "has_thumbnail")):
+        if kwargs.get(name) is not None:
+            conditions.append(f"{column} = ?")
+            args.append(int(bool(kwargs[name])))
+    return conditions, args
+
+
+def _encode(obj):
+    return zlib.compress(json.dumps(obj, separators=(",", ":")).encode())
+
+
+def _decode(data):
+    return json.loads(zlib.decompress(data))
@@ -0,0 +1,117 @@
+import os
+import unittest
+from unittest import mock
+
+import requests
+
+from pyeuropeana.apis import EuropeanaClient
+from pyeuropeana.utils.auth import KeyPool
+from pyeuropeana.utils.edm_utils import cursor_search
+
+
+def fake_response(body, headers=None, status_code=200):
+    response = mock.Mock(status_code=status_code, headers=headers or {})
+    response.json.return_value = body
+    return response
+
+
+class TestEuropeanaClient(unittest.TestCase):
+    def test_api_key_read_once(self):
+        with mock.patch.dict(os.environ, {"EUROPEANA_API_KEY": "env key"}):
+            client = EuropeanaClient()
+        self.assertEqual(client.api_key, "env key")
+        self.assertEqual(EuropeanaClient(api_key="tenant").api_key, "tenant")
+
+    def test_record_uses_client_configuration(self):
+        body = {"success": True, "object": {"about": "/1/a"}}
+        clients = [EuropeanaClient(api_key=key, cache={}) for key in ("a", "b")]
+        with mock.patch("requests.get") as requests_get:
+            for client in clients:
+                with mock.patch.object(client.session, "get") as get:
+                    get.return_value = fake_response(body, {"ETag": '"v1"'})
+                    self.assertEqual(client.record("/1/a"), body)
+                self.assertEqual(get.call_args[1]["params"]["wskey"], client.api_key)
+                self.assertEqual(len(client.cache), 1)
+        requests_get.assert_not_called()
+
+    def test_timeout_and_namespaces(self):
+        client = EuropeanaClient(api_key="key", timeout=(1, 5))
+        with mock.patch.object(client.session, "get") as get:
+            get.return_value = fake_response({"items": []})
+            client.entity.suggest(text="leonardo")
+            self.assertEqual(get.call_args[1]["timeout"], (1, 5))
+            client.iiif.fulltext(RECORD_ID="/1/a", FULLTEXT_ID="b", timeout=2)
+            self.assertEqual(get.call_args[1]["timeout"], 2)
+
+    def test_limiter(self):
+        limiter = mock.Mock()
+        client = EuropeanaClient(api_key="key", limiter=limiter)
+        with mock.patch("requests.Session.request") as request:
+            request.return_value = fake_response({"items": []})
+            client.entity.suggest(text="leonardo")
+            client.entity.resolve("http://dbpedia.org/resource/Leonardo_da_Vinci")
+        self.assertEqual(limiter.acquire.call_count, 2)
+        self.assertEqual(request.call_count, 2)
+
+
+class TestKeyRotation(unittest.TestCase):
+    def test_requests_spread_across_keys(self):
+        client = EuropeanaClient(api_key=["a", "b"])
+        with mock.patch("requests.Session.request") as request:
+            request.return_value = fake_response({"items": []})
+            for _ in range(4):
+                client.entity.suggest(text="leonardo")
+        keys = [c[0][2]["wskey"] for c in request.call_args_list]
+        self.assertEqual(keys, ["a", "b", "a", "b"])
+        self.assertEqual(client.keys.usage(), {"a": 2, "b": 2})
+
+    def test_quota_moves_to_next_key(self):
+        keys = KeyPool(["a", "b"], backoff=60)
+        client = EuropeanaClient(api_key=keys)
+        answers = {
+            "a": fake_response({}, {"Retry-After": "30"}, status_code=429),
+            "b": fake_response({"items": []}),
+        }
+        with mock.patch("requests.Session.request") as request:
+            request.side_effect = lambda method, url, params, **kwargs: answers[
+                params["wskey"]
+            ]
+            with mock.patch("time.monotonic", return_value=0):
+                self.assertEqual(client.entity.suggest(text="x"), {"items": []})
+                self.assertEqual(client.entity.suggest(text="x"), {"items": []})
+        keys = [c[0][2]["wskey"] for c in request.call_args_list]
+        # the exhausted key is not used again until its Retry-After has passed
+        self.assertEqual(keys, ["a", "b", "b"])
+
+    def test_waits_respect_deadline(self):
+        keys = KeyPool(["a", "b"])
+        client = EuropeanaClient(api_key=keys, limiter=1)
+        with mock.patch("requests.Session.request") as request:
+            with mock.patch("time.sleep") as sleep:
+                keys.exhausted("a")
+                keys.exhausted("b")
+                with self.assertRaises(requests.Timeout):
+                    cursor_search(
+                        "https://api.europeana.eu/record/v2/search.json",
+                        {"wskey": "a", "cursor": "*", "rows": 10},
+                        deadline=30,
+                        session=client.session,
+                    )
+                # a free key, but the rate limit would wait past the deadline
+                keys.success("a")
+                keys._available["a"] = 0
+                client.session.limiter.acquire()
+                with self.assertRaises(requests.Timeout):
+                    cursor_search(
+                        "https://api.europeana.eu/record/v2/search.json",
+                        {"wskey": "a", "cursor": "*", "rows": 10},
+                        deadline=0.5,
+                        session=client.session,
+                    )
+        # only the retries of get wait, within the deadline, never for the keys or limiter
+        self.assertLess(sum(c[0][0] for c in sleep.call_args_list), 30)
+        request.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,11 @@
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
 import pytest
+import requests
 
 import pyeuropeana.apis as apis
 
@@ -34,5 +40,181 @@ class TestEntity(unittest.TestCase):
         self.assertTrue("input uri must be a string" in str(context.exception))
 
 
+class TestResolveMany(unittest.TestCase):
+    def fake_resolve(self, uri, timeout=None, client=None):
+        self.calls.append(uri)
+        if uri == "http://unknown":
+            raise ValueError("No entity found")
+        if uri == "http://down":
+            raise requests.ConnectionError("connection refused")
+        return {"id": "http://data.europeana.eu/agent/base/146741"}
+
+    def setUp(self):
+        self.calls = []
+        patcher = mock.patch.object(apis.entity, "resolve", self.fake_resolve)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_input(self):
+        with self.assertRaises(ValueError) as context:
+            apis.entity.resolve_many("http://dbpedia.org/resource/Leonardo_da_Vinci")
+        self.assertTrue("uris must be a list of strings" in str(context.exception))
+
+    def test_deduplication_and_errors(self):
+        uris = ["http://known", "http://unknown", "http://known", "http://down"]
+        resp = apis.entity.resolve_many(uris)
+        self.assertEqual(list(resp), ["http://known", "http://unknown", "http://down"])
+        self.assertEqual(sorted(self.calls), sorted(set(uris)))
+        self.assertIsNone(resp["http://known"]["error"])
+        self.assertEqual(resp["http://unknown"]["error"], "No entity found")
+        self.assertIsNone(resp["http://down"]["result"])
+
+    def test_memoization(self):
+        cache = {}
+        apis.entity.resolve_many(
+            ["http://known", "http://unknown", "http://down"], cache=cache
+        )
+        self.assertEqual(set(cache), {"http://known", "http://unknown"})
+        self.calls = []
+        apis.entity.resolve_many(
+            ["http://known", "http://unknown", "http://down"], cache=cache
+        )
+        self.assertEqual(self.calls, ["http://down"])
+
+
+class TestResolveErrors(unittest.TestCase):
+    def answer(self, status_code, body):
+        response = mock.Mock(status_code=status_code)
+        response.json.return_value = body
+        return response
+
+    def test_transient_errors_are_not_memoized(self):
+        answers = {
+            "http://limited": self.answer(429, {"success": False, "error": "Too many"}),
+            "http://down": self.answer(
+                503, {"success": False, "error": "Service unavailable"}
+            ),
+            "http://unknown": self.answer(
+                404, {"success": False, "error": "No entity found"}
+            ),
+            "http://known": self.answer(200, {"id": "http://data.europeana.eu/a/1"}),
+        }
+        cache = {}
+        with mock.patch("pyeuropeana.apis.entity.get_api_key", return_value="key"):
+            with mock.patch(
+                "requests.get",
+                side_effect=lambda url, params, **kwargs: answers[params["uri"]],
+            ):
+                resp = apis.entity.resolve_many(list(answers), cache=cache)
+        self.assertEqual(set(cache), {"http://unknown", "http://known"})
+        self.assertIn("429", resp["http://limited"]["error"])
+        self.assertIn("503", resp["http://down"]["error"])
+        self.assertEqual(resp["http://unknown"]["error"], "No entity found")
+
+
+class TestSuggester(unittest.TestCase):
+    items = [
+        {"id": "1", "prefLabel": {"en": "Leonardo da Vinci"}},
+        {"id": "2", "prefLabel": {"en": "Leonor Fini"}},
+        {"id": "3", "prefLabel": {"en": "Leon Battista Alberti"}},
+    ]
+
+    def fake_suggest(self, text, TYPE, language):
+        self.calls.append(text)
+        return {"items": self.items, "total": 3}
+
+    def setUp(self):
+        self.calls = []
+        patcher = mock.patch.object(apis.entity, "suggest", self.fake_suggest)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cache_and_prefix_filtering(self):
+        suggester = apis.entity.Suggester(debounce=0)
+        resp = suggester.suggest("Leo")
+        self.assertEqual(len(resp["items"]), 3)
+        resp = suggester.suggest("leono")
+        self.assertEqual([item["id"] for item in resp["items"]], ["2"])
+        resp = suggester.suggest("leo  da")
+        self.assertEqual([item["id"] for item in resp["items"]], ["1"])
+        self.assertEqual(self.calls, ["leo"])
+
+    def test_incomplete_results_are_not_filtered(self):
+        suggester = apis.entity.Suggester(debounce=0, page_size=3)
+        suggester.suggest("leo")
+        suggester.suggest("leon")
+        self.assertEqual(self.calls, ["leo", "leon"])
+
+    def test_errors_are_not_cached(self):
+        suggester = apis.entity.Suggester(debounce=0)
+        error = {"success": False, "error": "Too many requests"}
+        with mock.patch.object(apis.entity, "suggest", return_value=error):
+            self.assertEqual(suggester.suggest("le"), error)
+        # the longer query is sent instead of being answered from the error
+        self.assertEqual(len(suggester.suggest("leonardo")["items"]), 3)
+        self.assertEqual(self.calls, ["leonardo"])
+
+    def test_superseded_query(self):
+        suggester = apis.entity.Suggester(debounce=0.2)
+        results = {}
+        first = threading.Thread(
+            target=lambda: results.update(first=suggester.suggest("le", session=1))
+        )
+        first.start()
+        time.sleep(0.05)
+        results["second"] = suggester.suggest("leo", session=1)
+        first.join()
+        self.assertIsNone(results["first"])
+        self.assertEqual(len(results["second"]["items"]), 3)
+        self.assertEqual(self.calls, ["leo"])
+
+    def test_queries_of_other_sessions_are_kept(self):
+        suggester = apis.entity.Suggester(debounce=0.2, max_size=2)
+        results = {}
+        threads = [
+            threading.Thread(
+                target=lambda text=text, session=session: results.update(
+                    {text: suggester.suggest(text, session=session)}
+                )
+            )
+            for text, session in (("rome", None), ("paris", None), ("leo", 1))
+        ]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        results["leon"] = suggester.suggest("leon", session=2)
+        for thread in threads:
+            thread.join()
+        self.assertTrue(all(result is not None for result in results.values()))
+        for session in range(3, 6):
+            suggester.suggest("leonardo", session=session)
+        self.assertEqual(len(suggester._generations), 2)
+
+
+class TestRetrieveCoalescing(unittest.TestCase):
+    def test_concurrent_calls_share_request(self):
+        def slow_get(url, params, **kwargs):
+            time.sleep(0.1)
+            response = mock.Mock()
+            response.json.return_value = {"id": url}
+            return response
+
+        with mock.patch("pyeuropeana.apis.entity.get_api_key", return_value="key"):
+            with mock.patch("requests.get", side_effect=slow_get) as get:
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    futures = [
+                        executor.submit(
+                            apis.entity.retrieve, TYPE="agent", IDENTIFIER=i
+                        )
+                        for i in (3, 3, "3", 4)
+                    ]
+                    responses = [future.result() for future in futures]
+        self.assertEqual(get.call_count, 2)
+        self.assertIs(responses[0], responses[2])
+        self.assertEqual(
+            responses[3], {"id": "https://api.europeana.eu/entity/agent/base/4.json"}
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
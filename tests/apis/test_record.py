@@ -1,8 +1,16 @@
+import json
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
 import pytest
 
 from pyeuropeana.apis import record
 
+DATA_DIR = Path(__file__).parent.parent / "data"
+
 
 @pytest.mark.skip(reason="needs further work/data mocks because of API calls")
 class TestRecord(unittest.TestCase):
@@ -31,5 +39,72 @@ class TestRecord(unittest.TestCase):
         self.assertTrue("Not valid Europeana id" in str(context.exception))
 
 
+class TestRecordFields(unittest.TestCase):
+    def test_fields(self):
+        payload = json.loads((DATA_DIR / "record.json").read_text())
+        with mock.patch("pyeuropeana.apis.record.get_api_key", return_value="key"):
+            with mock.patch("requests.get") as get:
+                get.return_value.json.return_value = payload
+                response = record(
+                    "/79/resource_document_museumboerhaave_V35167",
+                    fields=["aggregations.edmRights"],
+                )
+        self.assertTrue(response["success"])
+        self.assertEqual(
+            response["object"],
+            {
+                "about": "/79/resource_document_museumboerhaave_V35167",
+                "aggregations": [
+                    {
+                        "edmRights": {
+                            "def": ["http://creativecommons.org/publicdomain/mark/1.0/"]
+                        }
+                    }
+                ],
+            },
+        )
+
+
+class TestRecordCoalescing(unittest.TestCase):
+    def test_concurrent_calls_share_request(self):
+        payload = json.loads((DATA_DIR / "record.json").read_text())
+
+        def slow_get(url, params, **kwargs):
+            time.sleep(0.1)
+            response = mock.Mock()
+            response.json.return_value = payload
+            return response
+
+        record_id = "/79/resource_document_museumboerhaave_V35167"
+        with mock.patch("pyeuropeana.apis.record.get_api_key", return_value="key"):
+            with mock.patch("requests.get", side_effect=slow_get) as get:
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    futures = [executor.submit(record, record_id) for _ in range(3)]
+                    futures.append(executor.submit(record, record_id, fields=["type"]))
+                    responses = [future.result() for future in futures]
+        self.assertEqual(get.call_count, 1)
+        self.assertIs(responses[0], responses[1])
+        self.assertEqual(responses[3]["object"], {"about": record_id, "type": "IMAGE"})
+        # projecting for one caller does not alter the shared response
+        self.assertIn("proxies", responses[0]["object"])
+
+
+class TestRecordCache(unittest.TestCase):
+    def test_not_modified(self):
+        payload = json.loads((DATA_DIR / "record.json").read_text())
+        record_id = "/79/resource_document_museumboerhaave_V35167"
+        cache = {}
+        with mock.patch("pyeuropeana.apis.record.get_api_key", return_value="key"):
+            with mock.patch("requests.get") as get:
+                get.return_value.status_code = 200
+                get.return_value.headers = {"ETag": '"abc"'}
+                get.return_value.json.return_value = payload
+                record(record_id, cache=cache)
+                get.return_value = mock.Mock(status_code=304)
+                response = record(record_id, cache=cache)
+        self.assertEqual(response, payload)
+        self.assertEqual(get.call_args[1]["headers"]["If-None-Match"], '"abc"')
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,7 +1,12 @@
+import collections
+import re
 import unittest
+from unittest import mock
+
 import pytest
 
-from pyeuropeana.apis import search
+from pyeuropeana.apis import facets, search
+from pyeuropeana.apis.search import plan_search
 
 
 @pytest.mark.skip(reason="needs further work/data mocks because of API calls")
@@ -15,6 +20,149 @@ class TestSearch(unittest.TestCase):
         self.assertTrue("No arguments passed" in str(context.exception))
 
 
+def facet_api(values):
+    """
+    Fake Search API answering the facet requests from the given values per facet
+    """
+
+    def get(endpoint, params, **kwargs):
+        facets = []
+        for name in params["facet"].split(","):
+            offset = params[f"f.{name}.facet.offset"]
+            limit = params[f"f.{name}.facet.limit"]
+            fields = values[name][offset : offset + limit]
+            facets.append({"name": name, "fields": fields})
+        response = mock.Mock()
+        response.json.return_value = {"success": True, "items": [], "facets": facets}
+        return response
+
+    return get
+
+
+class TestFacets(unittest.TestCase):
+    values = {
+        "PROVIDER": [{"label": f"provider {i}", "count": 100 - i} for i in range(5)],
+        "COUNTRY": [{"label": "Netherlands", "count": 70}],
+    }
+
+    def test_paging(self):
+        with mock.patch("pyeuropeana.apis.search.get_api_key", return_value="key"):
+            with mock.patch("requests.get", side_effect=facet_api(self.values)) as get:
+                df = facets(facet=["PROVIDER", "COUNTRY"], limit=2, qf="TYPE:IMAGE")
+        self.assertEqual(list(df.columns), ["facet", "label", "count"])
+        self.assertEqual(len(df), 6)
+        self.assertEqual(
+            list(df[df["facet"] == "PROVIDER"]["count"]), [100, 99, 98, 97, 96]
+        )
+        self.assertEqual(get.call_count, 3)
+        params = get.call_args_list[0][1]["params"]
+        self.assertEqual(params["rows"], 0)
+        self.assertEqual(params["profile"], "facets")
+        self.assertEqual(params["qf"], "TYPE:IMAGE")
+        self.assertEqual(params["facet"], "PROVIDER,COUNTRY")
+        # exhausted facets are not requested again
+        self.assertEqual(get.call_args_list[1][1]["params"]["facet"], "PROVIDER")
+
+    def test_max_values(self):
+        with mock.patch("pyeuropeana.apis.search.get_api_key", return_value="key"):
+            with mock.patch("requests.get", side_effect=facet_api(self.values)) as get:
+                df = facets(facet="PROVIDER", limit=2, offset=1, max_values=3)
+        self.assertEqual(list(df["label"]), ["provider 1", "provider 2", "provider 3"])
+        self.assertEqual(
+            get.call_args_list[1][1]["params"]["f.PROVIDER.facet.limit"], 1
+        )
+
+    def test_args(self):
+        with self.assertRaises(ValueError):
+            facets(query="*")
+
+
+class FakeSplitAPI:
+    """
+    Fake Search API over items with a DATA_PROVIDER, answering facet, count and
+    cursor requests with DATA_PROVIDER:("A" OR "B") and -DATA_PROVIDER:[* TO *] filters
+    """
+
+    def __init__(self, items):
+        self.items = items
+
+    def matches(self, item, qf):
+        if qf == "-DATA_PROVIDER:[* TO *]":
+            return item.get("provider") is None
+        values = re.findall(r'"((?:[^"\\]|\\.)*)"', qf)
+        return item.get("provider") in [v.replace('\\"', '"') for v in values]
+
+    def __call__(self, endpoint, params, **kwargs):
+        qf = params.get("qf") or []
+        items = [i for i in self.items if all(self.matches(i, q) for q in qf)]
+        body = {"success": True, "totalResults": len(items), "items": []}
+        if params.get("facet"):
+            counts = collections.Counter(
+                i["provider"] for i in items if i.get("provider")
+            )
+            offset = params["f.DATA_PROVIDER.facet.offset"]
+            limit = params["f.DATA_PROVIDER.facet.limit"]
+            fields = [{"label": k, "count": v} for k, v in counts.most_common()]
+            body["facets"] = [
+                {"name": "DATA_PROVIDER", "fields": fields[offset : offset + limit]}
+            ]
+        elif params.get("rows"):
+            start = 0 if params["cursor"] == "*" else int(params["cursor"])
+            body["items"] = [
+                {"id": i["id"]} for i in items[start : start + params["rows"]]
+            ]
+            if start + params["rows"] < len(items):
+                body["nextCursor"] = str(start + params["rows"])
+        response = mock.Mock()
+        response.json.return_value = body
+        return response
+
+
+class TestSplitSearch(unittest.TestCase):
+    def setUp(self):
+        providers = ["big"] * 250 + ["small 1"] * 30 + ['quote "2"'] * 20 + [None] * 7
+        self.api = FakeSplitAPI(
+            [{"id": f"/1/{i}", "provider": p} for i, p in enumerate(providers)]
+        )
+
+    def test_plan(self):
+        with mock.patch("pyeuropeana.apis.search.get_api_key", return_value="key"):
+            with mock.patch("requests.get", self.api):
+                plan, total = plan_search("DATA_PROVIDER", target=100, query="*")
+        self.assertEqual(total, 307)
+        self.assertEqual(
+            plan,
+            [
+                {"qf": 'DATA_PROVIDER:("big")', "expected": 250},
+                {
+                    "qf": 'DATA_PROVIDER:("small 1" OR "quote \\"2\\"")',
+                    "expected": 50,
+                },
+                {"qf": "-DATA_PROVIDER:[* TO *]", "expected": None},
+            ],
+        )
+
+    def test_split_search(self):
+        with mock.patch("pyeuropeana.apis.search.get_api_key", return_value="key"):
+            with mock.patch("requests.get", self.api):
+                response = search(query="*", split_by="DATA_PROVIDER", target=100)
+        self.assertTrue(response["complete"])
+        self.assertEqual(response["totalResults"], 307)
+        self.assertEqual(len({item["id"] for item in response["items"]}), 307)
+        self.assertEqual(
+            [(q["expected"], q["received"]) for q in response["plan"]],
+            [(250, 250), (50, 50), (7, 7)],
+        )
+
+    def test_filters_apply_to_counts(self):
+        with mock.patch("pyeuropeana.apis.search.get_api_key", return_value="key"):
+            with mock.patch("requests.get", side_effect=self.api) as get:
+                search(query="*", split_by="DATA_PROVIDER", colourpalette="#0000FF")
+        # the facet counts and totalResults select the same items as the sub-queries
+        for call in get.call_args_list[1:]:
+            self.assertEqual(call[1]["params"]["colourpalette"], "#0000FF")
+
+
 if __name__ == "__main__":
     # unittest.main()
     pass
@@ -0,0 +1,73 @@
+import re
+import unittest
+from unittest import mock
+
+from pyeuropeana.apis import sync
+from pyeuropeana.apis.sync import query_key
+from pyeuropeana.utils.store import LocalStore
+
+
+class FakeSearchAPI:
+    """
+    Answers cursor searches over a list of items, honouring timestamp_update ranges
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self.requests = []
+
+    def __call__(self, endpoint, params, **kwargs):
+        self.requests.append(dict(params))
+        items = sorted(self.items, key=lambda i: (i["timestamp_update"], i["id"]))
+        for qf in params["qf"]:
+            match = re.match(r"timestamp_update:\[(\S+) TO \*\]", qf)
+            if match:
+                items = [i for i in items if i["timestamp_update"] >= match.group(1)]
+        start = 0 if params["cursor"] == "*" else int(params["cursor"])
+        page = items[start : start + params["rows"]]
+        body = {"success": True, "items": page, "totalResults": len(items)}
+        if start + params["rows"] < len(items):
+            body["nextCursor"] = str(start + params["rows"])
+        response = mock.Mock()
+        response.json.return_value = body
+        return response
+
+
+def item(i, timestamp, title="title"):
+    return {"id": f"/1/item_{i}", "timestamp_update": timestamp, "title": [title]}
+
+
+class TestSync(unittest.TestCase):
+    def test_incremental(self):
+        api = FakeSearchAPI([item(i, f"2021-01-0{i + 1}T00:00:00Z") for i in range(5)])
+        store = LocalStore()
+        with mock.patch("pyeuropeana.apis.sync.get_api_key", return_value="key"):
+            with mock.patch("requests.get", api):
+                self.assertEqual(sync(store, query="*", qf="TYPE:IMAGE", rows=2), 5)
+                self.assertEqual(len(api.requests), 3)
+                self.assertEqual(api.requests[0]["qf"], ["TYPE:IMAGE"])
+                self.assertEqual(
+                    api.requests[0]["sort"], "timestamp_update asc,europeana_id asc"
+                )
+                key = query_key(query="*", qf="TYPE:IMAGE")
+                self.assertEqual(store.get_mark(key), "2021-01-05T00:00:00Z")
+
+                api.items[1] = item(1, "2021-02-01T00:00:00Z", title="updated")
+                api.items.append(item(5, "2021-02-02T00:00:00Z"))
+                api.requests.clear()
+                # the item at the previous mark is fetched again along with the new ones
+                self.assertEqual(sync(store, query="*", qf=["TYPE:IMAGE"], rows=2), 3)
+                self.assertEqual(
+                    api.requests[0]["qf"],
+                    ["TYPE:IMAGE", "timestamp_update:[2021-01-05T00:00:00Z TO *]"],
+                )
+
+        self.assertEqual(len(store), 6)
+        self.assertEqual(store.get("/1/item_1")["title"], ["updated"])
+        self.assertEqual(store.get_mark(key), "2021-02-02T00:00:00Z")
+
+    def test_query_key(self):
+        self.assertEqual(
+            query_key(qf=["b", "a"], rows=10), query_key(query="*", qf=["a", "b"])
+        )
+        self.assertNotEqual(query_key(qf="a"), query_key(qf="a", media=True))
@@ -0,0 +1,51 @@
+from unittest import mock
+
+import pytest
+
+from pyeuropeana.utils.auth import KeyPool
+
+
+class TestKeyPool(object):
+    def test_round_robin(self):
+        keys = KeyPool(["a", "b", "c", "a"])
+        assert len(keys) == 3
+        assert [keys.acquire() for _ in range(6)] == ["a", "b", "c"] * 2
+        assert keys.usage() == {"a": 2, "b": 2, "c": 2}
+
+    def test_rate_per_key(self):
+        keys = KeyPool(["a", "b"], rate=2)
+        with mock.patch("time.monotonic", return_value=0):
+            with mock.patch("time.sleep") as sleep:
+                assert [keys.acquire() for _ in range(4)] == ["a", "b", "a", "b"]
+        # two keys at 2 requests per second each serve 4 requests in 0.5 seconds
+        assert [c[0][0] for c in sleep.call_args_list] == [0.5, 0.5]
+
+    def test_exhausted_keys_are_left_aside(self):
+        keys = KeyPool(["a", "b"], backoff=10)
+        with mock.patch("time.monotonic", return_value=0):
+            keys.exhausted("a")
+            assert [keys.acquire() for _ in range(3)] == ["b", "b", "b"]
+        with mock.patch("time.monotonic", return_value=11):
+            assert keys.acquire() == "a"
+            # a second failure in a row doubles the time
+            keys.exhausted("a")
+        with mock.patch("time.monotonic", return_value=25):
+            assert keys.acquire() == "b"
+            keys.success("a")
+            keys.exhausted("a", retry_after=1)
+        with mock.patch("time.monotonic", return_value=32):
+            assert keys.acquire() == "a"
+
+    def test_acquire_timeout(self):
+        keys = KeyPool(["a"], rate=1)
+        with mock.patch("time.monotonic", return_value=0):
+            with mock.patch("time.sleep") as sleep:
+                assert keys.acquire(timeout=0) == "a"
+                assert keys.acquire(timeout=0.5) is None
+                assert keys.acquire(timeout=1) == "a"
+        sleep.assert_called_once_with(1)
+        assert keys.usage() == {"a": 2}
+
+    def test_no_keys(self):
+        with pytest.raises(ValueError):
+            KeyPool([])
@@ -0,0 +1,26 @@
+import pytest
+
+from pyeuropeana.utils.cache import DiskCache
+
+
+class TestDiskCache(object):
+    def test_persistence(self, tmp_path):
+        path = tmp_path / "cache.sqlite"
+        cache = DiskCache(path)
+        cache["a"] = {"result": [1, 2], "error": None}
+        cache["b"] = None
+        cache.close()
+
+        cache = DiskCache(path)
+        assert cache["a"] == {"result": [1, 2], "error": None}
+        assert "b" in cache and cache["b"] is None
+        assert "c" not in cache
+        assert len(cache) == 2
+
+    def test_missing_key(self):
+        cache = DiskCache(":memory:")
+        with pytest.raises(KeyError):
+            cache["missing"]
+        with pytest.raises(KeyError):
+            del cache["missing"]
+        assert cache.get("missing") is None
@@ -0,0 +1,72 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from pyeuropeana.utils.concurrency import RateLimiter, SingleFlight
+
+
+class TestSingleFlight(object):
+    def test_concurrent_calls_share_result(self):
+        flight = SingleFlight()
+        calls = []
+
+        def fetch(value):
+            calls.append(value)
+            time.sleep(0.1)
+            return {"value": value}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do("k", fetch, 1)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert calls == [1]
+        assert all(result is results[0] for result in results)
+        # once finished, a new call runs the function again
+        flight.do("k", fetch, 2)
+        assert calls == [1, 2]
+
+    def test_exception_is_propagated(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError("failed")
+
+        with pytest.raises(ValueError):
+            flight.do("k", fail)
+
+
+class TestRateLimiter(object):
+    def test_waits_in_turn(self):
+        with mock.patch("time.monotonic", return_value=0):
+            limiter = RateLimiter(2)
+            with mock.patch("time.sleep") as sleep:
+                for _ in range(3):
+                    limiter.acquire()
+        assert [c[0][0] for c in sleep.call_args_list] == [0.5, 1.0]
+
+    def test_refills_up_to_burst(self):
+        with mock.patch("time.monotonic", return_value=0):
+            limiter = RateLimiter(1, burst=2)
+        with mock.patch("time.monotonic", return_value=100):
+            with mock.patch("time.sleep") as sleep:
+                limiter.acquire()
+                limiter.acquire()
+                sleep.assert_not_called()
+                limiter.acquire()
+                sleep.assert_called_once_with(1)
+
+    def test_acquire_timeout(self):
+        with mock.patch("time.monotonic", return_value=0):
+            limiter = RateLimiter(2)
+            with mock.patch("time.sleep") as sleep:
+                assert limiter.acquire(timeout=0)
+                assert not limiter.acquire(timeout=0.1)
+                assert limiter.acquire(timeout=0.5)
+        sleep.assert_called_once_with(0.5)
@@ -0,0 +1,63 @@
+import json
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from pyeuropeana.utils.dumps import dump2df, edm_xml2record, read_dump
+from pyeuropeana.utils.edm_utils import process_CHO_record
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+@pytest.fixture
+def dump_path(tmp_path):
+    path = tmp_path / "79.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.write(DATA_DIR / "edm_record.xml", "79/1.xml")
+        archive.write(DATA_DIR / "record.json", "79/2.json")
+        archive.writestr("79/broken.xml", "<rdf:RDF")
+    return path
+
+
+class TestDumps(object):
+    def test_edm_xml2record_matches_record_api(self):
+        response = edm_xml2record((DATA_DIR / "edm_record.xml").read_bytes())
+        expected = json.loads((DATA_DIR / "record.json").read_text())
+        assert process_CHO_record(response) == process_CHO_record(expected)
+        obj = response["object"]
+        assert obj["proxies"][1]["europeanaProxy"] is True
+        assert obj["proxies"][0]["proxyIn"] == [
+            "/aggregation/provider/79/resource_document_museumboerhaave_V35167"
+        ]
+        assert obj["aggregations"][0]["webResources"][0]["ebucoreWidth"] == 2048
+        assert obj["concepts"][0]["prefLabel"] == {"en": ["Photograph"], "nl": ["Foto"]}
+
+    def test_read_dump(self, dump_path):
+        responses = read_dump(dump_path)
+        assert next(responses)["object"]["type"] == "IMAGE"
+        assert next(responses)["object"]["europeanaCompleteness"] == 8
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_dump2df(self, dump_path, processes):
+        with pytest.raises(Exception):
+            dump2df(dump_path, processes=processes)
+        df = dump2df(dump_path.parent, processes=processes, errors="skip")
+        assert len(df) == 2
+        assert df["title"].tolist() == ["Compound microscope"] * 2
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_empty_language_map_raises(self, tmp_path, processes):
+        record = json.loads((DATA_DIR / "record.json").read_text())
+        broken = json.loads((DATA_DIR / "record.json").read_text())
+        broken["object"]["aggregations"][0]["edmProvider"] = {}
+        path = tmp_path / "79.zip"
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("79/1.json", json.dumps(record))
+            archive.writestr("79/2.json", json.dumps(broken))
+            archive.writestr("79/3.json", json.dumps(record))
+            archive.writestr("79/4.json", json.dumps(record))
+        with pytest.raises(ValueError):
+            dump2df(path, processes=processes)
+        df = dump2df(path, processes=processes, errors="skip")
+        assert len(df) == 3
@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from pyeuropeana.utils.edm_utils import (
+    compile_fields,
+    get_value_lang,
+    process_CHO_record,
+    project,
+    records2df,
+    to_categorical,
+)
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+@pytest.fixture
+def record_response():
+    return json.loads((DATA_DIR / "record.json").read_text())
+
+
+class TestProcessCHORecord(object):
+    def test_fields(self, record_response):
+        row = process_CHO_record(record_response)
+        assert row["europeana_id"] == "/79/resource_document_museumboerhaave_V35167"
+        assert row["title"] == "Compound microscope"
+        assert row["title_lang"]["nl"] == "Samengestelde microscoop"
+        assert row["provider"] == "Digital Collections"
+        assert row["country"] == "Netherlands"
+        assert row["image_url"] == "https://images.museumboerhaave.nl/V35167.jpg"
+
+    def test_last_proxy_title_wins(self, record_response):
+        record_response["object"]["proxies"][1]["dcTitle"] = {"de": ["Mikroskop"]}
+        assert process_CHO_record(record_response)["title"] == "Mikroskop"
+
+    def test_get_value_lang(self):
+        assert get_value_lang({"nl": "a", "en": "b"}) == "b"
+        assert get_value_lang({"nl": "a", "de": "b"}) == "a"
+
+    def test_records2df(self, record_response):
+        df = records2df(iter([record_response, record_response]))
+        assert df.shape == (2, 12)
+        assert list(df["type"]) == ["IMAGE", "IMAGE"]
+        assert records2df([]).shape == (0, 12)
+
+    def test_records2df_categorical(self, record_response):
+        df = records2df([record_response] * 3, categorical=True)
+        assert df["rights"].dtype == "category"
+        assert list(df["rights"].cat.categories) == [
+            "http://creativecommons.org/publicdomain/mark/1.0/"
+        ]
+        assert df["title"].dtype == object
+        assert df.equals(records2df([record_response] * 3).pipe(to_categorical))
+        assert records2df([], categorical=True)["type"].dtype == "category"
+
+
+class TestProject(object):
+    def test_compile_fields(self):
+        assert compile_fields(["a.b", "a.c", "d"]) == {
+            "a": {"b": None, "c": None},
+            "d": None,
+        }
+        assert compile_fields(["a.b", "a"]) == {"a": None}
+        assert compile_fields(["a", "a.b"]) == {"a": None}
+
+    def test_record_paths(self, record_response):
+        obj = project(
+            record_response["object"],
+            ["aggregations.edmIsShownBy", "proxies.dcTitle.en", "type"],
+            keep=("about",),
+        )
+        assert obj == {
+            "about": "/79/resource_document_museumboerhaave_V35167",
+            "aggregations": [
+                {"edmIsShownBy": "https://images.museumboerhaave.nl/V35167.jpg"}
+            ],
+            "proxies": [{"dcTitle": {"en": ["Compound microscope"]}}, {}],
+            "type": "IMAGE",
+        }
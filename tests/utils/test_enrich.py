@@ -0,0 +1,77 @@
+from unittest import mock
+
+import pandas as pd
+import pytest
+import requests
+
+from pyeuropeana.utils import enrich
+from pyeuropeana.utils.edm_utils import entity_uri2params
+
+
+class TestEnrichEntities(object):
+    def test_entity_uri2params(self):
+        assert entity_uri2params("http://data.europeana.eu/agent/base/146741") == (
+            "agent",
+            146741,
+        )
+        assert entity_uri2params("http://data.europeana.eu/concept/48") == (
+            "concept",
+            48,
+        )
+        assert entity_uri2params("http://data.europeana.eu/item/1/abc") is None
+        assert entity_uri2params("Leonardo da Vinci") is None
+        assert entity_uri2params(None) is None
+
+    def test_distinct_lookups(self):
+        df = pd.DataFrame(
+            {
+                "concepts": [
+                    ["http://data.europeana.eu/concept/base/48", "painting"],
+                    ["http://data.europeana.eu/concept/base/48"],
+                    None,
+                ],
+                "agents": [
+                    ["http://data.europeana.eu/agent/base/146741"],
+                    None,
+                    ["http://data.europeana.eu/agent/base/146741"],
+                ],
+            }
+        )
+        responses = {
+            48: {"prefLabel": {"en": "Photograph", "es": "Fotografía"}},
+            146741: {"prefLabel": {"en": "Leonardo da Vinci"}},
+        }
+
+        def retrieve(TYPE, IDENTIFIER):
+            return responses[IDENTIFIER]
+
+        with mock.patch.object(enrich.entity, "retrieve", side_effect=retrieve) as m:
+            result = enrich.enrich_entities(df, language="es")
+        assert m.call_count == 2
+        assert result["concepts_label"][0] == ["Fotografía", None]
+        assert result["concepts_label"][2] is None
+        assert result["agents_label"][2] == ["Leonardo da Vinci"]
+        assert "places_label" not in result.columns
+        assert "concepts_label" not in df.columns
+
+    def test_cache_serves_any_language(self):
+        df = pd.DataFrame({"places": ["http://data.europeana.eu/place/base/216254"]})
+        response = {"prefLabel": {"en": "Rome", "it": "Roma"}}
+        cache = {}
+        with mock.patch.object(enrich.entity, "retrieve", return_value=response) as m:
+            result = enrich.enrich_entities(df, language="it", cache=cache)
+            assert result["places_label"].tolist() == ["Roma"]
+            result = enrich.enrich_entities(df, language="en", cache=cache)
+            assert result["places_label"].tolist() == ["Rome"]
+        assert m.call_count == 1
+
+    def test_only_request_errors_are_ignored(self):
+        df = pd.DataFrame({"places": ["http://data.europeana.eu/place/base/216254"]})
+        with mock.patch.object(
+            enrich.entity, "retrieve", side_effect=requests.ConnectionError()
+        ):
+            result = enrich.enrich_entities(df)
+        assert result["places_label"].tolist() == [None]
+        with mock.patch.dict("os.environ", clear=True):
+            with pytest.raises(Exception, match="EUROPEANA_API_KEY"):
+                enrich.enrich_entities(df)
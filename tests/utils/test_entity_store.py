@@ -0,0 +1,61 @@
+from unittest import mock
+
+from pyeuropeana.utils import entity_store
+from pyeuropeana.utils.entity_store import EntityStore
+
+LEONARDO = {
+    "id": "http://data.europeana.eu/agent/base/146741",
+    "type": "Agent",
+    "prefLabel": {"en": "Leonardo da Vinci", "it": "Leonardo da Vinci"},
+    "altLabel": {"es": ["Leonardo Da Vinci", "Da Vinci"]},
+    "sameAs": [
+        "http://dbpedia.org/resource/Leonardo_da_Vinci",
+        "http://www.wikidata.org/entity/Q762",
+    ],
+}
+ROME = {
+    "id": "http://data.europeana.eu/place/base/216254",
+    "type": "Place",
+    "prefLabel": {"en": "Rome", "it": "Roma"},
+    "sameAs": ["http://www.wikidata.org/entity/Q220"],
+}
+
+
+class TestEntityStore(object):
+    def test_persistence(self, tmp_path):
+        store = EntityStore(tmp_path / "entities.sqlite")
+        store.add_many([LEONARDO, ROME])
+        store.close()
+        store = EntityStore(tmp_path / "entities.sqlite")
+        assert len(store) == 2
+        assert store.get(LEONARDO["id"]) == LEONARDO
+        assert ROME["id"] in store
+
+    def test_queries(self):
+        store = EntityStore()
+        store.add_many([LEONARDO, ROME])
+        assert store.resolve("http://www.wikidata.org/entity/Q762") == LEONARDO
+        assert store.resolve(ROME["id"]) == ROME
+        assert store.resolve("http://www.wikidata.org/entity/Q1") is None
+        assert store.lookup("roma") == [ROME]
+        assert store.lookup("roma", language="en") == []
+        assert store.suggest("leo vin") == [LEONARDO]
+        assert store.suggest("da") == [LEONARDO]
+        assert store.suggest("ro", TYPE="agent") == []
+        assert store.suggest("ro", TYPE="place") == [ROME]
+
+    def test_replace(self):
+        store = EntityStore()
+        store.add(ROME)
+        store.add(dict(ROME, prefLabel={"fr": "Rome"}))
+        assert store.lookup("roma") == []
+        assert len(store) == 1
+
+    def test_retrieve_fetches_once(self):
+        store = EntityStore()
+        with mock.patch.object(
+            entity_store.entity_api, "retrieve", return_value=LEONARDO
+        ) as m:
+            assert store.retrieve(TYPE="agent", IDENTIFIER=146741) == LEONARDO
+            assert store.retrieve(TYPE="agent", IDENTIFIER=146741) == LEONARDO
+        assert m.call_count == 1
@@ -0,0 +1,150 @@
+import gzip
+import io
+import json
+from unittest import mock
+
+import pytest
+import requests
+import urllib3
+
+from pyeuropeana.utils import http
+from pyeuropeana.utils.edm_utils import cursor_search
+from pyeuropeana.utils.http import Deadline, cache_key, get, get_json
+
+
+def fake_response(status_code=200, body=None, headers=None):
+    response = mock.Mock(status_code=status_code, headers=headers or {})
+    response.json.return_value = body
+    return response
+
+
+class TestGetJson(object):
+    url = "https://iiif.europeana.eu/presentation/1/a/manifest"
+
+    def test_revalidation(self):
+        cache = {}
+        headers = {"ETag": '"v1"', "Last-Modified": "Wed, 01 Sep 2021 10:00:00 GMT"}
+        with mock.patch("requests.get") as get:
+            get.return_value = fake_response(body={"v": 1}, headers=headers)
+            assert get_json(self.url, {"wskey": "a"}, cache=cache) == {"v": 1}
+            assert set(get.call_args[1]["headers"]) == {"Accept-Encoding"}
+
+            get.return_value = fake_response(304)
+            # a different API key does not invalidate the cached response
+            assert get_json(self.url, {"wskey": "b"}, cache=cache) == {"v": 1}
+            assert get.call_args[1]["headers"]["If-None-Match"] == '"v1"'
+            assert (
+                get.call_args[1]["headers"]["If-Modified-Since"]
+                == "Wed, 01 Sep 2021 10:00:00 GMT"
+            )
+
+            get.return_value = fake_response(body={"v": 2}, headers={"ETag": '"v2"'})
+            assert get_json(self.url, {"wskey": "a"}, cache=cache) == {"v": 2}
+        assert cache[cache_key(self.url)]["etag"] == '"v2"'
+
+    def test_responses_without_validators_are_not_cached(self):
+        cache = {}
+        with mock.patch("requests.get") as get:
+            get.return_value = fake_response(body={"v": 1})
+            get_json(self.url, cache=cache)
+            get.return_value = fake_response(404, body={"error": "not found"})
+            assert get_json(self.url + "2", cache=cache) == {"error": "not found"}
+        assert cache == {}
+
+
+def gzip_response(body):
+    """
+    Real response object over a gzip-encoded body, decoded by urllib3 when streamed
+    """
+    data = gzip.compress(json.dumps(body).encode())
+    raw = urllib3.HTTPResponse(
+        body=io.BytesIO(data),
+        headers={"Content-Encoding": "gzip"},
+        status=200,
+        preload_content=False,
+    )
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = raw
+    response.headers = requests.structures.CaseInsensitiveDict(raw.headers)
+    return response
+
+
+class TestStreaming(object):
+    url = "https://iiif.europeana.eu/presentation/1/a/annopage/1"
+
+    def test_compressed_body(self):
+        body = {"items": ["text " * 100] * 100}
+        with mock.patch("requests.get", return_value=gzip_response(body)) as get:
+            assert get_json(self.url, max_bytes=10**6, time_limit=5) == body
+        assert "gzip" in get.call_args[1]["headers"]["Accept-Encoding"]
+        assert get.call_args[1]["stream"] is True
+        assert get.call_args[1]["timeout"] == 5
+
+    def test_max_bytes(self):
+        # the limit applies to the decompressed body
+        body = {"items": ["text " * 100] * 100}
+        with mock.patch("requests.get", return_value=gzip_response(body)):
+            with pytest.raises(ValueError):
+                get_json(self.url, max_bytes=10**4)
+
+    def test_time_limit(self):
+        with mock.patch("requests.get", return_value=gzip_response({})):
+            with mock.patch("time.monotonic", side_effect=[0, 100, 200]):
+                with pytest.raises(requests.Timeout):
+                    get_json(self.url, time_limit=5)
+
+
+class TestTimeouts(object):
+    url = "https://api.europeana.eu/record/v2/search.json"
+
+    def test_default_timeout(self):
+        with mock.patch("requests.get", return_value=fake_response()) as requests_get:
+            get(self.url)
+            assert requests_get.call_args[1]["timeout"] == http.TIMEOUT
+            get(self.url, timeout=3)
+            assert requests_get.call_args[1]["timeout"] == 3
+
+    def test_retries(self):
+        responses = [requests.ConnectionError(), fake_response(503), fake_response()]
+        with mock.patch("requests.get", side_effect=responses) as requests_get:
+            with mock.patch("time.sleep") as sleep:
+                assert get(self.url, retries=2).status_code == 200
+        assert requests_get.call_count == 3
+        assert [c[0][0] for c in sleep.call_args_list] == [0.5, 1.0]
+
+    def test_retries_exhausted(self):
+        with mock.patch("requests.get", side_effect=requests.ConnectionError()):
+            with mock.patch("time.sleep"):
+                with pytest.raises(requests.ConnectionError):
+                    get(self.url, retries=1)
+        with mock.patch("requests.get", return_value=fake_response(503)):
+            assert get(self.url).status_code == 503
+
+    def test_deadline_caps_timeouts(self):
+        with mock.patch("time.monotonic", return_value=0):
+            deadline = Deadline(5)
+        with mock.patch("time.monotonic", return_value=3):
+            assert deadline.timeout((10, 60)) == (2, 2)
+            assert deadline.timeout(1) == 1
+        with mock.patch("time.monotonic", return_value=6):
+            with pytest.raises(requests.Timeout):
+                deadline.timeout()
+
+    def test_cursor_search_shares_deadline(self):
+        pages = [
+            fake_response(body={"items": [{"id": "/1/a"}], "nextCursor": "b"}),
+            requests.Timeout(),
+            fake_response(body={"items": [{"id": "/1/b"}], "nextCursor": "c"}),
+        ]
+        clock = iter(range(0, 100, 4))
+        with mock.patch("requests.get", side_effect=pages) as requests_get:
+            with mock.patch("time.monotonic", side_effect=lambda: next(clock)):
+                with mock.patch("time.sleep"):
+                    with pytest.raises(requests.Timeout):
+                        cursor_search(
+                            self.url, {"cursor": "*", "rows": 10}, deadline=10
+                        )
+        # the budget left shrinks with every page and retry until none is left
+        timeouts = [c[1]["timeout"] for c in requests_get.call_args_list]
+        assert timeouts == [(6, 6), (2, 2)]
@@ -0,0 +1,69 @@
+import os
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image
+
+from pyeuropeana.utils.img_cache import ImageCache
+from pyeuropeana.utils.img_utils import fetch_image
+
+
+def jpeg_bytes(size=(800, 600)):
+    buffer = BytesIO()
+    Image.new("RGB", size, (10, 120, 30)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class TestImageCache(object):
+    def test_keys(self):
+        assert ImageCache.key(europeana_id="/79/abc") == "[ph]79[ph]abc.jpg"
+        assert ImageCache.key("http://a.org/1.jpg") != ImageCache.key(
+            "http://a.org/2.jpg"
+        )
+
+    def test_put_get(self, tmp_path):
+        cache = ImageCache(tmp_path)
+        cache.put("k", b"data")
+        cache.put("k", b"other data")
+        assert cache.get("k") == b"other data"
+        assert cache.get("k", (10, 10)) is None
+        assert cache.size == len(b"other data")
+        assert ImageCache(tmp_path).size == cache.size
+
+    def test_lru_eviction(self, tmp_path):
+        cache = ImageCache(tmp_path, max_bytes=350)
+        for mtime, key in enumerate(("a", "b", "c"), start=1):
+            cache.put(key, b"x" * 100)
+            os.utime(tmp_path / "originals" / key, (mtime, mtime))
+        cache.get("a")
+        cache.put("d", b"x" * 100)
+        assert "b" not in cache
+        assert all(key in cache for key in ("a", "c", "d"))
+        assert cache.size == 300
+
+    def test_fetch_image_reads_from_cache(self, tmp_path):
+        cache = ImageCache(tmp_path)
+        url = "https://images.example.org/abc.jpg"
+        with mock.patch(
+            "pyeuropeana.utils.img_utils.download", return_value=jpeg_bytes()
+        ) as download:
+            img = fetch_image(url, size=(100, 100), cache=cache)
+            assert img.size == (100, 75)
+            img = fetch_image(url, size=(100, 100), cache=cache)
+            assert img.size == (100, 75)
+            img = fetch_image(url, cache=cache)
+            assert img.size == (800, 600)
+        assert download.call_count == 1
+
+    def test_thumbnails_are_not_cached(self, tmp_path):
+        cache = ImageCache(tmp_path)
+        url = "https://images.example.org/abc.jpg"
+        with mock.patch(
+            "pyeuropeana.utils.img_utils.download",
+            side_effect=[jpeg_bytes((400, 300)), jpeg_bytes()],
+        ) as download:
+            img = fetch_image(url, size=(1000, 1000), thumbnail=True, cache=cache)
+            assert img.size == (400, 300)
+            img = fetch_image(url, size=(1000, 1000), cache=cache)
+            assert img.size == (800, 600)
+        assert download.call_args_list[1][0][0] == url
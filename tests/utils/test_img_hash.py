@@ -0,0 +1,84 @@
+import numpy as np
+from PIL import Image
+
+from pyeuropeana.utils.img_hash import (
+    HashIndex,
+    ahash,
+    hash_images,
+    phash,
+    popcount,
+)
+
+
+def gradient_image(size=64, flip=False):
+    row = np.linspace(0, 255, size)
+    array = np.tile(row, (size, 1))
+    array = array + 60 * np.sin(np.arange(size) / 5)[:, None]
+    array = np.clip(array, 0, 255)
+    if flip:
+        array = array[:, ::-1]
+    return np.repeat(array[:, :, None], 3, axis=2).astype(np.uint8)
+
+
+class TestHashes(object):
+    def test_popcount(self):
+        values = np.array([0, 1, 0xFF, 2**64 - 1], dtype=np.uint64)
+        assert popcount(values).tolist() == [0, 1, 8, 64]
+
+    def test_hashes_are_robust_to_resizing(self):
+        image = gradient_image(128)
+        small = Image.fromarray(image).resize((48, 48), Image.BILINEAR)
+        for function in (ahash, phash):
+            distance = bin(function(image) ^ function(small)).count("1")
+            assert distance <= 4
+        different = phash(gradient_image(128, flip=True))
+        assert bin(phash(image) ^ different).count("1") > 20
+
+    def test_hash_images(self):
+        batch = np.stack([gradient_image(), gradient_image(flip=True)])
+        hashes, valid = hash_images(batch, mask=np.array([True, False]))
+        assert hashes.dtype == np.uint64
+        assert valid.tolist() == [True, False]
+        assert int(hashes[0]) == phash(batch[0])
+        assert int(hashes[1]) == 0
+        hashes, valid = hash_images([None, batch[1]], method="ahash")
+        assert valid.tolist() == [False, True]
+        assert int(hashes[1]) == ahash(batch[1])
+
+
+class TestHashIndex(object):
+    def build_index(self):
+        index = HashIndex()
+        index.add([0b0, 0b111, 2**64 - 1], ["a", "b", "c"])
+        index.add(np.array([0b1, 2**64 - 4], dtype=np.uint64), ["d", "e"])
+        return index
+
+    def test_query(self):
+        index = self.build_index()
+        assert len(index) == 5
+        assert index.query(0, max_distance=3) == [("a", 0), ("d", 1), ("b", 3)]
+        assert index.query(2**64 - 1, max_distance=0) == [("c", 0)]
+
+    def test_duplicates(self):
+        index = self.build_index()
+        groups = index.duplicates(max_distance=2)
+        assert sorted(map(sorted, groups)) == [["a", "b", "d"], ["c", "e"]]
+        assert sorted(map(sorted, index.duplicates(max_distance=1))) == [["a", "d"]]
+
+    def test_duplicates_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        base = rng.integers(0, 2**63, size=50, dtype=np.uint64)
+        flips = np.uint64(1) << rng.integers(0, 64, size=50).astype(np.uint64)
+        index = HashIndex()
+        index.add(np.concatenate([base, base ^ flips]), range(100))
+        groups = index.duplicates(max_distance=1)
+        assert sorted(map(sorted, groups)) == [[i, i + 50] for i in range(50)]
+
+    def test_save_load(self, tmp_path):
+        index = self.build_index()
+        index.save(tmp_path / "index.npz")
+        loaded = HashIndex.load(tmp_path / "index.npz")
+        assert loaded.ids == index.ids
+        np.testing.assert_array_equal(loaded.hashes, index.hashes)
+        with np.load(tmp_path / "index.npz") as data:
+            assert data["ids"].dtype.kind == "U"
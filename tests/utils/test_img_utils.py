@@ -1,8 +1,20 @@
 from contextlib import nullcontext as does_not_raise
+from io import BytesIO
+from unittest import mock
 
+import numpy as np
 import pytest
+from PIL import Image
 
-from pyeuropeana.utils.img_utils import url2img
+from pyeuropeana.utils.img_utils import (
+    bytes2img,
+    iiif_image_url,
+    img2array,
+    thumbnail_url,
+    url2array,
+    url2img,
+    urls2batch,
+)
 
 
 class TestUrl2img(object):
@@ -21,3 +33,96 @@ class TestUrl2img(object):
     def test_url2img_inputs(self, url, time_limit, expectation):
         with expectation:
             assert url2img(url, time_limit) is None  # none because of function logic
+
+
+def jpeg_bytes(size=(1600, 1200), color=(200, 30, 30)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class TestDownscaling(object):
+    @pytest.mark.parametrize(
+        "url, expected",
+        [
+            (
+                "https://iiif.example.org/iiif/2/abc/full/full/0/default.jpg",
+                "https://iiif.example.org/iiif/2/abc/full/!256,256/0/default.jpg",
+            ),
+            (
+                "https://iiif.example.org/iiif/2/abc/0,0,100,100/max/90/gray.png",
+                "https://iiif.example.org/iiif/2/abc/0,0,100,100/!256,256/90/gray.png",
+            ),
+            (
+                "https://iiif.example.org/iiif/2/abc/info.json",
+                "https://iiif.example.org/iiif/2/abc/full/!256,256/0/default.jpg",
+            ),
+            ("https://images.example.org/abc.jpg", None),
+        ],
+    )
+    def test_iiif_image_url(self, url, expected):
+        assert iiif_image_url(url, (256, 256)) == expected
+
+    def test_thumbnail_url(self):
+        url = thumbnail_url("https://images.example.org/a b.jpg", 150)
+        assert url.endswith(
+            "uri=https%3A%2F%2Fimages.example.org%2Fa%20b.jpg&type=IMAGE&size=w200"
+        )
+
+    def test_bytes2img_draft(self):
+        img = bytes2img(jpeg_bytes(), (200, 200))
+        assert img.mode == "RGB"
+        assert img.size == (200, 150)
+
+    def test_url2array(self):
+        with mock.patch(
+            "pyeuropeana.utils.img_utils.download", return_value=jpeg_bytes()
+        ) as download:
+            array = url2array(
+                "https://iiif.example.org/iiif/2/abc/full/full/0/default.jpg",
+                size=(64, 32),
+            )
+        assert download.call_args[0][0].endswith("/full/!64,32/0/default.jpg")
+        assert array.shape == (32, 64, 3) and array.dtype == np.uint8
+        with mock.patch(
+            "pyeuropeana.utils.img_utils.download", side_effect=ValueError("too big")
+        ):
+            assert url2array("https://images.example.org/abc.jpg") is None
+
+
+class TestBatch(object):
+    @pytest.mark.parametrize(
+        "policy, filled",
+        [
+            # 160x120 image into 64x64: pad leaves bands at top and bottom
+            ("resize", (0, 64)),
+            ("pad", (8, 56)),
+            ("crop", (0, 64)),
+        ],
+    )
+    def test_img2array_policies(self, policy, filled):
+        img = Image.new("RGB", (160, 120), (255, 0, 0))
+        array = img2array(img, (64, 64), policy)
+        assert array.shape == (64, 64, 3)
+        rows = np.nonzero(array[:, 32, 0])[0]
+        assert (rows.min(), rows.max() + 1) == filled
+
+    def test_urls2batch(self):
+        def fake_download(url, **kwargs):
+            if "missing" in url:
+                raise ValueError("404")
+            return jpeg_bytes((300, 200))
+
+        urls = ["https://a.org/1.jpg", "https://a.org/missing.jpg", None]
+        with mock.patch(
+            "pyeuropeana.utils.img_utils.download", side_effect=fake_download
+        ):
+            batch, mask = urls2batch(urls, size=(32, 16), policy="pad")
+        assert batch.shape == (3, 16, 32, 3) and batch.dtype == np.uint8
+        assert mask.tolist() == [True, False, False]
+        assert batch[0, 8, 16, 0] > 150
+        assert not batch[1:].any()
+
+    def test_invalid_policy(self):
+        with pytest.raises(ValueError):
+            urls2batch([], policy="stretch")
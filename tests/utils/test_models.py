@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from pyeuropeana.utils.edm_utils import process_CHO_record
+from pyeuropeana.utils.models import CHO, LangMap, iter_chos
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+@pytest.fixture
+def record_response():
+    return json.loads((DATA_DIR / "record.json").read_text())
+
+
+class TestModels(object):
+    def test_langmap(self):
+        lang_map = LangMap({"nl": ["Titel"], "en": ["Title", "Other"]})
+        assert lang_map["en"] == ("Title", "Other")
+        assert lang_map.first() == "Title"
+        assert LangMap({"nl": ["Titel"]}).first() == "Titel"
+        assert LangMap().first() is None
+        assert "de" not in lang_map
+        assert lang_map.to_dict() == {"nl": ["Titel"], "en": ["Title", "Other"]}
+        with pytest.raises(KeyError):
+            lang_map["de"]
+
+    def test_cho_matches_process_CHO_record(self, record_response):
+        row = process_CHO_record(record_response)
+        cho = CHO.from_response(record_response)
+        assert cho.europeana_id == row["europeana_id"]
+        assert cho.uri == row["uri"]
+        assert cho.title.first() == row["title"]
+        assert cho.provider.first() == row["provider"]
+        assert cho.rights == row["rights"]
+        assert cho.country == row["country"]
+        assert cho.image_url == row["image_url"]
+        assert cho.aggregations[0].web_resources[0].width == 2048
+        assert cho.proxies[1].europeana_proxy
+
+    def test_slots(self, record_response):
+        cho = next(iter_chos([record_response]))
+        with pytest.raises(AttributeError):
+            cho.extra = 1
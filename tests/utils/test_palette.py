@@ -0,0 +1,56 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from pyeuropeana.utils import palette
+from pyeuropeana.utils.palette import extract_palette, extract_palettes, rgb2lab
+
+
+def two_colour_image(size=(100, 100)):
+    array = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    array[:, : size[0] * 3 // 4] = (0, 0, 255)
+    array[:, size[0] * 3 // 4 :] = (250, 250, 250)
+    return array
+
+
+class TestPalette(object):
+    def test_rgb2lab(self):
+        lab = rgb2lab(np.array([[255, 255, 255], [0, 0, 0], [255, 0, 0]]))
+        np.testing.assert_allclose(lab[0], [100, 0, 0], atol=0.05)
+        np.testing.assert_allclose(lab[1], [0, 0, 0], atol=0.05)
+        np.testing.assert_allclose(lab[2], [53.24, 80.09, 67.20], atol=0.05)
+
+    def test_extract_palette(self):
+        image = two_colour_image()
+        assert extract_palette(image, n_colours=2) == ["#0000FF", "#FFFFFF"]
+        assert extract_palette(image, n_colours=2, snap=False) == [
+            "#0000FF",
+            "#FAFAFA",
+        ]
+        assert extract_palette(Image.fromarray(image), n_colours=3)[0] == "#0000FF"
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_extract_palettes(self, processes):
+        batch = np.stack([two_colour_image(), np.zeros((100, 100, 3), np.uint8)])
+        palettes = extract_palettes(
+            batch, n_colours=2, processes=processes, mask=np.array([True, False])
+        )
+        assert palettes == [["#0000FF", "#FFFFFF"], None]
+        palettes = extract_palettes(
+            [None, Image.fromarray(two_colour_image())],
+            n_colours=2,
+            processes=processes,
+        )
+        assert palettes[0] is None and palettes[1][0] == "#0000FF"
+
+    def test_batches_are_downsampled(self):
+        batch = np.stack([two_colour_image((224, 224))] * 3)
+        with mock.patch.object(
+            palette, "_palette_worker", wraps=palette._palette_worker
+        ) as worker:
+            palettes = extract_palettes(batch, n_colours=2, size=64, processes=1)
+        assert palettes == [["#0000FF", "#FFFFFF"]] * 3
+        for ((rgb, _, _),) in (c[0] for c in worker.call_args_list):
+            assert rgb.dtype == np.uint8 and len(rgb) <= 64 * 64
@@ -0,0 +1,103 @@
+import time
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from PIL import Image
+
+from pyeuropeana.utils.edm_utils import RECORD_COLUMNS
+from pyeuropeana.utils.pipeline import (
+    harvest_images,
+    harvest_records,
+    record_bytes2row,
+    run_pipeline,
+)
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+RECORD_BYTES = (DATA_DIR / "record.json").read_bytes()
+
+
+def png_bytes(size=(40, 20), color=(200, 30, 30)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class TestPipeline(object):
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_run_pipeline(self, processes):
+        responses = {"a": RECORD_BYTES, "b": b'{"success": false}', "c": RECORD_BYTES}
+        rows = list(
+            run_pipeline(
+                ["a", "b", "c", "d"],
+                record_bytes2row,
+                fetch=responses.__getitem__,
+                processes=processes,
+                errors="skip",
+            )
+        )
+        assert rows[1] is None and rows[3] is None
+        assert rows[0] == rows[2]
+        assert rows[0]["europeana_id"] == "/79/resource_document_museumboerhaave_V35167"
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_bounded_fetching(self, processes):
+        fetched = []
+
+        def fetch(url):
+            fetched.append(url)
+            return b"data"
+
+        results = run_pipeline(
+            map(str, range(2000)),
+            len,
+            fetch=fetch,
+            threads=2,
+            processes=processes,
+            chunksize=4,
+        )
+        assert next(results) == 4
+        time.sleep(0.2)
+        # window of 8 fetches, plus up to 8 responses waiting for the workers
+        assert len(fetched) <= 17
+        assert sum(1 for _ in results) == 1999
+        assert len(fetched) == 2000
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            list(
+                run_pipeline(
+                    ["a"], record_bytes2row, fetch=lambda url: b"{}", processes=1
+                )
+            )
+        with pytest.raises(ValueError):
+            next(run_pipeline(["a"], record_bytes2row, errors="ignore"))
+
+    def test_harvest_records(self, monkeypatch):
+        monkeypatch.setenv("EUROPEANA_API_KEY", "test")
+        response = mock.Mock(content=RECORD_BYTES)
+        with mock.patch("requests.get", return_value=response) as get:
+            df = harvest_records(["/79/resource_document_museumboerhaave_V35167"] * 3)
+        assert list(df.columns) == RECORD_COLUMNS
+        assert len(df) == 3
+        assert get.call_args[0][0] == (
+            "https://api.europeana.eu/record/v2"
+            "/79/resource_document_museumboerhaave_V35167.json"
+        )
+        assert get.call_args[1]["params"] == {"wskey": "test"}
+
+    def test_harvest_images(self):
+        def download(url, timeout):
+            if url == "broken":
+                raise ValueError(url)
+            return png_bytes()
+
+        with mock.patch("pyeuropeana.utils.pipeline.download", download):
+            batch, mask = harvest_images(
+                ["a", "broken"], size=(20, 20), policy="pad", processes=2
+            )
+        assert batch.shape == (2, 20, 20, 3)
+        assert mask.tolist() == [True, False]
+        assert batch[0, 10, 10].tolist() == [200, 30, 30]
+        assert batch[0, 0, 0].tolist() == [0, 0, 0]
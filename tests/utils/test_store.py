@@ -0,0 +1,116 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from pyeuropeana.utils.store import LocalStore
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+class TestLocalStore(object):
+    def test_items(self, tmp_path):
+        store = LocalStore(tmp_path / "mirror.sqlite")
+        items = [{"id": "/1/a", "timestamp_update": "2021"}, {"id": "/1/b"}]
+        assert store.add_items(items, mark=("query", "2021")) == 2
+        store.add_items([{"id": "/1/a", "title": ["new"]}])
+        store.close()
+
+        store = LocalStore(tmp_path / "mirror.sqlite")
+        assert len(store) == 2
+        assert "/1/b" in store and "/1/c" not in store
+        assert store.get("/1/a") == {"id": "/1/a", "title": ["new"]}
+        assert store.get("/1/c") is None
+        assert sorted(item["id"] for item in store.items()) == ["/1/a", "/1/b"]
+        assert store.get_mark("query") == "2021"
+        assert store.get_mark("other") is None
+        store.set_mark("query", "2022")
+        assert store.get_mark("query") == "2022"
+
+    def test_search(self):
+        store = LocalStore()
+        store.add_items(
+            [
+                {
+                    "id": "/1/a",
+                    "type": "IMAGE",
+                    "country": ["Netherlands"],
+                    "rights": ["http://creativecommons.org/licenses/by-sa/4.0/"],
+                    "dataProvider": ["Museum Boerhaave"],
+                    "edmIsShownBy": ["https://example.org/a.jpg"],
+                    "edmPreview": ["https://example.org/a-thumb.jpg"],
+                },
+                {
+                    "id": "/1/b",
+                    "type": "TEXT",
+                    "country": ["Netherlands"],
+                    "rights": ["http://rightsstatements.org/vocab/InC/1.0/"],
+                    "dataProvider": ["Rijksmuseum"],
+                },
+                {
+                    "id": "/2/c",
+                    "type": "IMAGE",
+                    "country": ["France"],
+                    "rights": ["http://creativecommons.org/licenses/by-nc/4.0/"],
+                    "dataProvider": ["Museum Boerhaave"],
+                    "edmPreview": ["https://example.org/c-thumb.jpg"],
+                },
+            ]
+        )
+
+        def ids(**kwargs):
+            return [item["id"] for item in store.search(**kwargs)["items"]]
+
+        assert ids() == ["/1/a", "/1/b", "/2/c"]
+        assert ids(qf="TYPE:IMAGE") == ["/1/a", "/2/c"]
+        assert ids(qf=['DATA_PROVIDER:"Museum Boerhaave"', "COUNTRY:France"]) == [
+            "/2/c"
+        ]
+        assert ids(qf="RIGHTS:*creativecommons*") == ["/1/a", "/2/c"]
+        assert ids(reusability="open") == ["/1/a"]
+        assert ids(reusability="open AND permission") == ["/1/a", "/1/b"]
+        assert ids(media=True) == ["/1/a"]
+        assert ids(thumbnail=True, qf="TYPE:IMAGE") == ["/1/a", "/2/c"]
+        response = store.search(qf="TYPE:IMAGE", rows=1, start=1)
+        assert response["totalResults"] == 2
+        assert [item["id"] for item in response["items"]] == ["/2/c"]
+        response = store.search(qf="TYPE:IMAGE", rows=0)
+        assert response["totalResults"] == 2 and response["items"] == []
+
+        store.add_items(
+            [
+                {
+                    "id": "/2/d",
+                    "rights": ["http://rightsstatements.org/vocab/NoC-NC/1.0/"],
+                }
+            ]
+        )
+        assert ids(reusability="restricted") == ["/2/c", "/2/d"]
+
+        with pytest.raises(ValueError):
+            store.search(query="leonardo")
+        with pytest.raises(ValueError):
+            store.search(qf="what:ever")
+        with pytest.raises(ValueError):
+            store.search(reusability="free")
+
+    def test_add_records(self):
+        response = json.loads((DATA_DIR / "record.json").read_text())
+        europeana_id = response["object"]["about"]
+        store = LocalStore()
+        assert store.add_records([response]) == 1
+        assert store.record(europeana_id) == {
+            "success": True,
+            "object": response["object"],
+        }
+        item = store.get(europeana_id)
+        assert item["title"] == ["Compound microscope"]
+        assert item["dataProvider"] == ["Rijksmuseum Boerhaave"]
+        assert item["provider"] == ["Digital Collections"]
+        assert store.search(qf="COUNTRY:Netherlands", media=True)["totalResults"] == 1
+
+        # items from the Search API are kept, with the record added to them
+        store.add_items([{"id": europeana_id, "title": ["From search"]}])
+        store.add_records([response])
+        assert store.get(europeana_id)["title"] == ["From search"]
+        assert store.record(europeana_id)["object"]["about"] == europeana_id